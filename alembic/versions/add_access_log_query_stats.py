@@ -0,0 +1,25 @@
+"""add access log query stats
+
+Revision ID: add_access_log_query_stats
+Revises: add_audit_log_indexes
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_access_log_query_stats'
+down_revision: Union[str, None] = 'add_audit_log_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 在分区父表上添加列，已有和新建的月分区自动包含；可空列不重写已有数据
+def upgrade() -> None:
+    op.add_column('access_logs', sa.Column('query_count', sa.Integer(), nullable=True))
+    op.add_column('access_logs', sa.Column('db_time', sa.Integer(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('access_logs', 'db_time')
+    op.drop_column('access_logs', 'query_count')
@@ -0,0 +1,37 @@
+"""add access log rollups
+
+Revision ID: add_access_log_rollups
+Revises: partition_log_tables
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_access_log_rollups'
+down_revision: Union[str, None] = 'partition_log_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        'access_log_rollups',
+        sa.Column('granularity', sa.String(length=6), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('route', sa.String(length=200), nullable=False),
+        sa.Column('method', sa.String(length=10), nullable=False),
+        sa.Column('status_class', sa.String(length=3), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('request_count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('error_count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('latency_sum_ms', sa.Float(), server_default=sa.text('0'), nullable=False),
+        sa.Column('latency_max_ms', sa.Float(), server_default=sa.text('0'), nullable=False),
+        sa.Column('histogram', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'route', 'method', 'status_class', 'tenant_id')
+    )
+
+def downgrade() -> None:
+    op.drop_table('access_log_rollups')
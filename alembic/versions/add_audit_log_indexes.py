@@ -0,0 +1,31 @@
+"""add audit log indexes
+
+Revision ID: add_audit_log_indexes
+Revises: add_access_log_rollups
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_audit_log_indexes'
+down_revision: Union[str, None] = 'add_access_log_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 在分区父表上建索引，已有和新建的月分区都会自动创建对应索引
+INDEXES = {
+    'ix_audit_logs_created_at_brin': "CREATE INDEX IF NOT EXISTS ix_audit_logs_created_at_brin ON audit_logs USING brin (created_at)",
+    'ix_audit_logs_user_id_created_at': "CREATE INDEX IF NOT EXISTS ix_audit_logs_user_id_created_at ON audit_logs (user_id, created_at DESC)",
+    'ix_audit_logs_action_created_at': "CREATE INDEX IF NOT EXISTS ix_audit_logs_action_created_at ON audit_logs (action, created_at DESC)",
+}
+
+def upgrade() -> None:
+    for ddl in INDEXES.values():
+        op.execute(ddl)
+    op.execute("ANALYZE audit_logs")
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,30 @@
+"""add menu closure
+
+Revision ID: add_menu_closure
+Revises: update_timestamp_fields
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+from app.utils.hierarchy import MENU_HIERARCHY
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_menu_closure'
+down_revision: Union[str, None] = 'update_timestamp_fields'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # 1. 创建 menu_closure 表及维护触发器
+    for ddl in MENU_HIERARCHY.ddl("public"):
+        op.execute(ddl)
+    
+    # 2. 按现有 parent_id 构建闭包表
+    for sql in MENU_HIERARCHY.rebuild_sql("public"):
+        op.execute(sql)
+
+def downgrade() -> None:
+    for ddl in MENU_HIERARCHY.drop_ddl("public"):
+        op.execute(ddl)
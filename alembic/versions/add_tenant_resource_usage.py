@@ -0,0 +1,34 @@
+"""add tenant resource usage
+
+Revision ID: add_tenant_resource_usage
+Revises: add_access_log_query_stats
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_tenant_resource_usage'
+down_revision: Union[str, None] = 'add_access_log_query_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        'tenant_resource_usage',
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('request_count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('error_count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('wall_ms', sa.Float(), server_default=sa.text('0'), nullable=False),
+        sa.Column('db_ms', sa.Float(), server_default=sa.text('0'), nullable=False),
+        sa.Column('query_count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('rows_returned', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('bytes_sent', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('bucket_start', 'tenant_id')
+    )
+
+def downgrade() -> None:
+    op.drop_table('tenant_resource_usage')
@@ -0,0 +1,23 @@
+"""drop audit log created_at brin index
+
+Revision ID: drop_audit_log_created_at_brin
+Revises: add_tenant_resource_usage
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'drop_audit_log_created_at_brin'
+down_revision: Union[str, None] = 'add_tenant_resource_usage'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# created_at 上已有 B-tree 索引（不带筛选条件时按时间倒序分页需要），
+# 按时间范围的查询规划器总会选择 B-tree，BRIN 只增加写入和维护开销
+def upgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_created_at_brin")
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_audit_logs_created_at_brin ON audit_logs USING brin (created_at)")
@@ -0,0 +1,102 @@
+"""partition log tables
+
+Revision ID: partition_log_tables
+Revises: add_menu_closure
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+from alembic import op
+import pytz
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.utils.log_partitions import add_months, partition_ddl
+
+# revision identifiers, used by Alembic.
+revision: str = 'partition_log_tables'
+down_revision: Union[str, None] = 'add_menu_closure'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = {
+    'audit_logs': """
+        id BIGSERIAL NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        action VARCHAR(50) NOT NULL,
+        resource_type VARCHAR(50) NOT NULL,
+        resource_id INTEGER NOT NULL,
+        details TEXT,
+        ip_address VARCHAR(50),
+        user_agent VARCHAR(200),
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+    """,
+    'access_logs': """
+        id BIGSERIAL NOT NULL,
+        user_id INTEGER REFERENCES users (id),
+        path VARCHAR(200) NOT NULL,
+        method VARCHAR(10) NOT NULL,
+        status_code INTEGER NOT NULL,
+        response_time INTEGER,
+        process_time INTEGER,
+        ip_address VARCHAR(50),
+        user_agent VARCHAR(200),
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+    """,
+}
+
+COLUMN_NAMES = {
+    'audit_logs': "id, user_id, action, resource_type, resource_id, details, ip_address, user_agent, created_at, updated_at",
+    'access_logs': "id, user_id, path, method, status_code, response_time, process_time, ip_address, user_agent, created_at, updated_at",
+}
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    now = datetime.now(pytz.timezone(settings.TIMEZONE))
+    for table, columns in COLUMNS.items():
+        legacy = f"{table}_legacy"
+        
+        # 1. 原表改名，释放主键、索引和序列名称
+        op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        op.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_id")
+        op.execute(f"ALTER SEQUENCE IF EXISTS {table}_id_seq RENAME TO {legacy}_id_seq")
+        
+        # 2. 创建按月分区的新表，主键包含分区键
+        op.execute(f"""
+            CREATE TABLE {table} (
+                {columns},
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        op.execute(f"CREATE INDEX ix_{table}_created_at ON {table} (created_at)")
+        
+        # 3. 创建覆盖已有数据到未来几个月的分区
+        oldest = bind.execute(sa.text(f"SELECT min(created_at) FROM {legacy}")).scalar()
+        oldest = oldest.astimezone(now.tzinfo) if oldest else now
+        year, month = oldest.year, oldest.month
+        last = add_months(now.year, now.month, settings.LOG_PARTITION_MONTHS_AHEAD)
+        while (year, month) <= last:
+            op.execute(partition_ddl(table, year, month))
+            year, month = add_months(year, month, 1)
+        
+        # 4. 迁移数据并同步序列
+        op.execute(f"INSERT INTO {table} ({COLUMN_NAMES[table]}) SELECT {COLUMN_NAMES[table]} FROM {legacy}")
+        op.execute(f"SELECT setval('{table}_id_seq', COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)")
+        op.execute(f"DROP TABLE {legacy}")
+
+def downgrade() -> None:
+    for table, columns in COLUMNS.items():
+        plain = f"{table}_plain"
+        op.execute(f"CREATE TABLE {plain} (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {plain} SELECT * FROM {table}")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {plain} RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+        op.execute(f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"CREATE INDEX ix_{table}_id ON {table} (id)")
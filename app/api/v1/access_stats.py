@@ -0,0 +1,111 @@
+from typing import Any, Optional
+from datetime import datetime, timedelta
+import pytz
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.config import settings
+from app.deps import get_current_active_superuser
+from app.models.public import User
+from app.schemas.common import Success
+from app.utils.access_rollup import GRANULARITIES, query_rollups
+
+router = APIRouter()
+
+# 分钟粒度最多查询的时间范围
+MAX_MINUTE_RANGE = timedelta(days=1)
+# 自动选择粒度时，不超过该范围使用分钟粒度
+AUTO_MINUTE_RANGE = timedelta(hours=6)
+MAX_RANGE = timedelta(days=400)
+
+def _resolve_range(start_time: Optional[datetime], end_time: Optional[datetime],
+                   granularity: Optional[str]) -> tuple:
+    tz = pytz.timezone(settings.TIMEZONE)
+    end_time = end_time or datetime.now(tz)
+    start_time = start_time or end_time - timedelta(days=1)
+    # 未带时区的时间按系统时区处理
+    if end_time.tzinfo is None:
+        end_time = tz.localize(end_time)
+    if start_time.tzinfo is None:
+        start_time = tz.localize(start_time)
+    if start_time >= end_time:
+        raise HTTPException(
+            status_code=400,
+            detail="开始时间必须早于结束时间"
+        )
+    if end_time - start_time > MAX_RANGE:
+        raise HTTPException(
+            status_code=400,
+            detail="查询时间范围不能超过400天"
+        )
+    if granularity is None:
+        granularity = "minute" if end_time - start_time <= AUTO_MINUTE_RANGE else "hour"
+    elif granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail="统计粒度只能为 minute 或 hour"
+        )
+    if granularity == "minute" and end_time - start_time > MAX_MINUTE_RANGE:
+        raise HTTPException(
+            status_code=400,
+            detail="分钟粒度的查询时间范围不能超过1天"
+        )
+    return start_time, end_time, granularity
+
+@router.get("/routes", summary="按路由统计访问量和延迟")
+async def get_route_stats(
+    start_time: Optional[datetime] = Query(None, description="开始时间，默认结束时间前1天"),
+    end_time: Optional[datetime] = Query(None, description="结束时间，默认当前时间"),
+    granularity: Optional[str] = Query(None, description="统计粒度 minute/hour，默认按时间范围自动选择"),
+    route: Optional[str] = Query(None, description="路由模板，如 /api/v1/user/list"),
+    method: Optional[str] = None,
+    status_class: Optional[str] = Query(None, description="状态码类别，如 2xx、5xx"),
+    tenant_id: Optional[int] = Query(None, description="租户ID，0 表示无租户的请求"),
+    top: int = Query(50, ge=1, le=500, description="按请求数返回前 N 个路由"),
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    按（路由模板, 请求方法）合并时间范围内的预聚合桶，返回请求数、错误率和 p50/p95/p99 延迟
+    """
+    start_time, end_time, granularity = _resolve_range(start_time, end_time, granularity)
+    merged = await query_rollups(
+        start_time, end_time, granularity, ("route", "method"),
+        route=route, method=method, status_class=status_class, tenant_id=tenant_id
+    )
+    routes = sorted(merged.items(), key=lambda item: item[1].request_count, reverse=True)[:top]
+    return Success(data={
+        "start_time": start_time,
+        "end_time": end_time,
+        "granularity": granularity,
+        "routes": [
+            {"route": key[0], "method": key[1], **stats.to_dict()}
+            for key, stats in routes
+        ]
+    })
+
+@router.get("/timeseries", summary="按时间桶统计访问量和延迟")
+async def get_timeseries_stats(
+    start_time: Optional[datetime] = Query(None, description="开始时间，默认结束时间前1天"),
+    end_time: Optional[datetime] = Query(None, description="结束时间，默认当前时间"),
+    granularity: Optional[str] = Query(None, description="统计粒度 minute/hour，默认按时间范围自动选择"),
+    route: Optional[str] = Query(None, description="路由模板，为空时统计全部路由"),
+    method: Optional[str] = None,
+    status_class: Optional[str] = Query(None, description="状态码类别，如 2xx、5xx"),
+    tenant_id: Optional[int] = Query(None, description="租户ID，0 表示无租户的请求"),
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    按时间桶返回请求数、错误率和 p50/p95/p99 延迟，用于趋势图
+    """
+    start_time, end_time, granularity = _resolve_range(start_time, end_time, granularity)
+    merged = await query_rollups(
+        start_time, end_time, granularity, ("bucket_start",),
+        route=route, method=method, status_class=status_class, tenant_id=tenant_id
+    )
+    return Success(data={
+        "start_time": start_time,
+        "end_time": end_time,
+        "granularity": granularity,
+        "points": [
+            {"bucket_start": key[0].astimezone(pytz.timezone(settings.TIMEZONE)), **stats.to_dict()}
+            for key, stats in sorted(merged.items(), key=lambda item: item[0])
+        ]
+    })
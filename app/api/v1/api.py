@@ -7,6 +7,7 @@ from app.deps import get_current_user
 from app.models.public import Api, User
 from app.schemas.api import ApiCreate, ApiUpdate, ApiResponse
 from app.schemas.common import Success, SuccessExtra
+from app.utils.invalidation import publish
 
 router = APIRouter()
 
@@ -72,6 +73,7 @@ async def create_api(
     )
     db.add(api)
     await db.commit()
+    await publish("api")
     await db.refresh(api)
     return Success(data=api)
 
@@ -94,6 +96,7 @@ async def delete_api(
     
     await db.delete(api)
     await db.commit()
+    await publish("api")
     return Success(data={"message": "API deleted successfully"})
 
 @router.post("/refresh")
@@ -5,15 +5,16 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password, decrypt_password, get_password_hash, encrypt_password
+from app.core.security import create_access_token, verify_password_async, decrypt_password, get_password_hash_async, encrypt_password
 from app.db.session import get_db
-from app.models.public import User, Menu, Api, Role, RoleMenu, RoleApi, UserRole
+from app.models.public import User, Role, UserRole
 from app.schemas.token import Token, LoginRequest, JWTPayload, JWTOut
 from app.schemas.user import UserCreate, UserResponse, UserInfoResponse, UpdatePasswordRequest
 from app.schemas.menu import MenuResponse
 from app.schemas.common import Success, SuccessExtra, BaseSchema
 from app.deps import get_current_user, get_current_active_superuser
 from app.core.log import get_logger
+from app.utils.user_permissions import get_user_menu_tree, get_user_api_paths
 import logging
 
 router = APIRouter()
@@ -41,7 +42,7 @@ async def login_access_token(
     )
     user = result.scalar_one_or_none()
     
-    if user is None or not verify_password(decrypted_password, user.password):
+    if user is None or not await verify_password_async(decrypted_password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -121,94 +122,20 @@ async def get_user_info(
 
 @router.get("/usermenu", summary="获取当前用户菜单")
 async def get_user_menu(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ) -> Any:
     """获取当前用户的菜单"""
-    # 如果是超级管理员，返回所有菜单
-    if current_user.is_superuser:
-        result = await db.execute(
-            select(Menu)
-            .where(Menu.is_deleted == False)
-            .order_by(Menu.order)
-        )
-        menus = result.scalars().all()
-    else:
-        # 获取用户角色关联的菜单
-        result = await db.execute(
-            select(Menu)
-            .join(RoleMenu)
-            .join(Role)
-            .join(Role.users)
-            .where(User.id == current_user.id)
-            .where(Menu.is_deleted == False)
-            .order_by(Menu.order)
-        )
-        menus = result.scalars().all()
-    
-    # 构建树形结构
-    menu_dict = {}
-    root_menus = []
-    
-    # 第一次遍历：创建菜单字典和初始化 children 列表
-    for menu in menus:
-        menu_dict[menu.id] = {
-            "id": menu.id,
-            "name": menu.name,
-            "title": menu.name,
-            "menu_type": menu.menu_type,
-            "path": menu.path,
-            "component": menu.component,
-            "icon": menu.icon,
-            "order": menu.order,
-            "parent_id": menu.parent_id,
-            "is_hidden": menu.is_hidden,
-            "keepalive": menu.keepalive,
-            "redirect": menu.redirect,
-            "is_enabled": True,
-            "children": []
-        }
-    
-    # 第二次遍历：构建树形结构
-    for menu in menus:
-        menu_data = menu_dict[menu.id]
-        if menu.parent_id is None:
-            root_menus.append(menu_data)
-        else:
-            parent = menu_dict.get(menu.parent_id)
-            if parent:
-                parent["children"].append(menu_data)
-    
+    root_menus = await get_user_menu_tree(current_user)
     return Success(data=root_menus)
 
 @router.get("/userapi", summary="获取当前用户API权限")
 async def get_user_api(
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     获取当前用户的API权限
     """
-    # 如果是超级管理员，返回所有API
-    if current_user.is_superuser:
-        result = await db.execute(
-            select(Api)
-            .where(Api.is_deleted == False)
-        )
-        apis = result.scalars().all()
-    else:
-        # 获取用户角色关联的API
-        result = await db.execute(
-            select(Api)
-            .join(RoleApi)
-            .join(Role)
-            .join(Role.users)
-            .where(User.id == current_user.id)
-            .where(Api.is_deleted == False)
-        )
-        apis = result.scalars().all()
-    
-    api_paths = [api.path for api in apis]
+    api_paths = await get_user_api_paths(current_user)
     return Success(data=api_paths)
 
 @router.post("/update_password", summary="修改密码")
@@ -231,14 +158,14 @@ async def update_password(
         )
     
     # 验证旧密码
-    if not verify_password(old_password, current_user.password):
+    if not await verify_password_async(old_password, current_user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="旧密码错误"
         )
     
     # 更新密码
-    current_user.password = get_password_hash(new_password)
+    current_user.password = await get_password_hash_async(new_password)
     await db.commit()
     
     return Success(data={"msg": "密码修改成功"}) 
\ No newline at end of file
@@ -0,0 +1,149 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+from app.deps import get_current_user, get_current_tenant_admin, get_current_tenant_db
+from app.models.public import User
+from app.models.tenant import Department
+from app.schemas.tenant import DepartmentCreate, DepartmentUpdate, DepartmentResponse
+from app.schemas.common import Success
+from app.utils.hierarchy import DEPARTMENT_HIERARCHY
+from app.core.log import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+async def _get_department(db: AsyncSession, id: int) -> Department:
+    result = await db.execute(select(Department).where(Department.id == id))
+    department = result.scalar_one_or_none()
+    if not department:
+        raise HTTPException(
+            status_code=404,
+            detail="院系不存在"
+        )
+    return department
+
+@router.get("/list", summary="获取院系列表")
+async def get_departments(
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取当前租户全部院系（平铺），每项附带深度
+    """
+    result = await db.execute(text("""
+        SELECT d.*, c.depth
+        FROM departments d
+        JOIN (
+            SELECT descendant_id, max(depth) AS depth FROM department_closure GROUP BY descendant_id
+        ) AS c ON c.descendant_id = d.id
+        ORDER BY c.depth, d."order", d.id
+    """))
+    return Success(data=[dict(row) for row in result.mappings().all()])
+
+@router.post("/create", summary="创建院系")
+async def create_department(
+    department_in: DepartmentCreate,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    创建院系，闭包表由触发器维护
+    """
+    if department_in.parent_id is not None:
+        await _get_department(db, department_in.parent_id)
+
+    department = Department(**department_in.model_dump())
+    db.add(department)
+    await db.commit()
+    await db.refresh(department)
+    logger.info(f"院系已创建: tenant={current_user.tenant_id}, id={department.id}, name={department.name}")
+    return Success(data=DepartmentResponse.model_validate(department).model_dump())
+
+@router.put("/update", summary="更新院系")
+async def update_department(
+    id: int,
+    department_in: DepartmentUpdate,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    更新院系，修改上级院系时整棵子树随之移动
+    """
+    department = await _get_department(db, id)
+    update_data = department_in.model_dump(exclude_unset=True)
+    parent_id = update_data.get("parent_id")
+    if parent_id is not None and parent_id != department.parent_id:
+        await _get_department(db, parent_id)
+        if await DEPARTMENT_HIERARCHY.contains(db, department.id, parent_id):
+            raise HTTPException(
+                status_code=400,
+                detail="不能将院系移动到其自身或下级院系之下"
+            )
+
+    for field, value in update_data.items():
+        setattr(department, field, value)
+    await db.commit()
+    await db.refresh(department)
+    logger.info(f"院系已更新: tenant={current_user.tenant_id}, id={department.id}")
+    return Success(data=DepartmentResponse.model_validate(department).model_dump())
+
+@router.delete("/delete", summary="删除院系")
+async def delete_department(
+    id: int,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    删除院系，存在下级院系时不允许删除
+    """
+    department = await _get_department(db, id)
+    children = await db.scalar(
+        text("SELECT count(*) FROM department_closure WHERE ancestor_id = :id AND depth = 1"),
+        {"id": id}
+    )
+    if children:
+        raise HTTPException(
+            status_code=400,
+            detail="该院系存在下级院系，不能删除"
+        )
+
+    await db.delete(department)
+    await db.commit()
+    logger.info(f"院系已删除: tenant={current_user.tenant_id}, id={id}")
+    return Success(data={"id": id})
+
+@router.get("/subtree", summary="获取院系子树")
+async def get_department_subtree(
+    id: int,
+    max_depth: Optional[int] = Query(None, ge=0, description="相对深度上限，为空时返回全部下级"),
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取院系及其全部下级院系，depth 为相对该院系的层级
+    """
+    departments = await DEPARTMENT_HIERARCHY.subtree(db, id, max_depth)
+    if not departments:
+        raise HTTPException(
+            status_code=404,
+            detail="院系不存在"
+        )
+    return Success(data=departments)
+
+@router.get("/ancestors", summary="获取院系上级链")
+async def get_department_ancestors(
+    id: int,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取院系的上级链（从顶级院系到自身）及院系深度（顶级院系为0）
+    """
+    ancestors = await DEPARTMENT_HIERARCHY.ancestors(db, id)
+    if not ancestors:
+        raise HTTPException(
+            status_code=404,
+            detail="院系不存在"
+        )
+    return Success(data={"depth": len(ancestors) - 1, "ancestors": ancestors})
@@ -0,0 +1,201 @@
+from typing import Any
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from app.deps import get_current_tenant_admin, get_current_tenant_db
+from app.models.public import User
+from app.schemas.dormitory import DormitoryAllocationRequest, DormitoryAssignment, BedReservationRequest
+from app.schemas.common import Success
+from app.utils.dorm_allocation import AllocationPolicy, compute_allocation
+from app.utils.dorm_reservation import ReservationError, reserve_bed
+from app.core.log import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+def _column(rows, index: int, dtype=object) -> np.ndarray:
+    """取查询结果的一列为 NumPy 数组"""
+    return np.array([row[index] for row in rows], dtype=dtype)
+
+@router.post("/allocate", summary="批量分配宿舍")
+async def allocate_dormitories(
+    allocation_in: DormitoryAllocationRequest,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    按策略为一个录取批次的未分配学生批量分配宿舍
+    1. 一次性读取学生、房间和已入住情况，在内存中计算分配结果
+    2. dry_run 为 true 时只返回预览
+    3. 否则通过一条集合化 UPDATE 写入学生宿舍，并重新统计房间入住人数
+    """
+    policy = AllocationPolicy(
+        same_gender=allocation_in.same_gender,
+        same_department=allocation_in.same_department,
+        buildings=allocation_in.buildings
+    )
+    logger.info(
+        f"开始计算宿舍分配: batch={allocation_in.admission_batch_id}, "
+        f"dry_run={allocation_in.dry_run}, policy={policy}"
+    )
+
+    # 正式分配时锁定房间，避免并发分配或选床导致超员
+    room_lock = "" if allocation_in.dry_run else " FOR UPDATE"
+    room_rows = (await db.execute(text(
+        "SELECT id, building, room_number, capacity, current_count "
+        "FROM dormitories WHERE status = TRUE" + room_lock
+    ))).all()
+
+    student_rows = (await db.execute(
+        text("""
+            SELECT id_card, student_id, name, gender, department_id
+            FROM students
+            WHERE admission_batch_id = :batch_id
+              AND dormitory_id IS NULL
+              AND status = TRUE
+            ORDER BY student_id, id_card
+        """),
+        {"batch_id": allocation_in.admission_batch_id}
+    )).all()
+
+    occupant_rows = (await db.execute(text("""
+        SELECT dormitory_id, gender, department_id
+        FROM students
+        WHERE dormitory_id IS NOT NULL
+    """))).all()
+
+    result = compute_allocation(
+        policy,
+        student_id_cards=_column(student_rows, 0),
+        student_genders=_column(student_rows, 3),
+        student_departments=_column(student_rows, 4),
+        room_ids=_column(room_rows, 0, np.int64),
+        room_buildings=_column(room_rows, 1),
+        room_numbers=_column(room_rows, 2),
+        room_capacities=np.array([row[3] or 0 for row in room_rows], dtype=np.int64),
+        room_counts=np.array([row[4] or 0 for row in room_rows], dtype=np.int64),
+        occupant_room_ids=_column(occupant_rows, 0, np.int64),
+        occupant_genders=_column(occupant_rows, 1),
+        occupant_departments=_column(occupant_rows, 2),
+    )
+    logger.info(
+        f"宿舍分配计算完成: 待分配 {len(student_rows)} 人, "
+        f"已分配 {result.assigned_count} 人, 使用房间 {result.rooms_used.size} 间"
+    )
+
+    applied = 0
+    if not allocation_in.dry_run and result.assigned_count:
+        try:
+            update_result = await db.execute(
+                text("""
+                    UPDATE students AS s
+                    SET dormitory_id = v.dormitory_id,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM unnest(CAST(:id_cards AS VARCHAR[]), CAST(:dormitory_ids AS INTEGER[]))
+                        AS v(id_card, dormitory_id)
+                    WHERE s.id_card = v.id_card
+                      AND s.dormitory_id IS NULL
+                """),
+                {
+                    "id_cards": result.id_cards.tolist(),
+                    "dormitory_ids": result.dormitory_ids.tolist()
+                }
+            )
+            applied = update_result.rowcount
+
+            # 按实际入住学生重新统计房间人数
+            await db.execute(
+                text("""
+                    UPDATE dormitories AS d
+                    SET current_count = c.cnt,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM (
+                        SELECT r.id, count(s.id_card) AS cnt
+                        FROM dormitories r
+                        LEFT JOIN students s ON s.dormitory_id = r.id
+                        WHERE r.id = ANY(CAST(:room_ids AS INTEGER[]))
+                        GROUP BY r.id
+                    ) AS c
+                    WHERE d.id = c.id
+                """),
+                {"room_ids": result.rooms_used.tolist()}
+            )
+            await db.commit()
+            logger.info(f"宿舍分配已写入: {applied} 人")
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"写入宿舍分配失败: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"写入宿舍分配失败: {str(e)}"
+            )
+
+    # 构建预览明细
+    students_by_card = {row[0]: row for row in student_rows}
+    rooms_by_id = {row[0]: row for row in room_rows}
+    preview = []
+    for id_card, dormitory_id in zip(
+        result.id_cards[:allocation_in.preview_limit].tolist(),
+        result.dormitory_ids[:allocation_in.preview_limit].tolist()
+    ):
+        student = students_by_card[id_card]
+        room = rooms_by_id[dormitory_id]
+        preview.append(DormitoryAssignment(
+            id_card=id_card,
+            student_id=student[1],
+            name=student[2],
+            dormitory_id=dormitory_id,
+            building=room[1],
+            room_number=room[2]
+        ).model_dump())
+
+    return Success(data={
+        "dry_run": allocation_in.dry_run,
+        "total": len(student_rows),
+        "assigned": result.assigned_count,
+        "applied": applied,
+        "unassigned": int(result.unassigned.size),
+        "rooms_used": int(result.rooms_used.size),
+        "shortages": result.shortages,
+        "assignments": preview
+    })
+
+@router.post("/reserve", summary="学生选床")
+async def reserve_dormitory_bed(
+    reservation_in: BedReservationRequest,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    学生选床
+    1. 指定房间时，房间有空床才会占用成功
+    2. 不指定房间时，自动选择（指定楼栋内）第一间有空床且未被其他请求锁定的房间
+    3. 同一学生重复提交返回已选结果
+    4. 用户与学生之间尚无关联，暂时只允许租户管理员代学生选床
+    """
+    try:
+        reservation = await reserve_bed(
+            db,
+            student_id=reservation_in.student_id,
+            dormitory_id=reservation_in.dormitory_id,
+            building=reservation_in.building
+        )
+    except ReservationError as e:
+        logger.debug("选床失败: student=%s, %s", reservation_in.student_id, e.detail)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        )
+
+    logger.debug(
+        "选床成功: student=%s, dormitory=%s, already_reserved=%s",
+        reservation_in.student_id, reservation.dormitory_id, reservation.already_reserved
+    )
+    return Success(data={
+        "student_id": reservation_in.student_id,
+        "dormitory_id": reservation.dormitory_id,
+        "building": reservation.building,
+        "room_number": reservation.room_number,
+        "already_reserved": reservation.already_reserved
+    })
@@ -0,0 +1,110 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.deps import get_current_user, get_current_tenant_admin, get_current_tenant_db
+from app.models.public import User
+from app.models.tenant import FieldMapping
+from app.schemas.tenant import FieldMappingCreate, FieldMappingUpdate, FieldMappingResponse
+from app.schemas.common import Success
+from app.utils.field_mapping import EXT_FIELDS
+from app.utils.invalidation import publish
+from app.core.log import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+def _check_field_name(field_name: str):
+    if field_name not in EXT_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"字段名必须是 {EXT_FIELDS[0]} 至 {EXT_FIELDS[-1]} 之一"
+        )
+
+@router.get("/list", summary="获取字段映射列表")
+async def get_field_mappings(
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取当前租户的学生扩展字段映射
+    """
+    result = await db.execute(select(FieldMapping).order_by(FieldMapping.order, FieldMapping.id))
+    mappings = result.scalars().all()
+    return Success(data=[FieldMappingResponse.model_validate(m).model_dump() for m in mappings])
+
+@router.post("/create", summary="创建字段映射")
+async def create_field_mapping(
+    mapping_in: FieldMappingCreate,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    创建学生扩展字段映射
+    """
+    _check_field_name(mapping_in.field_name)
+    result = await db.execute(select(FieldMapping).where(FieldMapping.field_name == mapping_in.field_name))
+    if result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=400,
+            detail="该扩展字段已存在映射"
+        )
+
+    mapping = FieldMapping(**mapping_in.model_dump())
+    db.add(mapping)
+    await db.commit()
+    await db.refresh(mapping)
+    await publish("field_mapping", current_user.tenant_id)
+    logger.info(f"字段映射已创建: tenant={current_user.tenant_id}, {mapping.field_name} -> {mapping.display_name}")
+    return Success(data=FieldMappingResponse.model_validate(mapping).model_dump())
+
+@router.put("/update", summary="更新字段映射")
+async def update_field_mapping(
+    id: int,
+    mapping_in: FieldMappingUpdate,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    更新学生扩展字段映射
+    """
+    result = await db.execute(select(FieldMapping).where(FieldMapping.id == id))
+    mapping = result.scalar_one_or_none()
+    if not mapping:
+        raise HTTPException(
+            status_code=404,
+            detail="字段映射不存在"
+        )
+
+    update_data = mapping_in.model_dump(exclude_unset=True)
+    if "field_name" in update_data:
+        _check_field_name(update_data["field_name"])
+    for field, value in update_data.items():
+        setattr(mapping, field, value)
+
+    await db.commit()
+    await db.refresh(mapping)
+    await publish("field_mapping", current_user.tenant_id)
+    return Success(data=FieldMappingResponse.model_validate(mapping).model_dump())
+
+@router.delete("/delete", summary="删除字段映射")
+async def delete_field_mapping(
+    id: int,
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    删除学生扩展字段映射
+    """
+    result = await db.execute(select(FieldMapping).where(FieldMapping.id == id))
+    mapping = result.scalar_one_or_none()
+    if not mapping:
+        raise HTTPException(
+            status_code=404,
+            detail="字段映射不存在"
+        )
+
+    await db.delete(mapping)
+    await db.commit()
+    await publish("field_mapping", current_user.tenant_id)
+    return Success(data={"message": "Field mapping deleted successfully"})
@@ -1,5 +1,11 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, Query
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+import pytz
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from app.db.session import get_db
@@ -7,8 +13,13 @@ from app.deps import get_current_user, get_current_active_superuser
 from app.models.public import User, AuditLog
 from app.schemas.log import AuditLogResponse
 from app.schemas.common import Success, SuccessExtra
+from app.core.config import settings
+from app.core.log import get_logger
+from app.utils.audit import EXPORT_COLUMNS, audit_log_query, log_audit, parse_log_time, parse_time_range, stream_audit_logs
+from app.utils.log_archive import search_archive
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 @router.get("/list")
 async def get_logs(
@@ -23,24 +34,32 @@ async def get_logs(
 ) -> Any:
     """
     获取审计日志列表
+    按 created_at 筛选时只扫描相关月份的分区，时间格式错误时返回 400
+    已归档的月份从归档文件中查询，排在数据库中的日志之后（归档的都是更早的月份）
     """
-    query = select(AuditLog).where(AuditLog.is_deleted == False)
-    
-    if user_id:
-        query = query.where(AuditLog.user_id == user_id)
-    if action:
-        query = query.where(AuditLog.action == action)
-    if start_time:
-        query = query.where(AuditLog.created_at >= start_time)
-    if end_time:
-        query = query.where(AuditLog.created_at <= end_time)
+    query = audit_log_query(user_id, action, start_time, end_time)
+    offset = (page - 1) * page_size
     
     total = await db.scalar(select(func.count()).select_from(query.subquery()))
     query = query.order_by(AuditLog.created_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    query = query.offset(offset).limit(page_size)
     
     result = await db.execute(query)
-    logs = result.scalars().all()
+    logs = [AuditLogResponse.model_validate(log).model_dump() for log in result.scalars().all()]
+    
+    if settings.AUDIT_LOG_ARCHIVE_AFTER_MONTHS > 0:
+        start, end = parse_time_range(start_time, end_time)
+        equals = {column: value for column, value in (("user_id", user_id), ("action", action)) if value}
+        # 按用户筛选时只读取该用户所在租户的归档文件
+        tenant_ids = None
+        if user_id:
+            tenant_ids = {await db.scalar(select(User.tenant_id).where(User.id == user_id)) or 0}
+        archived_total, archived = await search_archive(
+            db, "audit_logs", equals, start, end,
+            offset=max(offset - total, 0), limit=page_size - len(logs), tenant_ids=tenant_ids
+        )
+        total += archived_total
+        logs += [AuditLogResponse.model_validate(row).model_dump() for row in archived]
     
     return SuccessExtra(data=logs, total=total, page=page, page_size=page_size)
 
@@ -62,23 +81,86 @@ async def get_log(
         )
     return Success(data=log)
 
-@router.delete("/delete")
-async def delete_log(
-    log_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+
+def _format_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _encode_csv(rows: List[tuple]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_format_value(value) for value in row] for row in rows])
+    return buffer.getvalue().encode("utf-8")
+
+def _encode_ndjson(rows: List[tuple]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_format_value, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+@router.get("/export")
+async def export_logs(
+    request: Request,
+    current_user: User = Depends(get_current_active_superuser),
+    format: str = Query("csv", description="导出格式 csv/ndjson"),
+    user_id: int = None,
+    action: str = None,
+    start_time: str = None,
+    end_time: str = None,
+    after_time: Optional[str] = Query(None, description="续传：上次导出最后一行的 created_at"),
+    after_id: Optional[int] = Query(None, description="续传：上次导出最后一行的 id")
 ) -> Any:
     """
-    删除审计日志（软删除）
+    流式导出审计日志（CSV 或 NDJSON），按 (created_at, id) 升序输出
+    使用服务端游标分批读取，内存占用与导出行数无关；
+    中断后以最后一行的 created_at 和 id 作为 after_time、after_id 重新请求即可继续
     """
-    result = await db.execute(select(AuditLog).where(AuditLog.id == log_id))
-    log = result.scalar_one_or_none()
-    if not log:
+    if format not in ("csv", "ndjson"):
         raise HTTPException(
-            status_code=404,
-            detail="Log not found"
+            status_code=400,
+            detail="导出格式只能为 csv 或 ndjson"
         )
-    
-    log.is_deleted = True
-    await db.commit()
-    return Success(data={"message": "Log deleted successfully"}) 
\ No newline at end of file
+    if (after_time is None) != (after_id is None):
+        raise HTTPException(
+            status_code=400,
+            detail="after_time 和 after_id 必须同时提供"
+        )
+    # 流式输出开始后无法再返回错误，参数在此之前全部校验
+    query = audit_log_query(user_id, action, start_time, end_time)
+    after = (parse_log_time(after_time, "after_time")[0], after_id) if after_time else None
+
+    await log_audit(
+        user_id=current_user.id,
+        action="export",
+        resource_type="audit_log",
+        resource_id=0,
+        details=json.dumps({
+            "format": format, "user_id": user_id, "action": action,
+            "start_time": start_time, "end_time": end_time,
+            "after_time": after_time, "after_id": after_id
+        }, ensure_ascii=False),
+        request=request
+    )
+
+    encode = _encode_csv if format == "csv" else _encode_ndjson
+    exporter_id = current_user.id
+
+    async def generate():
+        if format == "csv":
+            # 表头立即输出，首字节时间与数据量无关
+            yield _encode_csv([EXPORT_COLUMNS])
+        count = 0
+        try:
+            async for rows in stream_audit_logs(query, after):
+                count += len(rows)
+                yield encode(rows)
+        except Exception as e:
+            logger.error("审计日志导出中断: 已输出 %s 行, 错误: %s", count, e)
+            raise
+        logger.info("审计日志导出完成: user=%s, 格式 %s, 共 %s 行", exporter_id, format, count)
+
+    filename = f"audit_logs_{datetime.now(pytz.timezone(settings.TIMEZONE)):%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
\ No newline at end of file
@@ -1,5 +1,5 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.deps import get_current_user
@@ -7,6 +7,8 @@ from app.db.session import get_db
 from app.models.public import Menu, User
 from app.schemas.menu import MenuCreate, MenuUpdate, MenuResponse
 from app.schemas.common import Success, SuccessExtra
+from app.utils.hierarchy import MENU_HIERARCHY
+from app.utils.invalidation import publish
 
 router = APIRouter()
 
@@ -45,6 +47,7 @@ async def create_menu(
     menu.tenant_id = current_user.tenant_id
     db.add(menu)
     await db.commit()
+    await publish("menu")
     await db.refresh(menu)
     return Success(data=menu)
 
@@ -100,6 +103,7 @@ async def update_menu(
         setattr(menu, field, value)
     
     await db.commit()
+    await publish("menu")
     await db.refresh(menu)
     return Success(data=menu)
 
@@ -128,5 +132,43 @@ async def delete_menu(
     
     menu.is_deleted = True
     await db.commit()
+    await publish("menu")
     await db.refresh(menu)
-    return Success(data=menu) 
\ No newline at end of file
+    return Success(data=menu) 
+
+@router.get("/subtree", summary="获取菜单子树")
+async def get_menu_subtree(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    id: int,
+    max_depth: Optional[int] = Query(None, ge=0, description="相对深度上限，为空时返回全部下级")
+) -> Any:
+    """
+    获取菜单及其全部下级菜单（不含已删除），depth 为相对该菜单的层级
+    """
+    menus = await MENU_HIERARCHY.subtree(db, id, max_depth, where="n.is_deleted = FALSE")
+    if not menus:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Menu not found"
+        )
+    return Success(data=menus)
+
+@router.get("/ancestors", summary="获取菜单上级链")
+async def get_menu_ancestors(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    id: int
+) -> Any:
+    """
+    获取菜单的上级链（从顶级菜单到自身）及菜单深度（顶级菜单为0）
+    """
+    ancestors = await MENU_HIERARCHY.ancestors(db, id)
+    if not ancestors:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Menu not found"
+        )
+    return Success(data={"depth": len(ancestors) - 1, "ancestors": ancestors})
@@ -0,0 +1,74 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.deps import get_current_user, get_current_tenant_admin, get_current_tenant_db
+from app.models.public import User
+from app.schemas.registration import RegistrationCheckinRequest
+from app.schemas.common import Success
+from app.utils.checkin_batcher import CheckinItem, get_checkin_batcher
+from app.utils.registration_progress import get_progress, reconcile_progress
+from app.core.log import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+@router.post("/checkin", summary="报到签到")
+async def checkin(
+    checkin_in: RegistrationCheckinRequest,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    记录学生完成报到环节
+    并发的签到请求会在几毫秒内合并为一次批量写入，返回时记录已提交
+    """
+    if not current_user.tenant_id:
+        raise HTTPException(
+            status_code=400,
+            detail="用户未分配租户"
+        )
+
+    try:
+        ack = await get_checkin_batcher(current_user.tenant_id).submit(CheckinItem(
+            student_id=checkin_in.student_id,
+            process_id=checkin_in.process_id,
+            status=checkin_in.status,
+            operator_id=current_user.id,
+            remarks=checkin_in.remarks
+        ))
+    except Exception as e:
+        logger.error(f"签到失败: student={checkin_in.student_id}, process={checkin_in.process_id}, 错误: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"签到失败: {str(e)}"
+        )
+
+    return Success(data={
+        "id": ack.id,
+        "student_id": ack.student_id,
+        "process_id": ack.process_id,
+        "status": ack.status,
+        "completed_at": ack.completed_at
+    })
+
+@router.get("/progress", summary="获取报到进度")
+async def get_registration_progress(
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取各院系各报到环节的完成人数和完成率
+    数据来自增量维护的汇总表，不扫描学生和报到记录
+    """
+    return Success(data=await get_progress(db))
+
+@router.post("/progress/reconcile", summary="重算报到进度")
+async def reconcile_registration_progress(
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    从学生和报到记录全量重算报到进度汇总
+    """
+    await reconcile_progress(db, current_user.tenant_id)
+    logger.info(f"报到进度已重算: tenant={current_user.tenant_id}")
+    return Success(data=await get_progress(db))
@@ -0,0 +1,53 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from app.deps import get_current_active_superuser
+from app.models.public import User
+from app.schemas.common import Success
+from app.schemas.report import ReportRunRequest
+from app.utils.tenant_report import REPORTS, ReportError, run_report
+from app.core.log import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+@router.get("/list", summary="获取跨租户报表列表")
+async def get_reports(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    获取可用的跨租户报表及其参数
+    """
+    return Success(data=[
+        {
+            "name": report.name,
+            "title": report.title,
+            "params": list(report.params),
+            "key_columns": report.key_columns,
+            "metric_columns": report.metric_columns
+        }
+        for report in REPORTS.values()
+    ])
+
+@router.post("/run", summary="执行跨租户报表")
+async def run_tenant_report(
+    report_in: ReportRunRequest,
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    在各租户 schema 上并发执行报表查询并合并结果
+    单个租户失败或超时时返回其余租户的部分结果，complete 为 false
+    """
+    try:
+        report = await run_report(
+            report_in.name,
+            params=report_in.params,
+            tenant_ids=report_in.tenant_ids,
+            tenant_timeout=report_in.tenant_timeout,
+            total_timeout=report_in.total_timeout
+        )
+    except ReportError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    return Success(data=report.to_dict())
@@ -7,6 +7,7 @@ from app.deps import get_current_user
 from app.models.public import Role, User, UserRole
 from app.schemas.role import RoleCreate, RoleUpdate, RoleResponse
 from app.schemas.common import Success, SuccessExtra
+from app.utils.invalidation import publish
 
 router = APIRouter()
 
@@ -67,6 +68,7 @@ async def create_role(
     )
     db.add(role)
     await db.commit()
+    await publish("role")
     await db.refresh(role)
     return Success(data=role)
 
@@ -93,6 +95,7 @@ async def update_role(
         setattr(role, field, value)
     
     await db.commit()
+    await publish("role")
     await db.refresh(role)
     return Success(data=role)
 
@@ -115,4 +118,5 @@ async def delete_role(
     
     await db.delete(role)
     await db.commit()
+    await publish("role")
     return Success(data={"message": "Role deleted successfully"}) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import base, user, role, menu, api, tenant, log
+from app.api.v1 import base, user, role, menu, api, tenant, log, dormitory, registration, student, field_mapping, department, report, access_stats, slow_query, tenant_usage
 
 router = APIRouter()
 
@@ -12,4 +12,13 @@ router.include_router(role.router, prefix="/role", tags=["role"])
 router.include_router(menu.router, prefix="/menu", tags=["menu"])
 router.include_router(api.router, prefix="/api", tags=["api"])
 router.include_router(tenant.router, prefix="/tenant", tags=["tenant"])
-router.include_router(log.router, prefix="/log", tags=["log"]) 
\ No newline at end of file
+router.include_router(log.router, prefix="/log", tags=["log"])
+router.include_router(dormitory.router, prefix="/dormitory", tags=["dormitory"])
+router.include_router(registration.router, prefix="/registration", tags=["registration"])
+router.include_router(student.router, prefix="/student", tags=["student"])
+router.include_router(field_mapping.router, prefix="/field_mapping", tags=["field_mapping"])
+router.include_router(department.router, prefix="/department", tags=["department"])
+router.include_router(report.router, prefix="/report", tags=["report"])
+router.include_router(access_stats.router, prefix="/access_stats", tags=["access_stats"])
+router.include_router(slow_query.router, prefix="/slow_query", tags=["slow_query"])
+router.include_router(tenant_usage.router, prefix="/tenant_usage", tags=["tenant_usage"])
\ No newline at end of file
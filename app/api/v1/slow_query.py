@@ -0,0 +1,61 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.deps import get_current_active_superuser
+from app.models.public import User
+from app.schemas.common import Success
+from app.utils import slow_query
+
+router = APIRouter()
+
+SORT_KEYS = {
+    "total": lambda entry: entry.total_ms,
+    "max": lambda entry: entry.max_ms,
+    "count": lambda entry: entry.count,
+    "last_seen": lambda entry: entry.last_seen,
+}
+
+@router.get("/list", summary="获取慢语句列表")
+async def list_slow_queries(
+    schema: Optional[str] = Query(None, description="schema，如 public、tenant_1"),
+    order_by: str = Query("total", description="排序：total（总耗时）、max（最大耗时）、count（次数）、last_seen（最近出现）"),
+    top: int = Query(50, ge=1, le=500, description="返回前 N 条"),
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    本进程记录的慢语句，按 (指纹, schema) 汇总，不含执行计划
+    """
+    sort_key = SORT_KEYS.get(order_by)
+    if sort_key is None:
+        raise HTTPException(
+            status_code=400,
+            detail="排序字段只能为 total、max、count 或 last_seen"
+        )
+    entries = sorted(slow_query.store.list(schema), key=sort_key, reverse=True)[:top]
+    return Success(data=[entry.summary() for entry in entries])
+
+@router.get("/get", summary="获取慢语句详情")
+async def get_slow_query(
+    fingerprint: str = Query(..., description="语句指纹"),
+    schema: str = Query(..., description="schema"),
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    慢语句详情，包括脱敏后的参数和 EXPLAIN (FORMAT JSON) 执行计划
+    """
+    entry = slow_query.store.get(fingerprint, schema)
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="慢语句不存在或已被淘汰"
+        )
+    return Success(data=entry.detail())
+
+@router.delete("/clear", summary="清空慢语句")
+async def clear_slow_queries(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    清空本进程记录的慢语句
+    """
+    slow_query.store.clear()
+    return Success(data={"msg": "慢语句已清空"})
@@ -0,0 +1,180 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.responses import Response
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from app.deps import get_current_user, get_current_tenant_admin, get_current_tenant_db
+from app.models.public import User
+from app.schemas.common import Success
+from app.schemas.student import StudentSearchResult
+from app.utils.field_mapping import get_student_model
+from app.core.log import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+# 学生基础字段（不含扩展字段）
+BASE_FIELDS = [
+    "id_card", "student_id", "name", "gender", "birth_date", "admission_batch_id",
+    "department_id", "dormitory_id", "phone", "email", "address", "status"
+]
+
+# 由宿舍分配、选床和报到流程维护的字段：导入不写入宿舍，已存在的学生不更新这些字段
+# （修改宿舍需同步 dormitories.current_count，修改院系、状态需同步 registration_progress）
+MANAGED_FIELDS = {"dormitory_id", "department_id", "status"}
+
+# 各分支分别走对应索引：主键/学号唯一索引、varchar_pattern_ops 前缀索引、姓名 trigram GIN 索引
+# 姓名分支先按相似度排序再截取，常见姓氏匹配很多时最相近的结果不会被截掉
+SEARCH_SQL = text("""
+    SELECT id_card, student_id, name, gender, department_id, dormitory_id, status, min(rank) AS rank
+    FROM (
+        (SELECT *, 0 AS rank FROM students WHERE id_card = :q)
+        UNION ALL
+        (SELECT *, 0 AS rank FROM students WHERE student_id = :q)
+        UNION ALL
+        (SELECT *, 1 AS rank FROM students WHERE id_card LIKE :prefix LIMIT :limit)
+        UNION ALL
+        (SELECT *, 1 AS rank FROM students WHERE student_id LIKE :prefix LIMIT :limit)
+        UNION ALL
+        (SELECT *, 2 AS rank FROM students WHERE name ILIKE :name_pattern
+         ORDER BY public.similarity(name, :q) DESC, student_id LIMIT :limit)
+    ) AS m
+    GROUP BY id_card, student_id, name, gender, department_id, dormitory_id, status
+    ORDER BY rank, public.similarity(name, :q) DESC, student_id
+    LIMIT :limit
+""")
+
+def _escape_like(value: str) -> str:
+    """转义 LIKE 通配符"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@router.get("/search", summary="检索学生")
+async def search_students(
+    q: str = Query(..., min_length=1, max_length=50, description="姓名、身份证号或学号（支持部分匹配）"),
+    limit: int = Query(20, ge=1, le=100, description="返回条数"),
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    按姓名、身份证号或学号检索学生
+    身份证号或学号完全匹配的排在最前，其次为前缀匹配，最后为姓名匹配（按相似度排序）
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(
+            status_code=400,
+            detail="检索关键字不能为空"
+        )
+    escaped = _escape_like(q)
+    # 不足3个字符时 trigram 无法支持包含匹配，姓名改为前缀匹配
+    name_pattern = f"%{escaped}%" if len(q) >= 3 else f"{escaped}%"
+    result = await db.execute(SEARCH_SQL, {
+        "q": q,
+        "prefix": f"{escaped}%",
+        "name_pattern": name_pattern,
+        "limit": limit
+    })
+    students = [StudentSearchResult.model_validate(row) for row in result.mappings().all()]
+    return Success(data=students)
+
+@router.get("/fields", summary="获取学生字段定义")
+async def get_student_fields(
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取当前租户的学生字段定义，扩展字段以显示名返回
+    """
+    compiled = await get_student_model(db, current_user.tenant_id)
+    return Success(data={
+        "base_fields": BASE_FIELDS,
+        "ext_fields": [
+            {
+                "field_name": field_name,
+                "display_name": display_name,
+                "is_required": field_name in compiled.required_fields
+            }
+            for field_name, display_name in compiled.display_names.items()
+        ]
+    })
+
+@router.post("/import", summary="批量导入学生")
+async def import_students(
+    rows: List[dict] = Body(..., description="学生列表，扩展字段使用显示名或 ext_fieldN"),
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    批量导入学生，已存在的身份证号会被更新
+    使用租户字段映射编译的模型整体校验后一次批量写入
+    """
+    compiled = await get_student_model(db, current_user.tenant_id)
+    try:
+        students = compiled.list_adapter.validate_python(rows)
+    except ValidationError as e:
+        errors = [
+            {"row": error["loc"][0], "field": ".".join(str(loc) for loc in error["loc"][1:]), "msg": error["msg"]}
+            for error in e.errors()[:100]
+        ]
+        raise HTTPException(
+            status_code=422,
+            detail={"message": f"学生数据校验失败，共 {e.error_count()} 处错误", "errors": errors}
+        )
+    if not students:
+        return Success(data={"imported": 0})
+
+    # 只写入基础字段和已映射的扩展字段；已存在的学生只更新该行提供了的字段
+    columns = [column for column in BASE_FIELDS + list(compiled.display_names) if column != "dormitory_id"]
+    groups = {}
+    for student in students:
+        updated = tuple(
+            column for column in columns
+            if column in student.model_fields_set and column != "id_card" and column not in MANAGED_FIELDS
+        )
+        groups.setdefault(updated, []).append({column: getattr(student, column) for column in columns})
+    try:
+        # 提供字段相同的行一次批量写入
+        for updated, params in groups.items():
+            updates = "".join(f"{column} = EXCLUDED.{column}, " for column in updated)
+            await db.execute(
+                text(
+                    f"INSERT INTO students ({', '.join(columns)}) "
+                    f"VALUES ({', '.join(':' + column for column in columns)}) "
+                    f"ON CONFLICT (id_card) DO UPDATE SET {updates}updated_at = CURRENT_TIMESTAMP"
+                ),
+                params
+            )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"导入学生失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"导入学生失败: {str(e)}"
+        )
+
+    logger.info(f"导入学生成功: tenant={current_user.tenant_id}, 共 {len(students)} 条")
+    return Success(data={"imported": len(students)})
+
+@router.get("/export", summary="导出学生")
+async def export_students(
+    db: AsyncSession = Depends(get_current_tenant_db),
+    current_user: User = Depends(get_current_tenant_admin)
+) -> Any:
+    """
+    导出当前租户全部学生，扩展字段以显示名输出
+    """
+    compiled = await get_student_model(db, current_user.tenant_id)
+    columns = BASE_FIELDS + list(compiled.display_names)
+    result = await db.execute(text(f"SELECT {', '.join(columns)} FROM students ORDER BY student_id, id_card"))
+    # 输出模型不做必填和长度校验，映射改为必填之前导入的空值原样导出
+    students = compiled.export_adapter.validate_python(result.mappings().all())
+
+    # 直接由编译好的 TypeAdapter 序列化，避免逐条转换字典后再次编码
+    payload = compiled.export_adapter.dump_json(students, by_alias=True)
+    logger.debug(f"导出学生: tenant={current_user.tenant_id}, 共 {len(students)} 条")
+    return Response(
+        content=b'{"code":200,"msg":"OK","data":' + payload + b'}',
+        media_type="application/json"
+    )
@@ -3,10 +3,14 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, text
 from app.db.session import get_db
+from app.utils.tenant_directory import tenant_directory
+from app.utils.invalidation import publish
 from app.deps import get_current_user, get_current_active_superuser
 from app.models.public import Tenant, User, TenantStatus
 from app.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse
 from app.schemas.common import Success, SuccessExtra
+from app.db.migrations.add_student_search_indexes import STUDENT_SEARCH_INDEXES
+from app.utils.hierarchy import DEPARTMENT_HIERARCHY
 from app.core.log import get_logger
 from datetime import date
 
@@ -121,6 +125,12 @@ async def create_tenant(
             """))
             logger.debug("departments 表创建成功")
             
+            # 2.1 创建 department_closure 闭包表及维护触发器
+            logger.debug("开始创建 department_closure 表")
+            for ddl in DEPARTMENT_HIERARCHY.ddl(schema_name):
+                await db.execute(text(ddl))
+            logger.debug("department_closure 表创建成功")
+            
             # 3. 创建 dormitories 表
             logger.debug("开始创建 dormitories 表")
             await db.execute(text("""
@@ -169,6 +179,13 @@ async def create_tenant(
             """))
             logger.debug("students 表创建成功")
             
+            # 4.1 创建 students 检索索引（pg_trgm 安装在 public 下，租户会话不依赖 search_path）
+            logger.debug("开始创建 students 检索索引")
+            await db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public"))
+            for index_sql in STUDENT_SEARCH_INDEXES:
+                await db.execute(text(index_sql))
+            logger.debug("students 检索索引创建成功")
+            
             # 5. 创建 staff 表
             logger.debug("开始创建 staff 表")
             await db.execute(text("""
@@ -233,11 +250,26 @@ async def create_tenant(
                     operator_id INTEGER,
                     remarks TEXT,
                     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                    CONSTRAINT uq_registration_info_student_process UNIQUE (student_id, process_id)
                 )
             """))
             logger.debug("registration_info 表创建成功")
             
+            # 7.1 创建 registration_progress 表
+            logger.debug("开始创建 registration_progress 表")
+            await db.execute(text("""
+                CREATE TABLE IF NOT EXISTS registration_progress (
+                    department_id INTEGER NOT NULL,
+                    process_id INTEGER NOT NULL,
+                    student_count INTEGER NOT NULL DEFAULT 0,
+                    completed_count INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (department_id, process_id)
+                )
+            """))
+            logger.debug("registration_progress 表创建成功")
+            
             # 8. 创建 field_mappings 表
             logger.debug("开始创建 field_mappings 表")
             await db.execute(text("""
@@ -262,6 +294,8 @@ async def create_tenant(
             # 提交所有更改
             await db.commit()
             logger.info(f"租户 {tenant.name} 创建成功")
+            await publish("tenant", tenant.id)
+            tenant_directory.put(tenant)
             
             # 使用 Pydantic 模型序列化租户数据
             tenant_response = TenantResponse.model_validate(tenant)
@@ -302,6 +336,9 @@ async def update_tenant(
     
     await db.commit()
     await db.refresh(tenant)
+    # 状态、到期日等变更立即对本进程生效，其他进程通过失效总线生效
+    await publish("tenant", tenant_id)
+    tenant_directory.put(tenant)
     return Success(data=tenant)
 
 @router.delete("/delete")
@@ -323,4 +360,7 @@ async def delete_tenant(
     
     tenant.is_deleted = True
     await db.commit()
+    await db.refresh(tenant)
+    await publish("tenant", tenant_id)
+    tenant_directory.put(tenant)
     return Success(data={"message": "Tenant deleted successfully"}) 
\ No newline at end of file
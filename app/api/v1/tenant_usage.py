@@ -0,0 +1,69 @@
+from typing import Any, Optional
+from datetime import datetime, timedelta
+import pytz
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.config import settings
+from app.deps import get_current_active_superuser
+from app.models.public import User
+from app.schemas.common import Success
+from app.utils import tenant_usage
+from app.utils.tenant_directory import tenant_directory
+
+router = APIRouter()
+
+@router.get("/top", summary="按资源用量排行租户")
+async def get_top_tenants(
+    start_time: Optional[datetime] = Query(None, description="开始时间，默认结束时间前1天"),
+    end_time: Optional[datetime] = Query(None, description="结束时间，默认当前时间"),
+    metric: str = Query("db_ms", description="排序指标：db_ms、wall_ms、request_count、error_count、query_count、rows_returned、bytes_sent"),
+    top: int = Query(10, ge=1, le=100, description="返回前 N 个租户"),
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    合并时间范围内的小时桶，按指标返回用量最高的租户及其占全部租户的比例
+    """
+    if metric not in tenant_usage.METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"排序指标只能为 {'、'.join(tenant_usage.METRICS)}"
+        )
+    tz = pytz.timezone(settings.TIMEZONE)
+    end_time = end_time or datetime.now(tz)
+    start_time = start_time or end_time - timedelta(days=1)
+    # 未带时区的时间按系统时区处理
+    if end_time.tzinfo is None:
+        end_time = tz.localize(end_time)
+    if start_time.tzinfo is None:
+        start_time = tz.localize(start_time)
+    if start_time >= end_time:
+        raise HTTPException(
+            status_code=400,
+            detail="开始时间必须早于结束时间"
+        )
+    
+    rows = await tenant_usage.top_tenants(start_time, end_time, metric, top)
+    total = await tenant_usage.metric_total(start_time, end_time, metric)
+    tenants = []
+    for row in rows:
+        tenant = await tenant_directory.get(row["tenant_id"]) if row["tenant_id"] else None
+        tenants.append({
+            **row,
+            "tenant_name": tenant.name if tenant else None,
+            "share": round(row[metric] / total, 4) if total else 0
+        })
+    return Success(data={
+        "start_time": start_time,
+        "end_time": end_time,
+        "metric": metric,
+        "total": total,
+        "tenants": tenants
+    })
+
+@router.get("/alerts", summary="获取最近的资源用量告警")
+async def get_usage_alerts(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """
+    本进程最近的租户资源用量告警，最新的在前
+    """
+    return Success(data=list(tenant_usage.recent_alerts))
@@ -7,8 +7,9 @@ from app.deps import get_current_user
 from app.models.public import User, Role, UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserInfoResponse, ResetPasswordRequest
 from app.schemas.common import Success, SuccessExtra, BaseSchema
-from app.core.security import get_password_hash, decrypt_password
+from app.core.security import get_password_hash_async, decrypt_password
 from app.utils.audit import log_audit
+from app.utils.invalidation import publish
 from app.core.log import get_logger
 
 router = APIRouter()
@@ -67,7 +68,7 @@ async def create_user(
         username=user_in.username,
         email=user_in.email,
         phone=user_in.phone,
-        password=get_password_hash(decrypted_password),
+        password=await get_password_hash_async(decrypted_password),
         is_active=user_in.is_active,
         is_superuser=user_in.is_superuser,
         tenant_id=user_in.tenant_id,
@@ -295,7 +296,7 @@ async def update_user(
         try:
             # 解密密码
             decrypted_password = decrypt_password(update_data["password"])
-            update_data["password"] = get_password_hash(decrypted_password)
+            update_data["password"] = await get_password_hash_async(decrypted_password)
         except ValueError as e:
             raise HTTPException(
                 status_code=400,
@@ -318,6 +319,7 @@ async def update_user(
             db.add(user_role)
     
     await db.commit()
+    await publish("user", user.id)
     await db.refresh(user)
     
     # 获取用户角色信息
@@ -382,6 +384,7 @@ async def delete_user(
     
     await db.delete(user)
     await db.commit()
+    await publish("user", id)
     
     # 记录审计日志
     await log_audit(
@@ -436,7 +439,7 @@ async def reset_password(
             # 解密新密码
             decrypted_password = decrypt_password(password_data.new_password)
             # 更新密码
-            user.password = get_password_hash(decrypted_password)
+            user.password = await get_password_hash_async(decrypted_password)
             success_message = "密码重置成功"
         except ValueError as e:
             raise HTTPException(
@@ -445,7 +448,7 @@ async def reset_password(
             )
     else:
         # 使用默认密码（Admin@123456）
-        user.password = get_password_hash("Admin@123456")
+        user.password = await get_password_hash_async("Admin@123456")
         success_message = "密码已重置为默认密码（Admin@123456）"
     
     await db.commit()
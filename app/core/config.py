@@ -50,6 +50,14 @@ class Settings(BaseSettings):
     APP_PORT: int = int(os.getenv("APP_PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # 日志格式：text 或 json（结构化，每行一条）
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").lower()
+    # 日志队列容量，队列满时丢弃新日志而不阻塞请求处理
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # 生产模式工作进程数，0 表示取可用 CPU 数
+    WORKERS: int = int(os.getenv("WORKERS", "0"))
+    # 优雅退出时等待进行中请求的最长时间（秒）
+    GRACEFUL_SHUTDOWN_SECONDS: int = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
     
     # CORS配置
     CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -57,6 +65,82 @@ class Settings(BaseSettings):
     # 时区设置
     TIMEZONE: str = "Asia/Shanghai"
     
+    # 主引擎连接池（public 与全部租户 schema 共用，每个工作进程一个）
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    
+    # 租户目录缓存版本检查间隔（秒），其他进程修改租户后最迟在该间隔后生效；0 表示不定期检查
+    TENANT_DIRECTORY_REFRESH_SECONDS: int = int(os.getenv("TENANT_DIRECTORY_REFRESH_SECONDS", "30"))
+    
+    # 跨进程缓存失效总线：NOTIFY 通道（为空表示不监听）、LISTEN 连接探测间隔（秒）
+    CACHE_INVALIDATION_CHANNEL: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
+    CACHE_INVALIDATION_HEALTHCHECK_SECONDS: int = int(os.getenv("CACHE_INVALIDATION_HEALTHCHECK_SECONDS", "30"))
+    
+    # 当前用户菜单与 API 权限缓存：过期时间（秒）、最多缓存的用户数
+    USER_PERMISSION_CACHE_TTL_SECONDS: int = int(os.getenv("USER_PERMISSION_CACHE_TTL_SECONDS", "300"))
+    USER_PERMISSION_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_PERMISSION_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Prometheus 指标接口 /metrics：是否开启（默认关闭，指标包含各租户用量）、访问令牌（非空时要求 Authorization: Bearer <令牌>）
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    # 生产模式下各工作进程的指标端口起始值，第 i 个工作进程监听 METRICS_PORT + i；0 表示不单独监听
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+    
+    # SQL 统计调试模式：同一请求内相同语句执行次数达到阈值时记录疑似 N+1 查询
+    SQL_PROFILER_DEBUG: bool = os.getenv("SQL_PROFILER_DEBUG", "False").lower() == "true"
+    SQL_PROFILER_REPEAT_THRESHOLD: int = int(os.getenv("SQL_PROFILER_REPEAT_THRESHOLD", "5"))
+    
+    # 事件循环延迟监控：检测间隔（毫秒）、阻塞告警阈值（毫秒，0 表示关闭）、调试模式（统计已知同步热点的耗时）
+    LOOP_MONITOR_INTERVAL_MS: int = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+    LOOP_LAG_THRESHOLD_MS: int = int(os.getenv("LOOP_LAG_THRESHOLD_MS", "200"))
+    LOOP_MONITOR_DEBUG: bool = os.getenv("LOOP_MONITOR_DEBUG", "False").lower() == "true"
+    
+    # 密码计算（bcrypt）线程池：线程数、排队上限（执行中和排队中的总数超过线程数 + 排队上限时返回 503）、503 响应的 Retry-After（秒）
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 4)))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER_SECONDS", "1"))
+    
+    # 慢语句日志：阈值（毫秒，0 表示关闭）、保留的语句指纹数、同一指纹重新采集执行计划的间隔（秒）
+    SLOW_QUERY_THRESHOLD_MS: int = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+    SLOW_QUERY_STORE_SIZE: int = int(os.getenv("SLOW_QUERY_STORE_SIZE", "200"))
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "600"))
+    
+    # 报到签到批量提交配置
+    CHECKIN_BATCH_MAX_SIZE: int = int(os.getenv("CHECKIN_BATCH_MAX_SIZE", "500"))
+    CHECKIN_BATCH_MAX_DELAY_MS: int = int(os.getenv("CHECKIN_BATCH_MAX_DELAY_MS", "5"))
+    # 报到进度全量重算间隔（秒），0 表示不定期重算
+    REGISTRATION_PROGRESS_RECONCILE_SECONDS: int = int(os.getenv("REGISTRATION_PROGRESS_RECONCILE_SECONDS", "600"))
+    
+    # 日志分区：提前创建的月数、保留月数（0 表示不清理）、维护间隔（秒，0 表示不定期维护）
+    LOG_PARTITION_MONTHS_AHEAD: int = int(os.getenv("LOG_PARTITION_MONTHS_AHEAD", "3"))
+    ACCESS_LOG_RETENTION_MONTHS: int = int(os.getenv("ACCESS_LOG_RETENTION_MONTHS", "6"))
+    AUDIT_LOG_RETENTION_MONTHS: int = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "24"))
+    LOG_PARTITION_MAINTENANCE_SECONDS: int = int(os.getenv("LOG_PARTITION_MAINTENANCE_SECONDS", "86400"))
+    # 日志冷归档：在库保留月数（之后归档为 Parquet 文件，0 表示不归档，应小于保留月数）、归档目录
+    ACCESS_LOG_ARCHIVE_AFTER_MONTHS: int = int(os.getenv("ACCESS_LOG_ARCHIVE_AFTER_MONTHS", "2"))
+    AUDIT_LOG_ARCHIVE_AFTER_MONTHS: int = int(os.getenv("AUDIT_LOG_ARCHIVE_AFTER_MONTHS", "6"))
+    LOG_ARCHIVE_DIR: str = os.getenv("LOG_ARCHIVE_DIR", "archive/logs")
+    
+    # 访问统计预聚合：写库间隔（秒，0 表示不统计）、分钟桶和小时桶保留天数（0 表示不清理）
+    ACCESS_ROLLUP_FLUSH_SECONDS: int = int(os.getenv("ACCESS_ROLLUP_FLUSH_SECONDS", "10"))
+    ACCESS_ROLLUP_MINUTE_RETENTION_DAYS: int = int(os.getenv("ACCESS_ROLLUP_MINUTE_RETENTION_DAYS", "7"))
+    ACCESS_ROLLUP_HOUR_RETENTION_DAYS: int = int(os.getenv("ACCESS_ROLLUP_HOUR_RETENTION_DAYS", "400"))
+    
+    # 租户资源用量：写库间隔（秒，0 表示不统计）、小时桶保留天数（0 表示不清理）
+    TENANT_USAGE_FLUSH_SECONDS: int = int(os.getenv("TENANT_USAGE_FLUSH_SECONDS", "60"))
+    TENANT_USAGE_RETENTION_DAYS: int = int(os.getenv("TENANT_USAGE_RETENTION_DAYS", "400"))
+    # 租户资源用量告警：占本进程 SQL 耗时的比例（0 表示不告警）、每分钟 SQL 耗时下限（秒）
+    TENANT_USAGE_ALERT_SHARE: float = float(os.getenv("TENANT_USAGE_ALERT_SHARE", "0.5"))
+    TENANT_USAGE_ALERT_DB_SECONDS_PER_MINUTE: float = float(os.getenv("TENANT_USAGE_ALERT_DB_SECONDS_PER_MINUTE", "30"))
+    
+    # 审计日志导出每批读取的行数（服务端游标每次取回的行数）
+    AUDIT_EXPORT_BATCH_SIZE: int = int(os.getenv("AUDIT_EXPORT_BATCH_SIZE", "2000"))
+    
+    # 跨租户报表配置（并发数不应超过连接池大小）
+    REPORT_CONCURRENCY: int = int(os.getenv("REPORT_CONCURRENCY", "5"))
+    REPORT_TENANT_TIMEOUT_SECONDS: float = float(os.getenv("REPORT_TENANT_TIMEOUT_SECONDS", "10"))
+    REPORT_TOTAL_TIMEOUT_SECONDS: float = float(os.getenv("REPORT_TOTAL_TIMEOUT_SECONDS", "30"))
+    
     @validator("CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: str | List[str]) -> List[str] | str:
         if isinstance(v, str) and not v.startswith("["):
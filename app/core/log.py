@@ -1,8 +1,13 @@
 import os
+import json
+import queue
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import threading
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 from .config import settings, LOG_FILE, DEBUG_FORMAT, DEFAULT_FORMAT, DATE_FORMAT
+from .metrics import register_collector
 
 # 创建日志目录
 LOG_DIR = Path("logs")
@@ -22,28 +27,71 @@ class CustomFormatter(logging.Formatter):
             self._style._fmt = DEFAULT_FORMAT
         return super().format(record)
 
-def get_logger(name: str) -> logging.Logger:
+class JsonFormatter(logging.Formatter):
+    """结构化日志格式化器，每条日志输出一行 JSON"""
+    
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class _NonFormattingQueueHandler(QueueHandler):
     """
-    获取logger实例
-    :param name: logger名称，通常使用模块名
-    :return: logger实例
+    把日志记录放入队列，不在调用线程中格式化（格式化和 I/O 都在写日志线程中完成）
+    队列满时丢弃并计数，不阻塞事件循环
     """
-    logger = logging.getLogger(name)
     
-    # 如果logger已经有处理器，说明已经配置过，直接返回
-    if logger.handlers:
-        return logger
-        
-    # 设置日志级别
-    logger.setLevel(settings.LOG_LEVEL)
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record):
+        return record
     
-    # 创建自定义格式化器
-    formatter = CustomFormatter(datefmt=DATE_FORMAT)
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _DropReportingListener(QueueListener):
+    """写日志线程：在写出日志的间隙报告被丢弃的日志条数"""
+    
+    def __init__(self, log_queue, handler: _NonFormattingQueueHandler, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self._queue_handler = handler
+        self._reported = 0
+    
+    def handle(self, record):
+        dropped = self._queue_handler.dropped
+        if dropped != self._reported:
+            super().handle(logging.LogRecord(
+                "app.core.log", logging.WARNING, __file__, 0,
+                "日志队列已满，已丢弃 %d 条日志", (dropped - self._reported,), None
+            ))
+            self._reported = dropped
+        super().handle(record)
+
+def _create_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return CustomFormatter(datefmt=DATE_FORMAT)
+
+def _create_handlers() -> list:
+    formatter = _create_formatter()
     
     # 创建控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
     
     # 创建文件处理器（按周滚动）
     file_handler = TimedRotatingFileHandler(
@@ -54,9 +102,88 @@ def get_logger(name: str) -> logging.Logger:
         encoding='utf-8'
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    return [console_handler, file_handler]
+
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+
+def _start_pipeline():
+    """创建日志队列和写日志线程，所有模块 logger 共用"""
+    global _queue_handler, _listener
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = _NonFormattingQueueHandler(log_queue)
+    listener = _DropReportingListener(log_queue, handler, *_create_handlers())
+    listener.start()
+    if _queue_handler is None:
+        _queue_handler = handler
+    else:
+        # fork 后的子进程：已创建的 logger 继续使用原处理器对象，只替换其队列
+        _queue_handler.queue = log_queue
+        _queue_handler.dropped = 0
+        listener._queue_handler = _queue_handler
+    _listener = listener
+
+def _get_queue_handler() -> QueueHandler:
+    with _lock:
+        if _queue_handler is None:
+            _start_pipeline()
+            atexit.register(shutdown_logging)
+    return _queue_handler
+
+def _restart_after_fork():
+    # 写日志线程不会被 fork 继承，子进程需要重新创建队列和线程
+    global _lock
+    _lock = threading.Lock()
+    if _queue_handler is not None:
+        _start_pipeline()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+def shutdown_logging():
+    """写出队列中剩余的日志并停止写日志线程"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def log_queue_stats() -> dict:
+    """日志队列长度和累计丢弃条数"""
+    if _queue_handler is None:
+        return {"depth": 0, "dropped": 0}
+    return {"depth": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
+
+def _log_queue_metrics():
+    stats = log_queue_stats()
+    yield "log_queue_depth", "gauge", "日志队列中等待写出的记录数", (), [((), stats["depth"])]
+    yield "log_queue_dropped_total", "counter", "日志队列满时丢弃的记录数", (), [((), stats["dropped"])]
+
+register_collector(_log_queue_metrics)
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    获取logger实例
+    日志记录放入队列后立即返回，由后台线程格式化并写入控制台和文件。
+    请使用 %-style 参数（logger.debug("收到请求: %s %s", method, path)），
+    级别未开启时不会格式化消息。
+    :param name: logger名称，通常使用模块名
+    :return: logger实例
+    """
+    logger = logging.getLogger(name)
+    
+    # 如果logger已经有处理器，说明已经配置过，直接返回
+    if logger.handlers:
+        return logger
+        
+    # 设置日志级别
+    logger.setLevel(settings.LOG_LEVEL)
+    
+    # 所有 logger 共用同一个队列处理器，不再传递给根 logger（避免同步处理器重复输出）
+    logger.addHandler(_get_queue_handler())
+    logger.propagate = False
     
     return logger
 
 # 创建默认logger
-logger = get_logger("app") 
\ No newline at end of file
+logger = get_logger("app")
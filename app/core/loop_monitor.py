@@ -0,0 +1,142 @@
+"""
+事件循环延迟监控
+
+同步的 CPU 密集调用（bcrypt、AES 等）在事件循环线程中执行时，所有请求都会停顿。
+- 事件循环中的任务每隔 LOOP_MONITOR_INTERVAL_MS 毫秒醒来一次，实际醒来时间与预期的差即为循环延迟，
+  记录到指标 event_loop_lag_seconds；延迟达到 LOOP_LAG_THRESHOLD_MS 时记录警告
+- 看门狗线程检查该任务的心跳，超过 LOOP_LAG_THRESHOLD_MS 未更新时读取事件循环线程当前的调用栈
+  （此时阻塞仍在进行，栈顶即为阻塞的代码），记录警告日志并计入 event_loop_blocked_total
+- 调试模式（LOOP_MONITOR_DEBUG）下，用 hotspot 装饰的已知同步热点在事件循环线程中执行时记录耗时
+  到 blocking_call_seconds，超过 HOTSPOT_LOG_THRESHOLD_MS 时记录日志；非调试模式下装饰器不包装函数，没有开销
+"""
+
+import asyncio
+import functools
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import Counter, Histogram
+
+logger = get_logger(__name__)
+
+# 调试模式下同步热点单次调用超过该耗时时记录日志
+HOTSPOT_LOG_THRESHOLD_MS = 20
+# 阻塞时记录的调用栈最多帧数（从栈顶算起）
+MAX_STACK_FRAMES = 30
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds", "事件循环延迟（秒），定时任务实际醒来时间与预期的差", buckets=LAG_BUCKETS
+)
+event_loop_blocked_total = Counter(
+    "event_loop_blocked_total", "看门狗发现事件循环阻塞超过阈值的次数"
+)
+blocking_call_seconds = Histogram(
+    "blocking_call_seconds", "调试模式下同步热点在事件循环线程中的耗时（秒）", ("function",), buckets=LAG_BUCKETS
+)
+
+# 事件循环线程ID，监控启动后设置
+_loop_thread_id: Optional[int] = None
+
+
+def hotspot(name: str) -> Callable:
+    """标记已知的同步热点；只在调试模式下包装，定义时决定"""
+    def decorator(func: Callable) -> Callable:
+        if not settings.LOOP_MONITOR_DEBUG:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if threading.get_ident() != _loop_thread_id:
+                # 在线程池中执行，不阻塞事件循环
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                blocking_call_seconds.observe(elapsed, name)
+                if elapsed * 1000 >= HOTSPOT_LOG_THRESHOLD_MS:
+                    logger.warning("同步调用阻塞事件循环: %s %.0fms", name, elapsed * 1000)
+        return wrapper
+    return decorator
+
+
+class _Watchdog(threading.Thread):
+    """检查事件循环心跳，阻塞时记录事件循环线程的调用栈"""
+
+    def __init__(self, interval: float, threshold: float):
+        super().__init__(name="loop-watchdog", daemon=True)
+        self.interval = interval
+        self.threshold = threshold
+        self.heartbeat = time.monotonic()
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        reported = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self.heartbeat
+            # 心跳之后正常会休眠 interval，超出部分为阻塞时间
+            blocked = time.monotonic() - heartbeat - self.interval
+            # 同一次阻塞只记录一次
+            if blocked < self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            event_loop_blocked_total.inc()
+            frame = sys._current_frames().get(_loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)[-MAX_STACK_FRAMES:]) if frame else "（无法获取调用栈）\n"
+            logger.warning("事件循环已阻塞 %.0fms，当前调用栈:\n%s", blocked * 1000, stack.rstrip())
+
+
+async def _monitor_loop(interval: float, threshold: float, watchdog: _Watchdog):
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        watchdog.heartbeat = now
+        lag = max(now - expected, 0)
+        event_loop_lag_seconds.observe(lag)
+        if lag >= threshold:
+            logger.warning("事件循环延迟 %.0fms", lag * 1000)
+
+
+_monitor_task: Optional[asyncio.Task] = None
+_watchdog: Optional[_Watchdog] = None
+
+
+def start_loop_monitor():
+    """在事件循环线程中调用，启动延迟监控任务和看门狗线程"""
+    global _loop_thread_id, _monitor_task, _watchdog
+    _loop_thread_id = threading.get_ident()
+    interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+    threshold = settings.LOOP_LAG_THRESHOLD_MS / 1000
+    if threshold <= 0 or (_monitor_task and not _monitor_task.done()):
+        return
+    _watchdog = _Watchdog(interval, threshold)
+    _watchdog.start()
+    _monitor_task = asyncio.create_task(_monitor_loop(interval, threshold, _watchdog))
+
+
+async def stop_loop_monitor():
+    """停止延迟监控"""
+    global _monitor_task, _watchdog
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+    if _monitor_task is None:
+        return
+    _monitor_task.cancel()
+    try:
+        await _monitor_task
+    except asyncio.CancelledError:
+        pass
+    _monitor_task = None
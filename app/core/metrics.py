@@ -0,0 +1,164 @@
+"""
+运行指标（Prometheus 文本格式）
+
+请求路径上的计数只在事件循环线程中更新，直接累加字典中的数值，不加锁、不分配对象
+（首次出现的标签组合除外）。连接池、队列长度等状态类指标在 /metrics 被抓取时由收集函数读取，
+请求路径上没有额外开销。
+
+标签只使用取值有限的字段：路由模板（而非实际路径）、方法、状态码、租户ID、引擎名。
+"""
+
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# 请求耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增计数器"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """可增可减的当前值"""
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """累计分布直方图，每个标签组合保存各桶计数、总和与总数"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数..., +Inf 桶计数, 总和]，各桶计数不累计，输出时再累加
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bucket_labels = self.labelnames + ("le",)
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, series in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, labels + (bound,))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+# 收集函数在抓取时调用，返回 (指标名, 类型, 说明, 标签名, [(标签值, 数值), ...])
+Sample = Tuple[LabelValues, float]
+CollectedMetric = Tuple[str, str, str, Sequence[str], Iterable[Sample]]
+Collector = Callable[[], Iterable[CollectedMetric]]
+
+_registry: List[_Metric] = []
+_collectors: List[Collector] = []
+
+
+def register_collector(collector: Collector):
+    """注册抓取时读取的状态类指标"""
+    _collectors.append(collector)
+
+
+def render_metrics() -> str:
+    """输出全部指标"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, metric_type, documentation, labelnames, samples in collector():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# HTTP 请求
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "正在处理的请求数"
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "请求耗时（秒），按路由模板、方法、状态码",
+    ("route", "method", "status")
+)
+tenant_http_requests_total = Counter(
+    "tenant_http_requests_total", "各租户请求数（未登录或无租户的请求为 0）",
+    ("tenant_id",)
+)
+
+# 数据库连接
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds", "请求会话获取数据库连接的耗时（秒，含连接池等待与 pre-ping）",
+    ("pool",), buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
@@ -1,8 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Callable, Union, Optional
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.loop_monitor import hotspot
+from app.core.metrics import Counter, register_collector
 import base64
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
@@ -11,14 +16,64 @@ import json
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+@hotspot("bcrypt.verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
     return pwd_context.verify(plain_password, hashed_password)
 
+@hotspot("bcrypt.hash")
 def get_password_hash(password: str) -> str:
     """获取密码哈希"""
     return pwd_context.hash(password)
 
+# bcrypt 计算期间释放 GIL，多个线程可以同时使用多个 CPU 核
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+# 已提交到线程池、尚未完成的密码计算数（执行中 + 排队中），只在事件循环线程中修改
+_password_pending = 0
+
+password_hash_rejected_total = Counter(
+    "password_hash_rejected_total", "密码计算线程池已满时拒绝的请求数"
+)
+
+def _password_metrics():
+    yield "password_hash_pending", "gauge", "执行中和排队中的密码计算数", (), [((), _password_pending)]
+
+register_collector(_password_metrics)
+
+def _password_done(_):
+    global _password_pending
+    _password_pending -= 1
+
+async def _run_password_task(func: Callable, *args):
+    """
+    在密码计算线程池中执行，不阻塞事件循环
+    执行中和排队中的计算数达到上限时直接返回 503，由客户端稍后重试
+    """
+    global _password_pending
+    if _password_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+        password_hash_rejected_total.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)}
+        )
+    loop = asyncio.get_running_loop()
+    future = _password_executor.submit(func, *args)
+    _password_pending += 1
+    # 计算完成（或排队时被取消）后才释放名额；调用方被取消时线程中的计算仍会执行完
+    future.add_done_callback(lambda done: loop.call_soon_threadsafe(_password_done, done))
+    return await asyncio.wrap_future(future)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在线程池中验证密码"""
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """在线程池中计算密码哈希"""
+    return await _run_password_task(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """创建访问令牌"""
     if expires_delta:
@@ -38,6 +93,7 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+@hotspot("aes.encrypt")
 def encrypt_password(password: str) -> str:
     """使用AES加密密码"""
     # 生成随机IV
@@ -69,6 +125,7 @@ def encrypt_password(password: str) -> str:
         "ciphertext": ciphertext_b64
     })
 
+@hotspot("aes.decrypt")
 def decrypt_password(encrypted_data: str) -> str:
     """解密密码"""
     try:
@@ -0,0 +1,36 @@
+"""
+为已有租户创建 department_closure 院系闭包表及维护触发器，并按 parent_id 全量构建
+"""
+
+from sqlalchemy import text
+from app.db.session import AsyncSessionLocal, get_tenant_db
+from app.utils.hierarchy import DEPARTMENT_HIERARCHY
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def add_department_closure():
+    """为所有租户 schema 创建 department_closure 表并构建"""
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(text(
+                "SELECT id FROM tenants WHERE schema_name <> '' AND is_deleted = FALSE"
+            ))
+            tenant_ids = result.scalars().all()
+
+        for tenant_id in tenant_ids:
+            schema_name = f"tenant_{tenant_id}"
+            async for session in get_tenant_db(tenant_id):
+                for ddl in DEPARTMENT_HIERARCHY.ddl(schema_name):
+                    await session.execute(text(ddl))
+                for sql in DEPARTMENT_HIERARCHY.rebuild_sql(schema_name):
+                    await session.execute(text(sql))
+                await session.commit()
+            logger.info(f"{schema_name}.department_closure 创建并构建完成")
+    except Exception as e:
+        logger.error(f"创建 department_closure 失败: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(add_department_closure())
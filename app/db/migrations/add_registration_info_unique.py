@@ -0,0 +1,54 @@
+"""
+为已有租户的 registration_info 表添加 (student_id, process_id) 唯一约束
+"""
+
+from sqlalchemy import text
+from app.db.session import get_engine
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def add_registration_info_unique():
+    """为所有租户 schema 的 registration_info 添加唯一约束，重复记录只保留最新一条"""
+    try:
+        async with get_engine().begin() as conn:
+            result = await conn.execute(text(
+                "SELECT schema_name FROM tenants WHERE schema_name <> '' AND is_deleted = FALSE"
+            ))
+            schema_names = result.scalars().all()
+
+            for schema_name in schema_names:
+                exists = await conn.scalar(
+                    text("""
+                        SELECT 1 FROM pg_constraint c
+                        JOIN pg_namespace n ON n.oid = c.connamespace
+                        WHERE n.nspname = :schema_name
+                          AND c.conname = 'uq_registration_info_student_process'
+                    """),
+                    {"schema_name": schema_name}
+                )
+                if exists:
+                    logger.debug(f"{schema_name}.registration_info 已存在唯一约束，跳过")
+                    continue
+
+                # 删除重复记录，保留 id 最大的一条
+                await conn.execute(text(f"""
+                    DELETE FROM {schema_name}.registration_info a
+                    USING {schema_name}.registration_info b
+                    WHERE a.student_id = b.student_id
+                      AND a.process_id = b.process_id
+                      AND a.id < b.id
+                """))
+
+                await conn.execute(text(f"""
+                    ALTER TABLE {schema_name}.registration_info
+                    ADD CONSTRAINT uq_registration_info_student_process UNIQUE (student_id, process_id)
+                """))
+                logger.info(f"{schema_name}.registration_info 唯一约束添加成功")
+    except Exception as e:
+        logger.error(f"添加 registration_info 唯一约束失败: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(add_registration_info_unique())
@@ -0,0 +1,42 @@
+"""
+为已有租户创建 registration_progress 报到进度汇总表并完成首次统计
+"""
+
+from sqlalchemy import text
+from app.db.session import AsyncSessionLocal, get_tenant_db
+from app.utils.registration_progress import reconcile_progress
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def add_registration_progress():
+    """为所有租户 schema 创建 registration_progress 表并全量统计"""
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(text(
+                "SELECT id FROM tenants WHERE schema_name <> '' AND is_deleted = FALSE"
+            ))
+            tenant_ids = result.scalars().all()
+
+        for tenant_id in tenant_ids:
+            async for session in get_tenant_db(tenant_id):
+                await session.execute(text("""
+                    CREATE TABLE IF NOT EXISTS registration_progress (
+                        department_id INTEGER NOT NULL,
+                        process_id INTEGER NOT NULL,
+                        student_count INTEGER NOT NULL DEFAULT 0,
+                        completed_count INTEGER NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (department_id, process_id)
+                    )
+                """))
+                await session.commit()
+                await reconcile_progress(session, tenant_id)
+            logger.info(f"tenant_{tenant_id}.registration_progress 创建并统计完成")
+    except Exception as e:
+        logger.error(f"创建 registration_progress 失败: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(add_registration_progress())
@@ -0,0 +1,44 @@
+"""
+为已有租户创建 students 检索索引
+- name: trigram GIN 索引，支持姓名包含/前缀匹配
+- id_card、student_id: varchar_pattern_ops 索引，支持前缀匹配（不受数据库排序规则影响）
+"""
+
+from sqlalchemy import text
+from app.db.session import AsyncSessionLocal, get_tenant_db
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+# pg_trgm 安装在 public 下，索引中显式指定操作符类所在 schema
+STUDENT_SEARCH_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_students_name_trgm ON students USING gin (name public.gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_students_id_card_pattern ON students (id_card varchar_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_students_student_id_pattern ON students (student_id varchar_pattern_ops)",
+]
+
+async def add_student_search_indexes():
+    """为所有租户 schema 的 students 表创建检索索引"""
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public"))
+            await session.commit()
+            result = await session.execute(text(
+                "SELECT id FROM tenants WHERE schema_name <> '' AND is_deleted = FALSE"
+            ))
+            tenant_ids = result.scalars().all()
+
+        for tenant_id in tenant_ids:
+            async for session in get_tenant_db(tenant_id):
+                for index_sql in STUDENT_SEARCH_INDEXES:
+                    await session.execute(text(index_sql))
+                await session.execute(text("ANALYZE students"))
+                await session.commit()
+            logger.info(f"tenant_{tenant_id}.students 检索索引创建完成")
+    except Exception as e:
+        logger.error(f"创建 students 检索索引失败: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(add_student_search_indexes())
@@ -3,7 +3,7 @@
 """
 
 from sqlalchemy import text
-from app.db.session import engine
+from app.db.session import get_engine
 from app.core.log import get_logger
 
 logger = get_logger(__name__)
@@ -11,7 +11,7 @@ logger = get_logger(__name__)
 async def update_timezone_columns():
     """更新所有时间字段为带时区的时间格式"""
     try:
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             # 获取当前数据库名称
             result = await conn.execute(text("SELECT current_database();"))
             db_name = result.scalar()
@@ -0,0 +1,179 @@
+"""
+按请求统计 SQL 执行次数与耗时
+
+每个引擎在创建时挂载游标执行事件，语句执行结束时累加到当前请求的 QueryStats。
+QueryStats 由日志中间件在请求开始时放入 contextvar，请求内的数据库访问（包括依赖中的查询、
+请求中创建的任务）共享同一个对象；结果写入 Server-Timing 响应头和访问日志。
+
+调试模式（SQL_PROFILER_DEBUG）下还按语句文本计数，同一请求内相同语句（参数可不同）
+执行次数达到 SQL_PROFILER_REPEAT_THRESHOLD 时记录警告，用于发现 N+1 查询。
+
+assert_max_queries 用于测试和检查脚本：统计代码块内所有线程执行的语句数，超出预算时断言失败。
+
+执行耗时达到 SLOW_QUERY_THRESHOLD_MS 的语句交给 on_slow_query 注册的处理函数（见 app.utils.slow_query）。
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """一个请求内的 SQL 统计"""
+    count: int = 0
+    # 累计耗时（秒）
+    duration: float = 0.0
+    # 查询返回的行数（服务端游标读取的行不计入）
+    rows: int = 0
+    # 调试模式下按语句文本计数
+    statements: Optional[Counter] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """执行次数达到 threshold 的语句，按次数倒序"""
+        if not self.statements:
+            return []
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_request_stats() -> QueryStats:
+    """为当前请求开始统计"""
+    stats = QueryStats(statements=Counter() if settings.SQL_PROFILER_DEBUG else None)
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+class QueryBudget:
+    """assert_max_queries 收集的语句"""
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+_budgets: List[QueryBudget] = []
+_budgets_lock = threading.Lock()
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryBudget]:
+    """
+    断言代码块内执行的 SQL 语句不超过 max_queries 条
+    统计所有线程（TestClient 在独立线程中运行应用），不要与其他请求并发使用
+    包括日志中间件的查询（按 token 查询用户、写访问日志）
+
+    with assert_max_queries(3):
+        client.get("/api/v1/user/list", headers=headers)
+    """
+    budget = QueryBudget(max_queries)
+    with _budgets_lock:
+        _budgets.append(budget)
+    try:
+        yield budget
+    finally:
+        with _budgets_lock:
+            _budgets.remove(budget)
+    if budget.count > max_queries:
+        executed = "\n".join(f"  {index + 1}. {statement}" for index, statement in enumerate(budget.statements))
+        raise AssertionError(f"执行了 {budget.count} 条 SQL，超出预算 {max_queries} 条:\n{executed}")
+
+
+# 连接 info 中记录当前事务 search_path 的键（租户会话切换 schema 时设置，连接归还时清除）
+SEARCH_PATH_INFO_KEY = "search_path"
+
+# 慢语句处理函数：(schema, 语句, 参数, 是否 executemany, 耗时秒)，在执行语句的线程中同步调用
+SlowQueryHandler = Callable[[str, str, object, bool, float], None]
+
+_slow_query_handlers: List[SlowQueryHandler] = []
+
+
+def on_slow_query(handler: SlowQueryHandler):
+    """注册慢语句处理函数，处理函数应只做入队等轻量操作"""
+    _slow_query_handlers.append(handler)
+
+
+def _record(schema: str, statement: str, parameters, executemany: bool, elapsed: float, rows: int):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.rows += rows
+        if stats.statements is not None:
+            stats.statements[statement] += 1
+    if _budgets:
+        for budget in list(_budgets):
+            budget.statements.append(statement)
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold > 0 and elapsed * 1000 >= threshold:
+        for handler in _slow_query_handlers:
+            try:
+                handler(schema, statement, parameters, executemany, elapsed)
+            except Exception as e:
+                logger.error("慢语句处理失败: %s", e)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _handle_error(exception_context):
+    # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    # 有结果集的语句（SELECT、RETURNING）的 rowcount 为返回行数，未知时为 -1
+    rows = max(cursor.rowcount, 0) if cursor.description is not None else 0
+    schema = conn.info.get(SEARCH_PATH_INFO_KEY, "public")
+    _record(schema, statement, parameters, executemany, elapsed, rows)
+
+
+def instrument_engine(engine: Engine):
+    """为引擎挂载统计事件（异步引擎传入 engine.sync_engine）"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def server_timing(stats: QueryStats, total_ms: float) -> str:
+    """Server-Timing 响应头：数据库耗时（含语句数）与请求总耗时"""
+    return f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", total;dur={total_ms:.1f}'
+
+
+def report_repeated_statements(stats: QueryStats, method: str, route: str):
+    """调试模式：记录请求内重复执行的语句"""
+    for statement, count in stats.repeated(settings.SQL_PROFILER_REPEAT_THRESHOLD):
+        logger.warning(
+            "疑似 N+1 查询: %s %s 中相同语句执行 %s 次: %s",
+            method, route, count, " ".join(statement.split())[:500]
+        )
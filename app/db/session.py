@@ -1,37 +1,119 @@
 """
 数据库会话管理
+
+全部数据库访问共用一个主引擎（连接池），由 lifespan 启动时创建、关闭时释放；
+脚本等未经过 lifespan 的场景在首次使用会话时创建。创建引擎不会建立连接，连接在首次使用时建立。
+
+租户会话不单独建引擎：从主连接池借出连接，每个事务开始时用 set_config('search_path', schema, true)
+切换到租户 schema（只在当前事务内生效，连接归还后不影响其他会话），连接数不随租户数增长。
 """
 
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Optional
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.log import get_logger
 from app.core.config import settings
+from app.core.metrics import db_pool_checkout_seconds, register_collector
+from app.db.profiler import SEARCH_PATH_INFO_KEY, instrument_engine
 
 # 获取logger
 logger = get_logger(__name__)
 
-engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,
-    echo=settings.DEBUG,
-    future=True,
-    connect_args={
-        "server_settings": {
-            "timezone": "Asia/Shanghai"
-        }
-    }
-)
-
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+def _create_engine() -> AsyncEngine:
+    async_engine = create_async_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
+        pool_pre_ping=True,
+        echo=settings.DEBUG,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        connect_args={"server_settings": {"timezone": "Asia/Shanghai"}}
+    )
+    # 按请求统计 SQL 执行次数与耗时
+    instrument_engine(async_engine.sync_engine)
+    # 连接归还时清除事务内切换的 search_path 标记
+    event.listen(async_engine.sync_engine.pool, "checkin", _clear_search_path)
+    return async_engine
+
+def _clear_search_path(dbapi_connection, connection_record):
+    connection_record.info.pop(SEARCH_PATH_INFO_KEY, None)
+
+class TenantSession(Session):
+    """租户会话：每个事务开始时切换到 info["search_path"] 指定的 schema"""
+
+@event.listens_for(TenantSession, "after_begin")
+def _set_tenant_search_path(session, transaction, connection):
+    schema_name = session.info["search_path"]
+    connection.execute(text("SELECT set_config('search_path', :schema, true)"), {"schema": schema_name})
+    connection.info[SEARCH_PATH_INFO_KEY] = schema_name
+
+_session_options = dict(class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+_sessionmaker = sessionmaker(**_session_options)
+_tenant_sessionmaker = sessionmaker(sync_session_class=TenantSession, **_session_options)
+
+_engine: Optional[AsyncEngine] = None
+
+def init_engine() -> AsyncEngine:
+    """创建主引擎（已创建时直接返回）"""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine()
+        _sessionmaker.configure(bind=_engine)
+        _tenant_sessionmaker.configure(bind=_engine)
+        logger.debug("数据库引擎已创建")
+    return _engine
+
+def get_engine() -> AsyncEngine:
+    """主引擎，未创建时创建"""
+    return init_engine()
+
+def AsyncSessionLocal(**kwargs) -> AsyncSession:
+    """主连接池（public schema）的会话"""
+    init_engine()
+    return _sessionmaker(**kwargs)
+
+def TenantSessionLocal(tenant_id: int, **kwargs) -> AsyncSession:
+    """租户 schema 的会话，与 public 共用主连接池"""
+    init_engine()
+    return _tenant_sessionmaker(info={"search_path": f"tenant_{tenant_id}"}, **kwargs)
+
+def _pool_metrics():
+    if _engine is None:
+        return
+    pool = _engine.pool
+    # overflow() 在连接数未达到 pool_size 时为负数
+    for name, documentation, value in (
+        ("db_pool_size", "连接池常驻连接数上限", pool.size()),
+        ("db_pool_checked_out", "已借出的连接数", pool.checkedout()),
+        ("db_pool_checked_in", "池中空闲连接数", pool.checkedin()),
+        ("db_pool_overflow", "超出 pool_size 的连接数", max(pool.overflow(), 0)),
+    ):
+        yield name, "gauge", documentation, (), [((), value)]
+
+register_collector(_pool_metrics)
+
+async def _checkout(session: AsyncSession, pool: str):
+    """获取会话的连接并记录耗时（含连接池等待与 pre-ping）"""
+    start = time.perf_counter()
+    await session.connection()
+    db_pool_checkout_seconds.observe(time.perf_counter() - start, pool)
+
+async def warm_up() -> float:
+    """建立主引擎的首个连接，返回耗时（毫秒）"""
+    start = time.perf_counter()
+    async with get_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return (time.perf_counter() - start) * 1000
+
+async def dispose_engines():
+    """释放主引擎"""
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -40,6 +122,7 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     logger.debug("创建数据库会话")
     async with AsyncSessionLocal() as session:
         try:
+            await _checkout(session, "public")
             # 设置会话时区
             await session.execute(text("SET timezone = 'Asia/Shanghai';"))
             yield session
@@ -52,35 +135,15 @@ async def get_tenant_db(tenant_id: int) -> AsyncGenerator[AsyncSession, None]:
     获取租户数据库会话
     """
     schema_name = f"tenant_{tenant_id}"
-    logger.debug(f"创建租户数据库会话: schema={schema_name}")
-    
-    engine = create_async_engine(
-        settings.SQLALCHEMY_DATABASE_URI,
-        echo=settings.DEBUG,
-        future=True,
-        connect_args={
-            "server_settings": {
-                "timezone": "Asia/Shanghai",
-                "search_path": schema_name
-            }
-        }
-    )
-    
-    AsyncTenantSessionLocal = sessionmaker(
-        engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autocommit=False,
-        autoflush=False
-    )
+    logger.debug("创建租户数据库会话: schema=%s", schema_name)
     
-    async with AsyncTenantSessionLocal() as session:
+    async with TenantSessionLocal(tenant_id) as session:
         try:
+            await _checkout(session, "tenant")
             # 设置会话时区
             await session.execute(text("SET timezone = 'Asia/Shanghai';"))
-            logger.debug(f"租户数据库会话创建成功: schema={schema_name}")
+            logger.debug("租户数据库会话创建成功: schema=%s", schema_name)
             yield session
         finally:
-            logger.debug(f"关闭租户数据库会话: schema={schema_name}")
+            logger.debug("关闭租户数据库会话: schema=%s", schema_name)
             await session.close()
-            await engine.dispose() 
\ No newline at end of file
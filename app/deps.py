@@ -1,4 +1,4 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -8,6 +8,7 @@ from app.core.config import settings
 from app.db.session import get_db, get_tenant_db
 from app.models.public import User
 from app.core.log import get_logger
+from app.utils.tenant_directory import ensure_tenant_available
 
 # 获取logger
 logger = get_logger(__name__)
@@ -66,7 +67,7 @@ async def get_current_user(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="登录已过期"
                 )
-            logger.error(f"token解码失败: {str(e)}")
+            logger.error("token解码失败: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="无效的Token"
@@ -80,27 +81,31 @@ async def get_current_user(
                 detail="无效的Token"
             )
             
-        logger.debug(f"查询用户ID: {user_id}")
+        logger.debug("查询用户ID: %s", user_id)
         result = await db.execute(
             select(User).where(User.id == user_id)
         )
         user = result.scalar_one_or_none()
         
         if not user:
-            logger.warning(f"用户不存在: {user_id}")
+            logger.warning("用户不存在: %s", user_id)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="用户不存在"
             )
             
-        logger.info(f"用户认证成功: {user.username}")
-        return user
+        logger.info("用户认证成功: %s", user.username)
     except Exception as e:
-        logger.error(f"用户认证过程发生错误: {str(e)}")
+        logger.error("用户认证过程发生错误: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    
+    # 租户已停用、过期或删除时拒绝（查内存中的租户目录，不访问数据库）
+    if user.tenant_id and not user.is_superuser:
+        await ensure_tenant_available(user.tenant_id)
+    return user
 
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
@@ -109,12 +114,12 @@ async def get_current_active_user(
     获取当前活跃用户
     """
     if not current_user.is_active:
-        logger.warning(f"用户未激活: {current_user.username}")
+        logger.warning("用户未激活: %s", current_user.username)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户未激活"
         )
-    logger.debug(f"获取活跃用户: {current_user.username}")
+    logger.debug("获取活跃用户: %s", current_user.username)
     return current_user
 
 async def get_current_active_superuser(
@@ -124,12 +129,12 @@ async def get_current_active_superuser(
     获取当前超级用户
     """
     if not current_user.is_superuser:
-        logger.warning(f"非超级用户尝试访问超级用户接口: {current_user.username}")
+        logger.warning("非超级用户尝试访问超级用户接口: %s", current_user.username)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="权限不足"
         )
-    logger.debug(f"获取超级用户: {current_user.username}")
+    logger.debug("获取超级用户: %s", current_user.username)
     return current_user
 
 async def get_current_tenant_admin(
@@ -137,12 +142,12 @@ async def get_current_tenant_admin(
 ) -> User:
     """获取当前租户管理员用户"""
     if not current_user.is_tenant_admin:
-        logger.warning(f"非租户管理员尝试访问管理员接口: {current_user.username}")
+        logger.warning("非租户管理员尝试访问管理员接口: %s", current_user.username)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges"
         )
-    logger.debug(f"获取租户管理员: {current_user.username}")
+    logger.debug("获取租户管理员: %s", current_user.username)
     return current_user
 
 async def get_tenant_session(
@@ -150,6 +155,21 @@ async def get_tenant_session(
     db: AsyncSession = Depends(get_db)
 ) -> Generator[AsyncSession, None, None]:
     """获取租户数据库会话"""
-    logger.debug(f"获取租户数据库会话: tenant_id={tenant_id}")
+    logger.debug("获取租户数据库会话: tenant_id=%s", tenant_id)
+    await ensure_tenant_available(tenant_id)
     async for session in get_tenant_db(tenant_id):
-        yield session 
\ No newline at end of file
+        yield session 
+
+async def get_current_tenant_db(
+    current_user: User = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    """获取当前用户所属租户的数据库会话"""
+    if not current_user.tenant_id:
+        logger.warning("用户未分配租户: %s", current_user.username)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="用户未分配租户"
+        )
+    await ensure_tenant_available(current_user.tenant_id)
+    async for session in get_tenant_db(current_user.tenant_id):
+        yield session
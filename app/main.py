@@ -1,38 +1,150 @@
-from fastapi import FastAPI
+import time
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from app import IMPORT_STARTED_AT
 from app.core.config import settings
 from app.api.v1.router import router as v1_router
+from app.db.session import dispose_engines, init_engine, warm_up
 from app.middleware.logging import LoggingMiddleware
 from app.core.log import get_logger
+from app.core.metrics import CONTENT_TYPE, render_metrics
+from app.core.loop_monitor import start_loop_monitor, stop_loop_monitor
+from app.utils.checkin_batcher import shutdown_checkin_batchers
+from app.utils.access_rollup import start_rollup_flusher, stop_rollup_flusher
+from app.utils.invalidation import start_invalidation_listener, stop_invalidation_listener
+from app.utils.tenant_directory import start_tenant_directory, stop_tenant_directory
+from app.utils.log_partitions import start_partition_maintenance, stop_partition_maintenance
+from app.utils.slow_query import start_slow_query_log, stop_slow_query_log
+from app.utils.tenant_usage import start_usage_flusher, stop_usage_flusher
+from app.utils.registration_progress import start_progress_reconciler, stop_progress_reconciler
 
 # 获取logger
 logger = get_logger(__name__)
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
+# 模块导入完成时间（路由、模型等全部导入）
+IMPORTED_AT = time.perf_counter()
 
-# 配置CORS
-if settings.CORS_ORIGINS:
-    logger.debug("配置CORS中间件")
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用生命周期管理
+    数据库表结构由 alembic 和租户迁移脚本维护，启动时不执行建表
+    """
+    startup_started_at = time.perf_counter()
+    
+    # 监控事件循环延迟，阻塞时记录调用栈
+    start_loop_monitor()
+    
+    # 创建数据库引擎并建立首个连接，连接失败时不阻止启动（连接池会在请求时重试）
+    init_engine()
+    try:
+        connect_ms = await warm_up()
+    except Exception as e:
+        connect_ms = None
+        logger.error(f"数据库预连接失败: {str(e)}")
+    
+    # 加载租户目录（请求路径上的租户状态检查使用）
+    await start_tenant_directory()
+    
+    # 监听其他进程发布的缓存失效事件
+    start_invalidation_listener()
+    
+    # 启动报到进度定期重算
+    start_progress_reconciler()
+    
+    # 启动日志分区维护（创建未来月份分区、删除过期分区）
+    start_partition_maintenance()
+    
+    # 启动访问统计定期写库
+    start_rollup_flusher()
+    
+    # 收集慢语句并采集执行计划
+    start_slow_query_log()
+    
+    # 启动租户资源用量定期写库
+    start_usage_flusher()
+    
+    now = time.perf_counter()
+    logger.info(
+        f"应用启动完成: 总耗时 {(now - IMPORT_STARTED_AT) * 1000:.0f}ms, "
+        f"模块导入 {(IMPORTED_AT - IMPORT_STARTED_AT) * 1000:.0f}ms, "
+        f"数据库预连接 {'失败' if connect_ms is None else f'{connect_ms:.0f}ms'}, "
+        f"启动任务 {(now - startup_started_at) * 1000:.0f}ms"
     )
+    
+    yield
+    
+    await stop_loop_monitor()
+    await stop_progress_reconciler()
+    await stop_tenant_directory()
+    await stop_invalidation_listener()
+    await stop_partition_maintenance()
+    await stop_slow_query_log()
+    
+    # 写入剩余的访问统计和租户资源用量
+    await stop_rollup_flusher()
+    await stop_usage_flusher()
+    
+    # 提交剩余的签到
+    await shutdown_checkin_batchers()
+    
+    # 关闭数据库连接
+    await dispose_engines()
 
-# 添加日志中间件
-logger.debug("添加日志中间件")
-app.add_middleware(LoggingMiddleware)
-
-# 注册路由
-logger.debug("注册v1版本路由")
-app.include_router(v1_router, prefix=settings.API_V1_STR)
+def create_app() -> FastAPI:
+    """
+    创建FastAPI应用
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description=settings.PROJECT_DESCRIPTION,
+        version=settings.VERSION,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan
+    )
+    
+    # 配置CORS
+    if settings.CORS_ORIGINS:
+        logger.debug("配置CORS中间件")
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in settings.CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    
+    # 添加日志中间件
+    logger.debug("添加日志中间件")
+    app.add_middleware(LoggingMiddleware)
+    
+    # 注册路由
+    logger.debug("注册v1版本路由")
+    app.include_router(v1_router, prefix=settings.API_V1_STR)
+    
+    @app.get("/")
+    async def root():
+        logger.info("访问根路径")
+        return {"message": "Welcome to Multi-tenant Campus Registration System"}
+    
+    if settings.METRICS_ENABLED:
+        if not settings.METRICS_TOKEN:
+            logger.warning("指标接口 /metrics 未设置 METRICS_TOKEN，需在反向代理上限制访问")
+        
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics(request: Request):
+            if settings.METRICS_TOKEN:
+                authorization = request.headers.get("authorization", "")
+                if not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="指标访问令牌无效"
+                    )
+            return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+    
+    return app
 
-@app.get("/")
-async def root():
-    logger.info("访问根路径")
-    return {"message": "Welcome to Multi-tenant Campus Registration System"} 
\ No newline at end of file
+# 创建应用实例
+app = create_app()
@@ -5,14 +5,28 @@ from starlette.types import ASGIApp
 from app.core.security import verify_token
 from app.models.public import AccessLog
 from app.db.session import AsyncSessionLocal
+from app.db.profiler import start_request_stats, server_timing, report_repeated_statements
 from app.core.log import get_logger
-from datetime import datetime
+from app.core.config import settings
+from app.core.metrics import http_requests_in_flight, http_request_duration_seconds, tenant_http_requests_total
+from app.utils.access_rollup import UNMATCHED_ROUTE, aggregator
+from app.utils.tenant_usage import accumulator as usage_accumulator
 import time
 import json
 
 # 获取logger
 logger = get_logger(__name__)
 
+async def _count_bytes(body_iterator, tenant_id):
+    """统计响应体字节数，发送完成（或客户端断开）时计入租户用量"""
+    sent = 0
+    try:
+        async for chunk in body_iterator:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        usage_accumulator.record_bytes(tenant_id, sent)
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     def __init__(
         self,
@@ -20,11 +34,20 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     ):
         super().__init__(app)
 
+    @staticmethod
+    def _record_metrics(request: Request, method: str, status_code: int, tenant_id, seconds: float) -> str:
+        """记录运行指标，返回路由模板"""
+        route_path = getattr(request.scope.get("route"), "path", UNMATCHED_ROUTE)
+        http_request_duration_seconds.observe(seconds, route_path, method, status_code)
+        tenant_http_requests_total.inc(tenant_id or 0)
+        return route_path
+
     async def dispatch(
         self, request: Request, call_next: Callable
     ) -> Response:
         # 记录请求开始时间
-        start_time = datetime.now()
+        start_time = time.perf_counter()
+        query_stats = start_request_stats()
         
         # 获取请求信息
         path = request.url.path
@@ -32,19 +55,21 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         client_ip = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
         
-        logger.debug(f"收到请求: {method} {path} from {client_ip}")
+        logger.debug("收到请求: %s %s from %s", method, path, client_ip)
         
         # 获取用户信息
         user_id = None
+        tenant_id = None
         auth_header = request.headers.get("authorization")
         if auth_header and auth_header.startswith("Bearer "):
             try:
                 token = auth_header.split(" ")[1]
                 payload = verify_token(token)
                 if payload:
+                    tenant_id = payload.get("tenant_id")
                     username = payload.get("sub")
                     if username:
-                        logger.debug(f"验证用户token: {username}")
+                        logger.debug("验证用户token: %s", username)
                         async with AsyncSessionLocal() as session:
                             from app.models.public import User
                             from sqlalchemy import select
@@ -54,20 +79,46 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                             user = result.scalar_one_or_none()
                             if user:
                                 user_id = user.id
-                                logger.debug(f"用户验证成功: {username}")
+                                logger.debug("用户验证成功: %s", username)
             except Exception as e:
-                logger.warning(f"用户token验证失败: {str(e)}")
+                logger.warning("用户token验证失败: %s", e)
 
         # 执行请求
+        http_requests_in_flight.inc()
         try:
             response = await call_next(request)
-            logger.debug(f"请求处理成功: {method} {path}")
+            logger.debug("请求处理成功: %s %s", method, path)
         except Exception as e:
-            logger.error(f"请求处理失败: {method} {path}, 错误: {str(e)}")
+            logger.error("请求处理失败: %s %s, 错误: %s", method, path, e)
+            elapsed = time.perf_counter() - start_time
+            self._record_metrics(request, method, 500, tenant_id, elapsed)
+            if settings.TENANT_USAGE_FLUSH_SECONDS > 0:
+                usage_accumulator.record_request(
+                    tenant_id, 500, elapsed * 1000, query_stats.duration_ms, query_stats.count, query_stats.rows
+                )
             raise
+        finally:
+            http_requests_in_flight.dec()
+        
+        # 计算响应时间（毫秒）
+        process_time = (time.perf_counter() - start_time) * 1000
+        route_path = self._record_metrics(request, method, response.status_code, tenant_id, process_time / 1000)
         
-        # 计算响应时间
-        process_time = (datetime.now() - start_time).total_seconds()
+        # SQL 统计（流式响应只包含发送响应头之前的查询）
+        response.headers.append("Server-Timing", server_timing(query_stats, process_time))
+        if query_stats.statements is not None:
+            report_repeated_statements(query_stats, method, route_path)
+        
+        # 按路由模板累加访问统计，定期写入 access_log_rollups
+        if settings.ACCESS_ROLLUP_FLUSH_SECONDS > 0:
+            aggregator.record(route_path, method, response.status_code, tenant_id, process_time)
+        
+        # 按租户累加资源用量，定期写入 tenant_resource_usage
+        if settings.TENANT_USAGE_FLUSH_SECONDS > 0:
+            usage_accumulator.record_request(
+                tenant_id, response.status_code, process_time, query_stats.duration_ms, query_stats.count, query_stats.rows
+            )
+            response.body_iterator = _count_bytes(response.body_iterator, tenant_id)
         
         try:
             # 创建访问日志
@@ -76,7 +127,9 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                 path=path,
                 method=method,
                 status_code=response.status_code,
-                process_time=process_time,
+                process_time=int(process_time),
+                query_count=query_stats.count,
+                db_time=int(query_stats.duration_ms),
                 ip_address=client_ip,
                 user_agent=user_agent
             )
@@ -85,8 +138,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             async with AsyncSessionLocal() as session:
                 session.add(access_log)
                 await session.commit()
-                logger.debug(f"访问日志已保存: {method} {path} - {response.status_code} ({process_time}s)")
+                logger.debug("访问日志已保存: %s %s - %s (%.0fms)", method, path, response.status_code, process_time)
         except Exception as e:
-            logger.error(f"保存访问日志失败: {str(e)}")
+            logger.error("保存访问日志失败: %s", e)
         
         return response 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Date, DateTime, Text, CheckConstraint
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, ForeignKey, Date, DateTime, Text, CheckConstraint, Index, Float
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, text
 import enum
@@ -144,9 +145,19 @@ class TenantPermission(BaseModel):
     )
 
 class AuditLog(BaseModel):
+    """审计日志，按 created_at 每月一个分区（见 app.utils.log_partitions）"""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # 不带筛选条件时按时间倒序分页，以及按时间范围统计
+        Index("ix_audit_logs_created_at", "created_at"),
+        # 按用户、操作类型筛选并按时间倒序分页
+        Index("ix_audit_logs_user_id_created_at", "user_id", text("created_at DESC")),
+        Index("ix_audit_logs_action_created_at", "action", text("created_at DESC")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # 分区表的主键必须包含分区键
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String(50), nullable=False)
     resource_type = Column(String(50), nullable=False)
@@ -154,26 +165,65 @@ class AuditLog(BaseModel):
     details = Column(Text)
     ip_address = Column(String(50))
     user_agent = Column(String(200))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=get_current_time, server_default=func.now())
     
     user = relationship("User", back_populates="audit_logs")
 
 class AccessLog(BaseModel):
+    """访问日志，按 created_at 每月一个分区（见 app.utils.log_partitions）"""
     __tablename__ = "access_logs"
+    __table_args__ = (
+        Index("ix_access_logs_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # 分区表的主键必须包含分区键
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     path = Column(String(200), nullable=False)
     method = Column(String(10), nullable=False)
     status_code = Column(Integer, nullable=False)
     response_time = Column(Integer)  # 响应时间（毫秒）
     process_time = Column(Integer)  # 处理时间（毫秒）
+    query_count = Column(Integer)  # 执行的 SQL 语句数
+    db_time = Column(Integer)  # SQL 执行耗时合计（毫秒）
     ip_address = Column(String(50))
     user_agent = Column(String(200))
-    created_at = Column(DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), nullable=False)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=get_current_time, server_default=text('CURRENT_TIMESTAMP'), nullable=False)
     
     user = relationship("User", back_populates="access_logs")
 
+class AccessLogRollup(Base):
+    """访问统计预聚合桶（分钟/小时），由 app.utils.access_rollup 定期 upsert"""
+    __tablename__ = "access_log_rollups"
+    
+    # 主键以 (granularity, bucket_start) 开头，按时间范围查询直接使用主键索引
+    granularity = Column(String(6), primary_key=True)  # minute / hour
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    route = Column(String(200), primary_key=True)  # 路由模板，如 /api/v1/user/get
+    method = Column(String(10), primary_key=True)
+    status_class = Column(String(3), primary_key=True)  # 2xx / 4xx / 5xx
+    tenant_id = Column(Integer, primary_key=True, server_default=text('0'))  # 0 表示无租户
+    request_count = Column(BigInteger, nullable=False, server_default=text('0'))
+    error_count = Column(BigInteger, nullable=False, server_default=text('0'))
+    latency_sum_ms = Column(Float, nullable=False, server_default=text('0'))
+    latency_max_ms = Column(Float, nullable=False, server_default=text('0'))
+    histogram = Column(ARRAY(BigInteger), nullable=False)  # 各耗时区间的请求数，边界见 LATENCY_BUCKETS_MS
+
+class TenantResourceUsage(Base):
+    """租户资源用量小时桶，由 app.utils.tenant_usage 定期 upsert"""
+    __tablename__ = "tenant_resource_usage"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    tenant_id = Column(Integer, primary_key=True)  # 0 表示无租户
+    request_count = Column(BigInteger, nullable=False, server_default=text('0'))
+    error_count = Column(BigInteger, nullable=False, server_default=text('0'))
+    wall_ms = Column(Float, nullable=False, server_default=text('0'))  # 请求处理耗时合计
+    db_ms = Column(Float, nullable=False, server_default=text('0'))  # SQL 执行耗时合计
+    query_count = Column(BigInteger, nullable=False, server_default=text('0'))
+    rows_returned = Column(BigInteger, nullable=False, server_default=text('0'))
+    bytes_sent = Column(BigInteger, nullable=False, server_default=text('0'))
+
 class RoleMenu(Base):
     __tablename__ = "role_menus"
     
@@ -183,6 +233,17 @@ class RoleMenu(Base):
     role = relationship("Role", back_populates="role_menus")
     menu = relationship("Menu", back_populates="role_menus")
 
+class MenuClosure(Base):
+    """菜单闭包表（祖先, 后代, 距离），由触发器维护，见 app.utils.hierarchy"""
+    __tablename__ = "menu_closure"
+    __table_args__ = (
+        Index("ix_menu_closure_descendant", "descendant_id", "depth"),
+    )
+    
+    ancestor_id = Column(Integer, ForeignKey("menus.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("menus.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
 class RoleApi(Base):
     """角色-API关系表"""
     __tablename__ = "role_apis"
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, Date, Text
-from .base import BaseModel
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, Date, Text, UniqueConstraint, Index
+from .base import BaseModel, Base
 
 class AdmissionBatch(BaseModel):
     __tablename__ = "admission_batches"
@@ -22,6 +22,17 @@ class Department(BaseModel):
     email = Column(String(100))
     status = Column(Boolean, default=True)
 
+class DepartmentClosure(Base):
+    """院系闭包表（祖先, 后代, 距离），由触发器维护，见 app.utils.hierarchy"""
+    __tablename__ = "department_closure"
+    __table_args__ = (
+        Index("ix_department_closure_descendant", "descendant_id", "depth"),
+    )
+    
+    ancestor_id = Column(Integer, ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
 class Student(BaseModel):
     __tablename__ = "students"
     
@@ -99,6 +110,10 @@ class RegistrationInfo(BaseModel):
     operator_id = Column(Integer)
     remarks = Column(Text)
 
+    __table_args__ = (
+        UniqueConstraint("student_id", "process_id", name="uq_registration_info_student_process"),
+    )
+
 class FieldMapping(BaseModel):
     __tablename__ = "field_mappings"
     
@@ -106,4 +121,14 @@ class FieldMapping(BaseModel):
     display_name = Column(String(50), nullable=False)
     is_required = Column(Boolean, default=False)
     order = Column(Integer, default=0)
-    status = Column(Boolean, default=True) 
\ No newline at end of file
+    status = Column(Boolean, default=True) 
+
+class RegistrationProgress(Base):
+    """报到进度汇总（院系 x 报到环节），department_id 为 0 表示未分配院系"""
+    __tablename__ = "registration_progress"
+    
+    department_id = Column(Integer, primary_key=True)
+    process_id = Column(Integer, primary_key=True)
+    student_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
@@ -0,0 +1,27 @@
+from typing import Optional, List
+from pydantic import Field
+from app.schemas.common import BaseSchema
+
+class DormitoryAllocationRequest(BaseSchema):
+    """宿舍批量分配请求"""
+    admission_batch_id: int = Field(..., description="录取批次ID")
+    same_gender: bool = Field(True, description="同性别同寝")
+    same_department: bool = Field(False, description="同院系同寝")
+    buildings: Optional[List[str]] = Field(None, description="楼栋填充顺序，为空时按楼栋名称顺序使用全部楼栋")
+    dry_run: bool = Field(True, description="仅预览分配结果，不写入数据库")
+    preview_limit: int = Field(100, ge=0, le=1000, description="返回的分配明细条数")
+
+class DormitoryAssignment(BaseSchema):
+    """单个学生的分配结果"""
+    id_card: str
+    student_id: Optional[str] = None
+    name: str
+    dormitory_id: int
+    building: str
+    room_number: str
+
+class BedReservationRequest(BaseSchema):
+    """学生选床请求"""
+    student_id: str = Field(..., description="学号")
+    dormitory_id: Optional[int] = Field(None, description="房间ID，为空时自动选择有空床的房间")
+    building: Optional[str] = Field(None, description="自动选择时限定的楼栋")
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import Field
+from app.schemas.common import BaseSchema
+
+class RegistrationCheckinRequest(BaseSchema):
+    """报到签到请求"""
+    student_id: str = Field(..., max_length=50, description="学号")
+    process_id: int = Field(..., ge=1, le=2**31 - 1, description="报到环节ID")
+    status: bool = Field(True, description="是否完成")
+    remarks: Optional[str] = Field(None, description="备注")
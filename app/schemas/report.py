@@ -0,0 +1,11 @@
+from typing import Dict, List, Optional
+from pydantic import Field
+from app.schemas.common import BaseSchema
+
+class ReportRunRequest(BaseSchema):
+    """跨租户报表执行请求"""
+    name: str = Field(..., description="报表名称")
+    params: Dict[str, Optional[str]] = Field(default_factory=dict, description="报表参数")
+    tenant_ids: Optional[List[int]] = Field(None, description="限定的租户ID，为空时统计全部租户")
+    tenant_timeout: Optional[float] = Field(None, gt=0, le=300, description="单个租户查询超时（秒）")
+    total_timeout: Optional[float] = Field(None, gt=0, le=600, description="报表整体超时（秒），超时后返回部分结果")
@@ -0,0 +1,40 @@
+from datetime import date
+from typing import Optional
+from pydantic import ConfigDict
+from app.schemas.common import BaseSchema
+from app.schemas.tenant import StudentBase
+
+class StudentRecord(StudentBase):
+    """学生导入导出记录，扩展字段由租户字段映射编译（见 app.utils.field_mapping）"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    student_id: Optional[str] = None
+
+class StudentExportRecord(BaseSchema):
+    """学生导出记录：库中已有数据原样输出，不做必填和长度校验"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    id_card: Optional[str] = None
+    student_id: Optional[str] = None
+    name: Optional[str] = None
+    gender: Optional[str] = None
+    birth_date: Optional[date] = None
+    admission_batch_id: Optional[int] = None
+    department_id: Optional[int] = None
+    dormitory_id: Optional[int] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    status: Optional[bool] = None
+
+class StudentSearchResult(BaseSchema):
+    """学生检索结果"""
+    id_card: str
+    student_id: Optional[str] = None
+    name: str
+    gender: Optional[str] = None
+    department_id: Optional[int] = None
+    dormitory_id: Optional[int] = None
+    status: Optional[bool] = None
+    # 0: 身份证号或学号完全匹配 1: 身份证号或学号前缀匹配 2: 姓名匹配
+    rank: int
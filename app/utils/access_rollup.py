@@ -0,0 +1,320 @@
+"""
+访问日志预聚合
+
+每个请求结束时在内存中累加到分钟、小时两个粒度的桶，桶的键为
+（粒度, 桶起始时间, 路由模板, 请求方法, 状态码类别, 租户ID）。
+每个桶记录请求数、错误数、耗时合计/最大值和耗时直方图（固定边界，可逐元素相加合并）。
+后台任务定期把内存中的桶 upsert 到 access_log_rollups 表，多个工作进程写同一个桶时在数据库中合并。
+查询延迟分位数时合并所需桶的直方图再计算，不再扫描 access_logs 原始数据。
+"""
+
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import register_collector
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger(__name__)
+
+# 直方图各桶上界（毫秒），最后一个桶为超过最大上界的请求
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 300, 500, 750, 1000, 2000, 5000, 10000, 30000]
+
+GRANULARITIES = {"minute": 60, "hour": 3600}
+
+# 未匹配到路由的请求（如 404）统一归为一个路由，避免按原始路径产生大量桶
+UNMATCHED_ROUTE = "<unmatched>"
+
+# 内存中最多保留的桶数，写库持续失败时丢弃新数据而不是无限增长
+MAX_PENDING_BUCKETS = 100000
+
+RollupKey = Tuple[str, datetime, str, str, str, int]
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def bucket_start(timestamp: float, granularity: str) -> datetime:
+    seconds = GRANULARITIES[granularity]
+    return datetime.fromtimestamp(timestamp - timestamp % seconds, timezone.utc)
+
+
+@dataclass
+class LatencyStats:
+    """请求数、错误数和耗时直方图，可与同键的其他统计合并"""
+    request_count: int = 0
+    error_count: int = 0
+    latency_sum_ms: float = 0.0
+    latency_max_ms: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def record(self, latency_ms: float, is_error: bool):
+        self.request_count += 1
+        if is_error:
+            self.error_count += 1
+        self.latency_sum_ms += latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    def merge(self, other: "LatencyStats"):
+        self.request_count += other.request_count
+        self.error_count += other.error_count
+        self.latency_sum_ms += other.latency_sum_ms
+        self.latency_max_ms = max(self.latency_max_ms, other.latency_max_ms)
+        # 历史数据的直方图边界较少时按前缀合并
+        for index, count in enumerate(other.histogram[:len(self.histogram)]):
+            self.histogram[index] += count
+
+    def percentile(self, q: float) -> Optional[float]:
+        """按直方图估算分位数（桶内线性插值），超出最大上界时返回最大耗时"""
+        total = sum(self.histogram)
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(self.histogram):
+            if count and cumulative + count >= rank:
+                if index >= len(LATENCY_BUCKETS_MS):
+                    return round(self.latency_max_ms, 2)
+                lower = LATENCY_BUCKETS_MS[index - 1] if index else 0
+                upper = min(LATENCY_BUCKETS_MS[index], max(self.latency_max_ms, lower))
+                return round(lower + (upper - lower) * (rank - cumulative) / count, 2)
+            cumulative += count
+        return round(self.latency_max_ms, 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "error_rate": round(self.error_count / self.request_count, 4) if self.request_count else 0,
+            "avg_ms": round(self.latency_sum_ms / self.request_count, 2) if self.request_count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.latency_max_ms, 2)
+        }
+
+
+class RollupAggregator:
+    """进程内的访问统计聚合器，只在事件循环线程中使用"""
+
+    def __init__(self):
+        self._pending: Dict[RollupKey, LatencyStats] = {}
+        self.dropped = 0
+
+    def record(self, route: str, method: str, status_code: int, tenant_id: Optional[int],
+               latency_ms: float, timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        is_error = status_code >= 500
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(timestamp, granularity), route, method,
+                   status_class(status_code), tenant_id or 0)
+            stats = self._pending.get(key)
+            if stats is None:
+                if len(self._pending) >= MAX_PENDING_BUCKETS:
+                    self.dropped += 1
+                    continue
+                stats = self._pending[key] = LatencyStats()
+            stats.record(latency_ms, is_error)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def take(self) -> Dict[RollupKey, LatencyStats]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: Dict[RollupKey, LatencyStats]):
+        """写库失败时放回未写入的桶，下次一并写入"""
+        for key, stats in pending.items():
+            current = self._pending.get(key)
+            if current is not None:
+                current.merge(stats)
+            elif len(self._pending) < MAX_PENDING_BUCKETS:
+                self._pending[key] = stats
+            else:
+                self.dropped += stats.request_count
+
+
+aggregator = RollupAggregator()
+
+
+def _rollup_metrics():
+    yield "access_rollup_pending_buckets", "gauge", "内存中等待写库的访问统计桶数", (), [((), aggregator.pending)]
+    yield "access_rollup_dropped_total", "counter", "内存桶数达到上限时丢弃的请求数", (), [((), aggregator.dropped)]
+
+
+register_collector(_rollup_metrics)
+
+UPSERT_SQL = text("""
+    INSERT INTO access_log_rollups (
+        granularity, bucket_start, route, method, status_class, tenant_id,
+        request_count, error_count, latency_sum_ms, latency_max_ms, histogram
+    ) VALUES (
+        :granularity, :bucket_start, :route, :method, :status_class, :tenant_id,
+        :request_count, :error_count, :latency_sum_ms, :latency_max_ms, CAST(:histogram AS BIGINT[])
+    )
+    ON CONFLICT (granularity, bucket_start, route, method, status_class, tenant_id) DO UPDATE SET
+        request_count = access_log_rollups.request_count + EXCLUDED.request_count,
+        error_count = access_log_rollups.error_count + EXCLUDED.error_count,
+        latency_sum_ms = access_log_rollups.latency_sum_ms + EXCLUDED.latency_sum_ms,
+        latency_max_ms = GREATEST(access_log_rollups.latency_max_ms, EXCLUDED.latency_max_ms),
+        histogram = ARRAY(
+            SELECT COALESCE(u.a, 0) + COALESCE(u.b, 0)
+            FROM unnest(access_log_rollups.histogram, EXCLUDED.histogram) WITH ORDINALITY AS u(a, b, i)
+            ORDER BY u.i
+        )
+""")
+
+
+async def flush_rollups() -> int:
+    """把内存中的桶写入 access_log_rollups，返回写入的桶数"""
+    pending = aggregator.take()
+    if not pending:
+        return 0
+    # 固定顺序写入，避免多个工作进程并发 upsert 同一批桶时死锁
+    params = [
+        {
+            "granularity": key[0], "bucket_start": key[1], "route": key[2], "method": key[3],
+            "status_class": key[4], "tenant_id": key[5],
+            "request_count": stats.request_count, "error_count": stats.error_count,
+            "latency_sum_ms": stats.latency_sum_ms, "latency_max_ms": stats.latency_max_ms,
+            "histogram": stats.histogram
+        }
+        for key, stats in sorted(pending.items(), key=lambda item: item[0])
+    ]
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(UPSERT_SQL, params)
+            await session.commit()
+    except BaseException:
+        # 包括关闭时取消写库任务（CancelledError），放回后由 stop_rollup_flusher 最后一次写入
+        aggregator.restore(pending)
+        raise
+    return len(params)
+
+
+async def prune_rollups(now: Optional[datetime] = None) -> int:
+    """删除超过保留期的分钟桶和小时桶"""
+    now = now or datetime.now(timezone.utc)
+    retention = {
+        "minute": settings.ACCESS_ROLLUP_MINUTE_RETENTION_DAYS,
+        "hour": settings.ACCESS_ROLLUP_HOUR_RETENTION_DAYS,
+    }
+    deleted = 0
+    async with AsyncSessionLocal() as session:
+        for granularity, days in retention.items():
+            if days <= 0:
+                continue
+            result = await session.execute(
+                text("""
+                    DELETE FROM access_log_rollups
+                    WHERE granularity = :granularity
+                      AND bucket_start < CAST(:now AS TIMESTAMPTZ) - make_interval(days => :days)
+                """),
+                {"granularity": granularity, "now": now, "days": days}
+            )
+            deleted += result.rowcount
+        await session.commit()
+    return deleted
+
+
+async def query_rollups(
+    start_time: datetime,
+    end_time: datetime,
+    granularity: str,
+    group_by: Iterable[str],
+    route: Optional[str] = None,
+    method: Optional[str] = None,
+    status_class: Optional[str] = None,
+    tenant_id: Optional[int] = None
+) -> Dict[tuple, LatencyStats]:
+    """读取时间范围内的桶，按 group_by 中的列合并统计"""
+    group_by = list(group_by)
+    result = await _select_rollups(start_time, end_time, granularity, route, method, status_class, tenant_id)
+    merged: Dict[tuple, LatencyStats] = {}
+    for row in result:
+        key = tuple(row[column] for column in group_by)
+        stats = merged.setdefault(key, LatencyStats())
+        stats.merge(LatencyStats(
+            request_count=row["request_count"],
+            error_count=row["error_count"],
+            latency_sum_ms=row["latency_sum_ms"],
+            latency_max_ms=row["latency_max_ms"],
+            histogram=list(row["histogram"])
+        ))
+    return merged
+
+
+async def _select_rollups(start_time, end_time, granularity, route, method, status_class, tenant_id) -> List[dict]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("""
+                SELECT bucket_start, route, method, status_class, tenant_id,
+                       request_count, error_count, latency_sum_ms, latency_max_ms, histogram
+                FROM access_log_rollups
+                WHERE granularity = :granularity
+                  AND bucket_start >= :start_time AND bucket_start < :end_time
+                  AND (CAST(:route AS VARCHAR) IS NULL OR route = :route)
+                  AND (CAST(:method AS VARCHAR) IS NULL OR method = :method)
+                  AND (CAST(:status_class AS VARCHAR) IS NULL OR status_class = :status_class)
+                  AND (CAST(:tenant_id AS INTEGER) IS NULL OR tenant_id = :tenant_id)
+            """),
+            {
+                "granularity": granularity, "start_time": start_time, "end_time": end_time,
+                "route": route, "method": method, "status_class": status_class, "tenant_id": tenant_id
+            }
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def _flush_loop(interval: float):
+    last_prune = 0.0
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_rollups()
+            if time.monotonic() - last_prune >= 3600:
+                await prune_rollups()
+                last_prune = time.monotonic()
+        except Exception as e:
+            logger.error("写入访问统计失败: %s", e)
+
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+def start_rollup_flusher():
+    """启动访问统计定期写库"""
+    global _flush_task
+    interval = settings.ACCESS_ROLLUP_FLUSH_SECONDS
+    if interval <= 0 or (_flush_task and not _flush_task.done()):
+        return
+    _flush_task = asyncio.create_task(_flush_loop(interval))
+
+
+async def stop_rollup_flusher():
+    """停止定期写库并写入剩余的统计"""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    try:
+        await flush_rollups()
+    except Exception as e:
+        logger.error("写入剩余访问统计失败: %s", e)
+    if aggregator.dropped:
+        logger.warning("访问统计桶数超过上限，丢弃了 %s 条记录", aggregator.dropped)
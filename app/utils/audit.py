@@ -1,6 +1,10 @@
-from datetime import datetime
-from fastapi import Request
-from sqlalchemy import select
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+import pytz
+from fastapi import HTTPException, Request
+from sqlalchemy import select, tuple_
+from sqlalchemy.sql import Select
+from app.core.config import settings
 from app.models.public import AuditLog
 from app.db.session import AsyncSessionLocal
 from app.core.log import get_logger
@@ -35,4 +39,102 @@ async def log_audit(
     except Exception as e:
         logger.error(f"记录审计日志失败: {str(e)}")
         # 审计日志记录失败不应该影响主业务流程
-        pass 
\ No newline at end of file
+        pass 
+
+
+# 日志时间筛选支持的格式，其余按 ISO 8601 解析
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+def parse_log_time(value: str, name: str) -> Tuple[datetime, bool]:
+    """
+    把时间筛选参数解析为带时区的时间，未带时区时按系统时区处理
+    返回 (时间, 是否只有日期)，格式错误时返回 400
+    """
+    value = value.strip()
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+            date_only = fmt == "%Y-%m-%d"
+            break
+        except ValueError:
+            continue
+    else:
+        try:
+            parsed = datetime.fromisoformat(value)
+            date_only = False
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{name} 格式错误，应为 YYYY-MM-DD HH:MM:SS 或 ISO 8601"
+            )
+    if parsed.tzinfo is None:
+        parsed = pytz.timezone(settings.TIMEZONE).localize(parsed)
+    return parsed, date_only
+
+def parse_time_range(start_time: Optional[str], end_time: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    解析时间筛选参数，返回半开区间 [start, end)
+    结束时间只有日期时包含当天全部日志，否则包含该时刻（数据库时间精度为微秒）
+    """
+    start = end = None
+    if start_time:
+        start, _ = parse_log_time(start_time, "start_time")
+    if end_time:
+        end, date_only = parse_log_time(end_time, "end_time")
+        end += timedelta(days=1) if date_only else timedelta(microseconds=1)
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=400,
+            detail="开始时间不能晚于结束时间"
+        )
+    return start, end
+
+def audit_log_query(
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None
+) -> Select:
+    """
+    审计日志筛选条件
+    时间参数转换为 timestamptz 后比较，才能裁剪分区并使用 created_at 相关索引
+    """
+    query = select(AuditLog)
+    if user_id:
+        query = query.where(AuditLog.user_id == user_id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    start, end = parse_time_range(start_time, end_time)
+    if start:
+        query = query.where(AuditLog.created_at >= start)
+    if end:
+        query = query.where(AuditLog.created_at < end)
+    return query
+
+
+# 导出的列，(created_at, id) 同时作为续传位置
+EXPORT_COLUMNS = ["id", "created_at", "user_id", "action", "resource_type", "resource_id", "details", "ip_address", "user_agent"]
+
+async def stream_audit_logs(
+    query: Select,
+    after: Optional[Tuple[datetime, int]] = None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[List[tuple]]:
+    """
+    按 (created_at, id) 升序分批读取审计日志，每批最多 batch_size 行
+    使用服务端游标，内存占用与总行数无关；after 为上次导出的最后位置，从其后继续
+    自行打开会话，可在请求依赖的会话关闭后（流式响应期间）使用
+    """
+    batch_size = batch_size or settings.AUDIT_EXPORT_BATCH_SIZE
+    query = query.with_only_columns(*(getattr(AuditLog, column) for column in EXPORT_COLUMNS))
+    if after is not None:
+        # 单独的 created_at 条件用于分区裁剪和索引范围扫描
+        query = query.where(
+            AuditLog.created_at >= after[0],
+            tuple_(AuditLog.created_at, AuditLog.id) > tuple_(*after)
+        )
+    query = query.order_by(AuditLog.created_at, AuditLog.id).execution_options(yield_per=batch_size)
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield [tuple(row) for row in rows]
@@ -0,0 +1,152 @@
+"""
+进程内 TTL 缓存与单飞（single-flight）加载
+
+缓存过期或失效后，大量并发请求同时未命中会同时查询数据库（惊群）。get_or_load 对同一个键
+只启动一个加载任务，其余请求等待同一个任务的结果：
+- 加载在独立的任务中执行，发起请求被取消（客户端断开）不会中断加载，其他等待者照常拿到结果
+- 加载失败时异常传给本轮全部等待者，不缓存失败结果，下一次请求重新加载
+- 加载期间缓存被失效时，本轮结果只返回给已在等待的请求，不写入缓存，失效后到达的请求重新加载
+加载函数可能在发起请求结束后才完成，因此应自行打开数据库会话，不使用请求依赖注入的会话。
+只在事件循环线程中使用，计数器不加锁。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.log import get_logger
+from app.core.metrics import register_collector
+
+logger = get_logger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class SingleFlight:
+    """同一个键同时只执行一个加载任务"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, loader: Loader) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(loader())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        # shield：等待者被取消只影响自己，加载任务继续执行
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 读取异常，避免所有等待者都已取消时出现 "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+            logger.error("缓存加载失败: key=%s, 错误: %s", key, task.exception())
+
+    def is_current(self, key: Hashable, task: asyncio.Task) -> bool:
+        """task 是否仍是该键登记的加载任务（未被 forget）"""
+        return self._calls.get(key) is task
+
+    def forget(self, key: Optional[Hashable] = None):
+        """之后到达的请求不再等待进行中的加载（key 为 None 表示全部）"""
+        if key is None:
+            self._calls.clear()
+        else:
+            self._calls.pop(key, None)
+
+
+class TTLCache:
+    """带过期时间和条目上限的进程内缓存，未命中时单飞加载"""
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 键 -> (过期时间, 值)，按写入顺序排列，超出上限时淘汰最早写入的条目
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_loads = 0
+        _caches[name] = self
+
+    async def get_or_load(self, key: Hashable, loader: Loader) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return await self._flight.do(key, lambda: self._load(key, loader))
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        value = await loader()
+        if not self._flight.is_current(key, asyncio.current_task()):
+            # 加载期间发生失效，结果可能已过时
+            self.stale_loads += 1
+            return value
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+            self.evictions += 1
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """失效一个键，key 为 None 时失效全部"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        self._flight.forget(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self._flight.leaders,
+            "coalesced": self._flight.coalesced,
+            "load_errors": self._flight.errors,
+            "in_flight": self._flight.in_flight,
+            "evictions": self.evictions,
+            "stale_loads": self.stale_loads
+        }
+
+
+# 缓存名 -> 缓存，用于统计
+_caches: Dict[str, TTLCache] = {}
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """全部缓存的命中、加载与合并计数"""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def _cache_metrics():
+    stats = cache_stats()
+    for field, metric_type, documentation in (
+        ("entries", "gauge", "缓存条目数"),
+        ("hits", "counter", "缓存命中次数"),
+        ("misses", "counter", "缓存未命中次数"),
+        ("loads", "counter", "实际执行的加载次数"),
+        ("coalesced", "counter", "等待同一加载任务而未重复加载的次数"),
+        ("load_errors", "counter", "加载失败次数"),
+    ):
+        name = f"cache_{field}" if metric_type == "gauge" else f"cache_{field}_total"
+        yield name, metric_type, documentation, ("cache",), [((cache,), values[field]) for cache, values in stats.items()]
+
+
+register_collector(_cache_metrics)
@@ -0,0 +1,291 @@
+"""
+报到签到批量提交（group commit）
+
+报到当天数百个窗口同时扫码签到，每次签到单独提交事务会受限于提交次数。
+这里按租户将并发的签到请求在几毫秒内攒成一批，用一条多行 upsert 写入
+registration_info 并一次提交；每个调用方在其记录提交成功后才得到确认。
+同一事务中先锁定已有记录读出原完成状态，upsert 之后按完成状态的变化增量更新
+registration_progress 汇总。
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import register_collector
+from app.db.session import get_tenant_db
+
+logger = get_logger(__name__)
+
+# 锁定本批次已有的记录并读出原完成状态；必须在 upsert 之前单独执行，
+# 同一语句中 upsert 已修改的行会被 FOR UPDATE 跳过
+LOCK_SQL = text("""
+    SELECT r.student_id, r.process_id, r.status
+    FROM registration_info r
+    JOIN unnest(
+        CAST(:student_ids AS VARCHAR[]),
+        CAST(:process_ids AS INTEGER[])
+    ) AS i(student_id, process_id) ON i.student_id = r.student_id AND i.process_id = r.process_id
+    ORDER BY r.student_id, r.process_id
+    FOR UPDATE OF r
+""")
+
+UPSERT_SQL = text("""
+    WITH input AS (
+        SELECT * FROM unnest(
+            CAST(:student_ids AS VARCHAR[]),
+            CAST(:process_ids AS INTEGER[]),
+            CAST(:statuses AS BOOLEAN[]),
+            CAST(:completed_ats AS TIMESTAMPTZ[]),
+            CAST(:operator_ids AS INTEGER[]),
+            CAST(:remarks AS TEXT[])
+        ) AS t(student_id, process_id, status, completed_at, operator_id, remarks)
+    )
+    INSERT INTO registration_info (student_id, process_id, status, completed_at, operator_id, remarks)
+    SELECT student_id, process_id, status, completed_at, operator_id, remarks FROM input
+    ON CONFLICT (student_id, process_id) DO UPDATE
+    SET status = EXCLUDED.status,
+        completed_at = EXCLUDED.completed_at,
+        operator_id = EXCLUDED.operator_id,
+        remarks = COALESCE(EXCLUDED.remarks, registration_info.remarks),
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING id, student_id, process_id, (xmax = 0) AS inserted
+""")
+
+# 按 (学号, 环节) 的完成状态变化（+1/-1）增量更新院系汇总
+PROGRESS_DELTA_SQL = text("""
+    WITH delta AS (
+        SELECT COALESCE(s.department_id, 0) AS department_id, d.process_id, sum(d.diff) AS diff
+        FROM unnest(
+            CAST(:student_ids AS VARCHAR[]),
+            CAST(:process_ids AS INTEGER[]),
+            CAST(:diffs AS INTEGER[])
+        ) AS d(student_id, process_id, diff)
+        JOIN students s ON s.student_id = d.student_id AND s.status = TRUE
+        GROUP BY 1, 2
+    )
+    INSERT INTO registration_progress (department_id, process_id, completed_count)
+    SELECT department_id, process_id, diff FROM delta WHERE diff <> 0
+    ON CONFLICT (department_id, process_id) DO UPDATE
+    SET completed_count = registration_progress.completed_count + EXCLUDED.completed_count,
+        updated_at = CURRENT_TIMESTAMP
+""")
+
+
+def progress_deltas(items: List["CheckinItem"], previous: Dict[Tuple[str, int], bool],
+                    inserted: Dict[Tuple[str, int], bool]) -> Dict[Tuple[str, int], int]:
+    """
+    计算每条签到对已完成人数的影响
+    :param previous: upsert 之前锁定读出的原完成状态
+    :param inserted: upsert 返回的每条记录是否为新插入
+    """
+    deltas = {}
+    for item in items:
+        key = (item.student_id, item.process_id)
+        if key in previous:
+            old = previous[key]
+        elif inserted.get(key, True):
+            old = False
+        else:
+            # 锁定之后由其他进程并发插入，原状态未知，留给定期重算修正
+            logger.debug("签到记录被并发插入，跳过进度增量: %s", key)
+            continue
+        diff = int(bool(item.status)) - int(bool(old))
+        if diff:
+            deltas[key] = diff
+    return deltas
+
+
+@dataclass
+class CheckinItem:
+    """一次签到"""
+    student_id: str
+    process_id: int
+    status: bool = True
+    operator_id: Optional[int] = None
+    remarks: Optional[str] = None
+    completed_at: Optional[datetime] = None
+
+
+@dataclass
+class CheckinAck:
+    """签到确认（记录已提交）"""
+    id: int
+    student_id: str
+    process_id: int
+    status: bool
+    completed_at: Optional[datetime]
+
+
+_STOP = object()
+
+
+class CheckinBatcher:
+    """单个租户的签到批量提交器"""
+
+    def __init__(self, tenant_id: int, max_batch: int, max_delay: float):
+        self.tenant_id = tenant_id
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """等待提交的签到数"""
+        return self._queue.qsize()
+
+    async def submit(self, item: CheckinItem) -> CheckinAck:
+        """提交一次签到，等待所在批次提交后返回"""
+        if item.completed_at is None and item.status:
+            item.completed_at = datetime.now(pytz.timezone(settings.TIMEZONE))
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await future
+
+    async def close(self):
+        """提交剩余签到并停止"""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(_STOP)
+        await self._task
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            # 等待几毫秒，让并发到达的签到进入同一批次
+            if self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.max_delay)
+            batch = [first]
+            stop = False
+            while len(batch) < self.max_batch and not self._queue.empty():
+                entry = self._queue.get_nowait()
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def _write(self, items: List[CheckinItem]) -> Dict[Tuple[str, int], int]:
+        """在一个事务中写入签到并更新进度汇总，返回 (学号, 环节) -> 记录ID"""
+        keys = {
+            "student_ids": [i.student_id for i in items],
+            "process_ids": [i.process_id for i in items],
+        }
+        async for session in get_tenant_db(self.tenant_id):
+            locked = await session.execute(LOCK_SQL, keys)
+            previous = {(row[0], row[1]): row[2] for row in locked.all()}
+            result = await session.execute(UPSERT_SQL, {
+                **keys,
+                "statuses": [i.status for i in items],
+                "completed_ats": [i.completed_at for i in items],
+                "operator_ids": [i.operator_id for i in items],
+                "remarks": [i.remarks for i in items],
+            })
+            rows = result.all()
+            deltas = progress_deltas(items, previous, {(row[1], row[2]): row[3] for row in rows})
+            if deltas:
+                await session.execute(PROGRESS_DELTA_SQL, {
+                    "student_ids": [key[0] for key in deltas],
+                    "process_ids": [key[1] for key in deltas],
+                    "diffs": list(deltas.values()),
+                })
+            await session.commit()
+            return {(row[1], row[2]): row[0] for row in rows}
+
+    async def _flush(self, batch: List[Tuple[CheckinItem, asyncio.Future]]):
+        # 同一批次内同一 (学号, 环节) 只能写一次，以最后一次为准
+        latest: Dict[Tuple[str, int], CheckinItem] = {}
+        for item, _ in batch:
+            latest[(item.student_id, item.process_id)] = item
+        # 按 (学号, 环节) 顺序加锁，避免多个工作进程的批次互相死锁
+        items = sorted(latest.values(), key=lambda i: (i.student_id, i.process_id))
+
+        ids: Dict[Tuple[str, int], int] = {}
+        errors: Dict[Tuple[str, int], Exception] = {}
+        try:
+            ids = await self._write(items)
+        except Exception as e:
+            if len(items) == 1:
+                errors[(items[0].student_id, items[0].process_id)] = e
+            else:
+                # 整批失败时逐条重试，只让出错的签到失败，不影响同一批次的其他窗口
+                logger.warning("签到批量提交失败，逐条重试: tenant=%s, size=%s, 错误: %s", self.tenant_id, len(items), e)
+                for item in items:
+                    key = (item.student_id, item.process_id)
+                    try:
+                        ids.update(await self._write([item]))
+                    except Exception as item_error:
+                        errors[key] = item_error
+        for key, error in errors.items():
+            logger.error("签到提交失败: tenant=%s, student=%s, process=%s, 错误: %s",
+                         self.tenant_id, key[0], key[1], error)
+
+        logger.debug("签到批量提交完成: tenant=%s, size=%s, rows=%s, failed=%s",
+                     self.tenant_id, len(batch), len(items), len(errors))
+        for item, future in batch:
+            if future.done():
+                continue
+            key = (item.student_id, item.process_id)
+            if key in errors:
+                future.set_exception(errors[key])
+                continue
+            final = latest[key]
+            future.set_result(CheckinAck(
+                id=ids[key],
+                student_id=final.student_id,
+                process_id=final.process_id,
+                status=final.status,
+                completed_at=final.completed_at
+            ))
+
+
+_batchers: Dict[int, CheckinBatcher] = {}
+
+
+def get_checkin_batcher(tenant_id: int) -> CheckinBatcher:
+    """获取租户的签到批量提交器"""
+    batcher = _batchers.get(tenant_id)
+    if batcher is None:
+        batcher = CheckinBatcher(
+            tenant_id,
+            max_batch=settings.CHECKIN_BATCH_MAX_SIZE,
+            max_delay=settings.CHECKIN_BATCH_MAX_DELAY_MS / 1000
+        )
+        _batchers[tenant_id] = batcher
+    return batcher
+
+
+def checkin_queue_depths() -> Dict[int, int]:
+    """各租户等待提交的签到数"""
+    return {tenant_id: batcher.pending for tenant_id, batcher in _batchers.items()}
+
+
+def _queue_metrics():
+    yield ("checkin_queue_depth", "gauge", "各租户等待批量提交的签到数", ("tenant_id",),
+           [((tenant_id,), depth) for tenant_id, depth in checkin_queue_depths().items()])
+
+
+register_collector(_queue_metrics)
+
+
+async def shutdown_checkin_batchers():
+    """关闭所有签到批量提交器，提交剩余签到"""
+    for batcher in list(_batchers.values()):
+        try:
+            await batcher.close()
+        except Exception as e:
+            logger.error("关闭签到批量提交器失败: tenant=%s, 错误: %s", batcher.tenant_id, e)
+    _batchers.clear()
@@ -0,0 +1,177 @@
+"""
+宿舍批量分配引擎
+
+在内存中用 NumPy 数组一次性计算整批学生的宿舍分配结果，
+不做逐个学生的查询；结果由调用方通过一条集合化 UPDATE 写回。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 房间分组标记
+ROOM_EMPTY = -1   # 空房间，可分配给任意分组
+ROOM_MIXED = -2   # 已有住户且不满足同寝策略，不再分配
+
+
+@dataclass
+class AllocationPolicy:
+    """分配策略"""
+    same_gender: bool = True
+    same_department: bool = False
+    # 楼栋填充顺序；为空时按楼栋名称排序使用全部楼栋
+    buildings: Optional[List[str]] = None
+
+
+@dataclass
+class AllocationResult:
+    """分配结果"""
+    id_cards: np.ndarray
+    dormitory_ids: np.ndarray
+    unassigned: np.ndarray
+    rooms_used: np.ndarray
+    # 每个分组（性别/院系）未能分配的人数
+    shortages: List[Dict] = field(default_factory=list)
+
+    @property
+    def assigned_count(self) -> int:
+        return int(self.id_cards.size)
+
+
+def _encode(values: Sequence, vocabulary: np.ndarray) -> np.ndarray:
+    """将取值映射为词表中的整数编码"""
+    return np.searchsorted(vocabulary, np.asarray(values, dtype=object).astype(str))
+
+
+def _group_keys(
+    policy: AllocationPolicy,
+    genders: np.ndarray,
+    departments: np.ndarray,
+    gender_vocab: np.ndarray,
+    dept_vocab: np.ndarray,
+) -> np.ndarray:
+    """根据策略计算分组键：性别编码 * 院系数 + 院系编码"""
+    keys = np.zeros(len(genders), dtype=np.int64)
+    if policy.same_gender:
+        keys += _encode(genders, gender_vocab) * len(dept_vocab)
+    if policy.same_department:
+        keys += _encode(departments, dept_vocab)
+    return keys
+
+
+def _room_order(policy: AllocationPolicy, buildings: np.ndarray, room_numbers: np.ndarray) -> np.ndarray:
+    """按楼栋填充顺序和房间号计算房间的排列顺序，返回房间下标"""
+    if policy.buildings:
+        rank_map = {name: rank for rank, name in enumerate(policy.buildings)}
+        building_rank = np.array([rank_map.get(b, -1) for b in buildings], dtype=np.int64)
+        selected = np.flatnonzero(building_rank >= 0)
+    else:
+        building_rank = np.unique(buildings.astype(str), return_inverse=True)[1]
+        selected = np.arange(len(buildings))
+    # lexsort 以最后一个键为主键
+    order = np.lexsort((room_numbers[selected].astype(str), building_rank[selected]))
+    return selected[order]
+
+
+def compute_allocation(
+    policy: AllocationPolicy,
+    student_id_cards: np.ndarray,
+    student_genders: np.ndarray,
+    student_departments: np.ndarray,
+    room_ids: np.ndarray,
+    room_buildings: np.ndarray,
+    room_numbers: np.ndarray,
+    room_capacities: np.ndarray,
+    room_counts: np.ndarray,
+    occupant_room_ids: np.ndarray,
+    occupant_genders: np.ndarray,
+    occupant_departments: np.ndarray,
+) -> AllocationResult:
+    """
+    计算宿舍分配
+
+    :param student_*: 待分配学生（按输入顺序分配）
+    :param room_*: 可用房间
+    :param occupant_*: 已入住学生（每行一名学生），用于判断房间已有住户的分组
+    :return: 分配结果
+    """
+    n_rooms = len(room_ids)
+    gender_vocab = np.unique(
+        np.concatenate([student_genders, occupant_genders]).astype(object).astype(str)
+    )
+    dept_vocab = np.unique(
+        np.concatenate([student_departments, occupant_departments]).astype(object).astype(str)
+    )
+
+    student_keys = _group_keys(policy, student_genders, student_departments, gender_vocab, dept_vocab)
+
+    # 房间剩余床位
+    free = np.clip(room_capacities - room_counts, 0, None).astype(np.int64)
+
+    # 房间已有住户的分组：单一分组取该分组，多分组视为混住
+    room_keys = np.full(n_rooms, ROOM_EMPTY, dtype=np.int64)
+    if len(occupant_room_ids) and n_rooms:
+        occupant_keys = _group_keys(policy, occupant_genders, occupant_departments, gender_vocab, dept_vocab)
+        sorter = np.argsort(room_ids)
+        positions = np.searchsorted(room_ids, occupant_room_ids, sorter=sorter)
+        positions = np.clip(positions, 0, n_rooms - 1)
+        known = room_ids[sorter][positions] == occupant_room_ids
+        occ_rooms = sorter[positions[known]]
+        occ_keys = occupant_keys[known]
+        if occ_rooms.size:
+            key_min = np.full(n_rooms, np.iinfo(np.int64).max, dtype=np.int64)
+            key_max = np.full(n_rooms, np.iinfo(np.int64).min, dtype=np.int64)
+            np.minimum.at(key_min, occ_rooms, occ_keys)
+            np.maximum.at(key_max, occ_rooms, occ_keys)
+            occupied = np.zeros(n_rooms, dtype=bool)
+            occupied[occ_rooms] = True
+            room_keys[occupied] = np.where(
+                key_min[occupied] == key_max[occupied], key_min[occupied], ROOM_MIXED
+            )
+
+    ordered_rooms = _room_order(policy, room_buildings, room_numbers)
+
+    assigned_students: List[np.ndarray] = []
+    assigned_rooms: List[np.ndarray] = []
+    unassigned: List[np.ndarray] = []
+    shortages: List[Dict] = []
+
+    # 按分组循环（分组数量很少），组内全部为数组运算
+    for key in np.unique(student_keys):
+        members = np.flatnonzero(student_keys == key)
+        ordered_keys = room_keys[ordered_rooms]
+        ordered_free = free[ordered_rooms]
+        # 先填满同分组的未满房间，再使用空房间
+        partial = ordered_rooms[(ordered_keys == key) & (ordered_free > 0)]
+        empty = ordered_rooms[(ordered_keys == ROOM_EMPTY) & (ordered_free > 0)]
+        candidates = np.concatenate([partial, empty])
+
+        slots = np.repeat(candidates, free[candidates])
+        taken = slots[:len(members)]
+        if taken.size:
+            assigned_students.append(members[:taken.size])
+            assigned_rooms.append(taken)
+            free -= np.bincount(taken, minlength=n_rooms)
+            room_keys[np.unique(taken)] = key
+        if taken.size < len(members):
+            rest = members[taken.size:]
+            unassigned.append(rest)
+            first = rest[0]
+            shortages.append({
+                "gender": student_genders[first] if policy.same_gender else None,
+                "department_id": student_departments[first] if policy.same_department else None,
+                "count": int(rest.size),
+            })
+
+    student_idx = np.concatenate(assigned_students) if assigned_students else np.zeros(0, dtype=np.int64)
+    room_idx = np.concatenate(assigned_rooms) if assigned_rooms else np.zeros(0, dtype=np.int64)
+    unassigned_idx = np.concatenate(unassigned) if unassigned else np.zeros(0, dtype=np.int64)
+
+    return AllocationResult(
+        id_cards=student_id_cards[student_idx],
+        dormitory_ids=room_ids[room_idx],
+        unassigned=student_id_cards[unassigned_idx],
+        rooms_used=np.unique(room_ids[room_idx]),
+        shortages=shortages,
+    )
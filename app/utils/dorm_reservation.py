@@ -0,0 +1,138 @@
+"""
+宿舍选床
+
+学生自助选床时大量请求集中在开放的第一分钟，读-判断-写的方式会在热点房间行上
+排队甚至超员。这里把"锁定学生、占用床位、写回学生宿舍"合并为一条语句：
+- 指定房间时使用带条件的原子 UPDATE（current_count < capacity）
+- 不指定房间时使用 FOR UPDATE SKIP LOCKED 跳过正被其他请求占用的房间
+同一学生重复提交时返回已有结果，保证幂等。
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 锁定尚未分配宿舍的学生行，同一学生的并发请求在此串行
+_STUDENT_CTE = """
+    student AS (
+        SELECT id_card FROM students
+        WHERE student_id = :student_id
+          AND dormitory_id IS NULL
+          AND status = TRUE
+        FOR UPDATE
+    )
+"""
+
+_ASSIGN_STUDENT = """
+    UPDATE students AS s
+    SET dormitory_id = bed.id,
+        updated_at = CURRENT_TIMESTAMP
+    FROM bed, student
+    WHERE s.id_card = student.id_card
+    RETURNING bed.id, bed.building, bed.room_number
+"""
+
+RESERVE_ROOM_SQL = text(f"""
+    WITH {_STUDENT_CTE},
+    bed AS (
+        UPDATE dormitories
+        SET current_count = COALESCE(current_count, 0) + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = :dormitory_id
+          AND status = TRUE
+          AND COALESCE(current_count, 0) < capacity
+          AND EXISTS (SELECT 1 FROM student)
+        RETURNING id, building, room_number
+    )
+    {_ASSIGN_STUDENT}
+""")
+
+RESERVE_ANY_SQL = text(f"""
+    WITH {_STUDENT_CTE},
+    room AS (
+        SELECT id FROM dormitories
+        WHERE status = TRUE
+          AND COALESCE(current_count, 0) < capacity
+          AND (CAST(:building AS VARCHAR) IS NULL OR building = :building)
+          AND EXISTS (SELECT 1 FROM student)
+        ORDER BY building, room_number
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    ),
+    bed AS (
+        UPDATE dormitories AS d
+        SET current_count = COALESCE(d.current_count, 0) + 1,
+            updated_at = CURRENT_TIMESTAMP
+        FROM room
+        WHERE d.id = room.id
+        RETURNING d.id, d.building, d.room_number
+    )
+    {_ASSIGN_STUDENT}
+""")
+
+STUDENT_ROOM_SQL = text("""
+    SELECT s.dormitory_id, d.building, d.room_number, s.status
+    FROM students s
+    LEFT JOIN dormitories d ON d.id = s.dormitory_id
+    WHERE s.student_id = :student_id
+""")
+
+
+class ReservationError(Exception):
+    """选床失败"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class ReservationResult:
+    dormitory_id: int
+    building: str
+    room_number: str
+    # 学生此前已选过该床位（重复提交）
+    already_reserved: bool = False
+
+
+async def reserve_bed(
+    db: AsyncSession,
+    student_id: str,
+    dormitory_id: Optional[int] = None,
+    building: Optional[str] = None,
+) -> ReservationResult:
+    """
+    为学生占用一个床位并提交事务
+    :param student_id: 学号
+    :param dormitory_id: 指定房间；为空时在 building（可选）中任选一间有空床的房间
+    :raises ReservationError: 学生不存在、已选其他房间或没有空余床位
+    """
+    if dormitory_id is not None:
+        result = await db.execute(RESERVE_ROOM_SQL, {"student_id": student_id, "dormitory_id": dormitory_id})
+    else:
+        result = await db.execute(RESERVE_ANY_SQL, {"student_id": student_id, "building": building})
+    row = result.first()
+    await db.commit()
+    if row:
+        return ReservationResult(dormitory_id=row[0], building=row[1], room_number=row[2])
+
+    # 未占到床位：区分学生不存在、重复提交和房间已满
+    current = (await db.execute(STUDENT_ROOM_SQL, {"student_id": student_id})).first()
+    if current is None:
+        raise ReservationError(404, "学生不存在")
+    if not current[3]:
+        raise ReservationError(400, "学生状态无效")
+    if current[0] is not None:
+        if dormitory_id is None or current[0] == dormitory_id:
+            return ReservationResult(
+                dormitory_id=current[0],
+                building=current[1],
+                room_number=current[2],
+                already_reserved=True
+            )
+        raise ReservationError(409, "该学生已选择其他宿舍")
+    if dormitory_id is not None:
+        raise ReservationError(409, "该房间已满或不可用")
+    raise ReservationError(409, "没有空余床位")
@@ -0,0 +1,97 @@
+"""
+学生扩展字段模型缓存
+
+students.ext_field1..10 的含义由各租户的 field_mappings 定义。这里按租户把映射
+编译为 pydantic 模型和 TypeAdapter 并缓存在进程内，导入时用编译好的模型校验、导出时用
+不做校验的输出模型序列化（扩展字段使用显示名），无需每次请求查询映射再手工转换字典。
+必填和长度限制只在导入时检查：映射改为必填之前已导入的学生该字段可能为空，导出时原样输出。
+映射变更时发布 field_mapping 失效事件（键为租户ID），各进程调用 invalidate_student_model 使缓存失效。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type
+
+from pydantic import Field, TypeAdapter, create_model
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.log import get_logger
+from app.utils.invalidation import subscribe
+from app.schemas.student import StudentExportRecord, StudentRecord
+
+logger = get_logger(__name__)
+
+EXT_FIELDS = [f"ext_field{i}" for i in range(1, 11)]
+
+MAPPING_SQL = text("""
+    SELECT field_name, display_name, is_required
+    FROM field_mappings
+    WHERE status = TRUE
+    ORDER BY "order", id
+""")
+
+
+@dataclass
+class CompiledStudentModel:
+    """租户编译后的学生模型"""
+    model: Type[StudentRecord]
+    list_adapter: TypeAdapter
+    # 导出用：全部字段可为空、不限长度
+    export_adapter: TypeAdapter
+    # 扩展字段名 -> 显示名
+    display_names: Dict[str, str]
+    required_fields: List[str]
+
+
+_cache: Dict[int, CompiledStudentModel] = {}
+
+
+def build_student_model(tenant_id: int, mappings) -> CompiledStudentModel:
+    """根据字段映射编译学生模型：已映射的扩展字段以显示名为别名，未映射的扩展字段不输出"""
+    fields = {name: (Optional[str], Field(None, exclude=True)) for name in EXT_FIELDS}
+    export_fields = dict(fields)
+    display_names = {}
+    required_fields = []
+    for field_name, display_name, is_required in mappings:
+        if field_name not in EXT_FIELDS:
+            logger.warning("忽略无效的字段映射: tenant=%s, field_name=%s", tenant_id, field_name)
+            continue
+        if is_required:
+            fields[field_name] = (str, Field(..., alias=display_name, max_length=200))
+            required_fields.append(field_name)
+        else:
+            fields[field_name] = (Optional[str], Field(None, alias=display_name, max_length=200))
+        export_fields[field_name] = (Optional[str], Field(None, alias=display_name))
+        display_names[field_name] = display_name
+
+    model = create_model(f"TenantStudent{tenant_id}", __base__=StudentRecord, **fields)
+    export_model = create_model(f"TenantStudentExport{tenant_id}", __base__=StudentExportRecord, **export_fields)
+    return CompiledStudentModel(
+        model=model,
+        list_adapter=TypeAdapter(List[model]),
+        export_adapter=TypeAdapter(List[export_model]),
+        display_names=display_names,
+        required_fields=required_fields
+    )
+
+
+async def get_student_model(db: AsyncSession, tenant_id: int) -> CompiledStudentModel:
+    """获取租户的学生模型，未缓存时从 field_mappings 编译"""
+    compiled = _cache.get(tenant_id)
+    if compiled is None:
+        mappings = (await db.execute(MAPPING_SQL)).all()
+        compiled = build_student_model(tenant_id, mappings)
+        _cache[tenant_id] = compiled
+        logger.debug("学生模型已编译: tenant=%s, 扩展字段 %s 个", tenant_id, len(compiled.display_names))
+    return compiled
+
+
+def invalidate_student_model(tenant_id: Optional[int] = None):
+    """使租户的学生模型缓存失效，tenant_id 为空时清空全部"""
+    if tenant_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(tenant_id, None)
+
+
+subscribe("field_mapping", invalidate_student_model)
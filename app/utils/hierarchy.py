@@ -0,0 +1,163 @@
+"""
+树形结构闭包表
+
+departments（租户 schema）和 menus（public）以 parent_id 邻接表保存层级，
+对应的闭包表 <table>_closure 保存每一对 (祖先, 后代) 及其距离（节点自身距离为0）：
+- 插入节点、修改 parent_id 时由触发器维护，移动到自身或后代之下时触发器报错
+- 删除节点时由外键级联删除相关行（删除前需保证没有下级节点）
+子树、祖先、深度以及"是否属于某个子树"的判断都是闭包表上的索引查找，不需要递归。
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class Hierarchy:
+    """一张邻接表及其闭包表"""
+
+    def __init__(self, table: str, closure: str):
+        self.table = table
+        self.closure = closure
+
+    def ddl(self, schema: str) -> List[str]:
+        """创建闭包表、维护函数和触发器的语句（可重复执行）"""
+        table, closure = self.table, self.closure
+        return [
+            f"""
+            CREATE TABLE IF NOT EXISTS {schema}.{closure} (
+                ancestor_id INTEGER NOT NULL REFERENCES {schema}.{table}(id) ON DELETE CASCADE,
+                descendant_id INTEGER NOT NULL REFERENCES {schema}.{table}(id) ON DELETE CASCADE,
+                depth INTEGER NOT NULL,
+                PRIMARY KEY (ancestor_id, descendant_id)
+            )
+            """,
+            f"CREATE INDEX IF NOT EXISTS ix_{closure}_descendant ON {schema}.{closure} (descendant_id, depth)",
+            # 函数固定 search_path，不依赖调用方会话的 search_path
+            f"""
+            CREATE OR REPLACE FUNCTION {schema}.{closure}_maintain() RETURNS trigger
+            LANGUAGE plpgsql SET search_path = {schema} AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+                    SELECT ancestor_id, NEW.id, depth + 1 FROM {closure} WHERE descendant_id = NEW.parent_id
+                    UNION ALL
+                    SELECT NEW.id, NEW.id, 0;
+                    RETURN NEW;
+                END IF;
+
+                IF EXISTS (
+                    SELECT 1 FROM {closure} WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+                ) THEN
+                    RAISE EXCEPTION '{table}: 不能将节点 % 移动到其自身或下级节点之下', NEW.id
+                        USING ERRCODE = 'check_violation';
+                END IF;
+
+                -- 断开子树与原祖先的关联，再挂到新父节点的祖先链下
+                DELETE FROM {closure} c
+                USING {closure} sub
+                WHERE sub.ancestor_id = NEW.id
+                  AND c.descendant_id = sub.descendant_id
+                  AND c.ancestor_id NOT IN (SELECT descendant_id FROM {closure} WHERE ancestor_id = NEW.id);
+
+                INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+                SELECT sup.ancestor_id, sub.descendant_id, sup.depth + sub.depth + 1
+                FROM {closure} sup
+                JOIN {closure} sub ON sub.ancestor_id = NEW.id
+                WHERE sup.descendant_id = NEW.parent_id;
+                RETURN NEW;
+            END
+            $$
+            """,
+            f"DROP TRIGGER IF EXISTS {closure}_insert ON {schema}.{table}",
+            f"""
+            CREATE TRIGGER {closure}_insert AFTER INSERT ON {schema}.{table}
+            FOR EACH ROW EXECUTE FUNCTION {schema}.{closure}_maintain()
+            """,
+            f"DROP TRIGGER IF EXISTS {closure}_update ON {schema}.{table}",
+            f"""
+            CREATE TRIGGER {closure}_update AFTER UPDATE OF parent_id ON {schema}.{table}
+            FOR EACH ROW WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+            EXECUTE FUNCTION {schema}.{closure}_maintain()
+            """,
+        ]
+
+    def drop_ddl(self, schema: str) -> List[str]:
+        """删除闭包表、维护函数和触发器的语句"""
+        return [
+            f"DROP TRIGGER IF EXISTS {self.closure}_update ON {schema}.{self.table}",
+            f"DROP TRIGGER IF EXISTS {self.closure}_insert ON {schema}.{self.table}",
+            f"DROP FUNCTION IF EXISTS {schema}.{self.closure}_maintain()",
+            f"DROP TABLE IF EXISTS {schema}.{self.closure}",
+        ]
+
+    def rebuild_sql(self, schema: str) -> List[str]:
+        """按 parent_id 全量重建闭包表的语句（已有数据中的环按64层截断）"""
+        table, closure = self.table, self.closure
+        return [
+            f"DELETE FROM {schema}.{closure}",
+            f"""
+            INSERT INTO {schema}.{closure} (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE t(ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM {schema}.{table}
+                UNION ALL
+                SELECT t.ancestor_id, c.id, t.depth + 1
+                FROM t
+                JOIN {schema}.{table} c ON c.parent_id = t.descendant_id
+                WHERE t.depth < 64
+            )
+            SELECT ancestor_id, descendant_id, min(depth) FROM t GROUP BY ancestor_id, descendant_id
+            """,
+        ]
+
+    async def subtree(self, db: AsyncSession, node_id: int, max_depth: Optional[int] = None,
+                      where: str = "TRUE") -> list:
+        """节点及其全部下级，按距离排序；每行附带相对深度 depth"""
+        result = await db.execute(
+            text(f"""
+                SELECT n.*, c.depth
+                FROM {self.closure} c
+                JOIN {self.table} n ON n.id = c.descendant_id
+                WHERE c.ancestor_id = :node_id
+                  AND (CAST(:max_depth AS INTEGER) IS NULL OR c.depth <= :max_depth)
+                  AND {where}
+                ORDER BY c.depth, n."order", n.id
+            """),
+            {"node_id": node_id, "max_depth": max_depth}
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def ancestors(self, db: AsyncSession, node_id: int) -> list:
+        """节点的祖先链（含自身），从根节点开始；每行附带到该节点的距离 distance"""
+        result = await db.execute(
+            text(f"""
+                SELECT n.*, c.depth AS distance
+                FROM {self.closure} c
+                JOIN {self.table} n ON n.id = c.ancestor_id
+                WHERE c.descendant_id = :node_id
+                ORDER BY c.depth DESC
+            """),
+            {"node_id": node_id}
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def subtree_ids(self, db: AsyncSession, node_id: int) -> List[int]:
+        """节点及其全部下级的ID，用于按院系统计或权限范围过滤"""
+        result = await db.execute(
+            text(f"SELECT descendant_id FROM {self.closure} WHERE ancestor_id = :node_id"),
+            {"node_id": node_id}
+        )
+        return result.scalars().all()
+
+    async def contains(self, db: AsyncSession, ancestor_id: int, node_id: int) -> bool:
+        """node_id 是否为 ancestor_id 自身或其下级"""
+        found = await db.scalar(
+            text(f"SELECT 1 FROM {self.closure} WHERE ancestor_id = :ancestor_id AND descendant_id = :node_id"),
+            {"ancestor_id": ancestor_id, "node_id": node_id}
+        )
+        return found is not None
+
+
+DEPARTMENT_HIERARCHY = Hierarchy("departments", "department_closure")
+MENU_HIERARCHY = Hierarchy("menus", "menu_closure")
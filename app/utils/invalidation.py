@@ -0,0 +1,161 @@
+"""
+跨进程缓存失效总线
+
+进程内缓存（租户目录、学生字段模型、用户菜单等）在多个工作进程或多台机器上运行时，
+只有执行写操作的进程知道数据已变化。写接口提交后调用 publish 发布失效事件：
+- 本进程立即执行对应的失效处理
+- 通过 PostgreSQL NOTIFY 广播给其他进程，消息为紧凑 JSON：{"s": 范围, "k": 键, "o": 来源进程}
+每个进程保持一条独立的 LISTEN 连接（不占用连接池），收到其他进程的事件后执行失效处理。
+LISTEN 连接断开期间的通知会丢失，因此重新连接成功后对所有范围执行一次全量失效。
+
+订阅方式：subscribe(范围, 处理函数)，处理函数接收键，键为 None 时表示失效该范围的全部缓存。
+"""
+
+import asyncio
+import json
+import os
+import socket
+from typing import Callable, Dict, List, Optional, Union
+
+import asyncpg
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger(__name__)
+
+Key = Optional[Union[int, str]]
+Handler = Callable[[Key], None]
+
+_subscribers: Dict[str, List[Handler]] = {}
+
+
+def _origin() -> str:
+    # 每次计算，预派生的工作进程 fork 后 pid 不同
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def subscribe(scope: str, handler: Handler):
+    """订阅某个范围的失效事件"""
+    _subscribers.setdefault(scope, []).append(handler)
+
+
+def _dispatch(scope: str, key: Key):
+    for handler in _subscribers.get(scope, []):
+        try:
+            handler(key)
+        except Exception as e:
+            logger.error("缓存失效处理失败: scope=%s, key=%s, 错误: %s", scope, key, e)
+
+
+def flush_all(reason: str):
+    """对所有范围执行全量失效"""
+    logger.warning("全量失效进程内缓存: %s", reason)
+    for scope in list(_subscribers):
+        _dispatch(scope, None)
+
+
+async def publish(scope: str, key: Key = None):
+    """
+    发布失效事件，应在写操作提交之后调用
+    广播失败只记录日志，不影响已完成的写操作
+    """
+    _dispatch(scope, key)
+    payload = json.dumps({"s": scope, "k": key, "o": _origin()}, separators=(",", ":"), ensure_ascii=False)
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.CACHE_INVALIDATION_CHANNEL, "payload": payload}
+            )
+            await session.commit()
+        logger.debug("已发布缓存失效事件: %s", payload)
+    except Exception as e:
+        logger.error("发布缓存失效事件失败: %s, 错误: %s", payload, e)
+
+
+def _on_notification(connection, pid, channel, payload):
+    try:
+        event = json.loads(payload)
+        scope, key, origin = event["s"], event.get("k"), event.get("o")
+    except (ValueError, KeyError, TypeError):
+        logger.warning("忽略无法解析的缓存失效事件: %s", payload)
+        return
+    if origin == _origin():
+        # 本进程发布时已经处理
+        return
+    logger.debug("收到缓存失效事件: scope=%s, key=%s, 来源 %s", scope, key, origin)
+    _dispatch(scope, key)
+
+
+async def _connect() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        host=settings.POSTGRES_SERVER,
+        port=int(settings.POSTGRES_PORT),
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        database=settings.POSTGRES_DB
+    )
+
+
+async def _listen_loop(healthcheck_interval: float):
+    backoff = 1
+    missed = False
+    while True:
+        connection = None
+        try:
+            connection = await _connect()
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(settings.CACHE_INVALIDATION_CHANNEL, _on_notification)
+            logger.info("缓存失效总线已连接: channel=%s", settings.CACHE_INVALIDATION_CHANNEL)
+            if missed:
+                flush_all("失效总线重新连接，断开期间的通知可能已丢失")
+                missed = False
+            backoff = 1
+            # 定期探测连接，发现断开后重连
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), healthcheck_interval)
+                except asyncio.TimeoutError:
+                    await asyncio.wait_for(connection.fetchval("SELECT 1"), 10)
+            raise ConnectionError("LISTEN 连接已断开")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            missed = True
+            logger.error("缓存失效总线连接异常，%s 秒后重连: %s", backoff, e)
+        finally:
+            if connection is not None and not connection.is_closed():
+                try:
+                    await asyncio.wait_for(connection.close(), 5)
+                except Exception:
+                    connection.terminate()
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+
+_listen_task: Optional[asyncio.Task] = None
+
+
+def start_invalidation_listener():
+    """启动本进程的 LISTEN 连接"""
+    global _listen_task
+    if not settings.CACHE_INVALIDATION_CHANNEL or (_listen_task and not _listen_task.done()):
+        return
+    _listen_task = asyncio.create_task(_listen_loop(settings.CACHE_INVALIDATION_HEALTHCHECK_SECONDS))
+
+
+async def stop_invalidation_listener():
+    """关闭本进程的 LISTEN 连接"""
+    global _listen_task
+    if _listen_task is None:
+        return
+    _listen_task.cancel()
+    try:
+        await _listen_task
+    except asyncio.CancelledError:
+        pass
+    _listen_task = None
@@ -0,0 +1,331 @@
+"""
+日志冷归档
+
+超过 <表>_ARCHIVE_AFTER_MONTHS 个月的日志月分区整体导出为 Parquet 文件（zstd 压缩）后从数据库删除：
+- 每个租户每个月一个文件：{LOG_ARCHIVE_DIR}/{表名}/tenant_{租户ID}/{YYYYMM}.parquet，无租户的日志记为 tenant_0
+- 先写临时文件，行数与分区一致后再改名，随后在分区维护事务内 DETACH 并 DROP 分区
+- 查询时只读取时间范围内、且已无数据库分区的月份；先按文件 footer 中各行组的 min/max 统计跳过不相关文件，
+  再按条件下推读取
+- 超过保留期（与数据库分区相同）的归档文件随分区维护一起删除
+归档目录需对所有工作进程可见，多机部署时应指向共享存储。
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+import pytz
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.session import AsyncSessionLocal
+from app.utils.log_partitions import PARTITION_NAME, add_months, list_partitions, month_start, retention_months
+
+logger = get_logger(__name__)
+
+ARCHIVE_COLUMNS = {
+    "audit_logs": ["id", "user_id", "action", "resource_type", "resource_id", "details",
+                   "ip_address", "user_agent", "created_at", "updated_at"],
+    "access_logs": ["id", "user_id", "path", "method", "status_code", "response_time", "process_time",
+                    "query_count", "db_time", "ip_address", "user_agent", "created_at", "updated_at"],
+}
+
+# 每批从数据库读取并写入 Parquet 的行数（也是 Parquet 行组大小的上限）
+ARCHIVE_BATCH_SIZE = 50000
+
+# 文件 footer 统计缓存：路径 -> (修改时间, 行数, {列名: (最小值, 最大值)})
+_stats_cache: Dict[str, Tuple[float, int, Dict[str, tuple]]] = {}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("日志归档需要安装 pyarrow")
+    return pyarrow
+
+
+def _schema(table: str):
+    pa = _pyarrow()
+    timestamp = pa.timestamp("us", tz="UTC")
+    types = {
+        "id": pa.int64(), "user_id": pa.int64(), "resource_id": pa.int64(), "status_code": pa.int64(),
+        "response_time": pa.int64(), "process_time": pa.int64(), "query_count": pa.int64(), "db_time": pa.int64(),
+        "created_at": timestamp, "updated_at": timestamp,
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in ARCHIVE_COLUMNS[table]])
+
+
+def archive_after_months() -> Dict[str, int]:
+    """各日志表在数据库中保留的月数，之后归档；0 表示不归档"""
+    return {
+        "access_logs": settings.ACCESS_LOG_ARCHIVE_AFTER_MONTHS,
+        "audit_logs": settings.AUDIT_LOG_ARCHIVE_AFTER_MONTHS,
+    }
+
+
+def archive_path(table: str, tenant_id: int, year: int, month: int) -> Path:
+    return Path(settings.LOG_ARCHIVE_DIR) / table / f"tenant_{tenant_id}" / f"{year:04d}{month:02d}.parquet"
+
+
+def archived_files(table: str, tenant_ids: Optional[Set[int]] = None) -> Dict[Tuple[int, int], List[Path]]:
+    """已归档的文件，按 (年, 月) 分组；tenant_ids 不为空时只返回这些租户的文件"""
+    root = Path(settings.LOG_ARCHIVE_DIR) / table
+    files: Dict[Tuple[int, int], List[Path]] = {}
+    if not root.is_dir():
+        return files
+    for tenant_dir in root.iterdir():
+        if not tenant_dir.is_dir() or not tenant_dir.name.startswith("tenant_"):
+            continue
+        if tenant_ids is not None and int(tenant_dir.name[len("tenant_"):]) not in tenant_ids:
+            continue
+        for path in tenant_dir.glob("*.parquet"):
+            if len(path.stem) == 6 and path.stem.isdigit():
+                files.setdefault((int(path.stem[:4]), int(path.stem[4:])), []).append(path)
+    return files
+
+
+def _write_batch(table: str, writers: dict, year: int, month: int, rows: List[tuple]):
+    pa = _pyarrow()
+    schema = _schema(table)
+    frame = pd.DataFrame(rows, columns=ARCHIVE_COLUMNS[table] + ["tenant_id"])
+    frame["tenant_id"] = frame["tenant_id"].fillna(0).astype("int64")
+    for tenant_id, group in frame.groupby("tenant_id"):
+        tenant_id = int(tenant_id)
+        if tenant_id not in writers:
+            path = archive_path(table, tenant_id, year, month)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            writers[tenant_id] = (pa.parquet.ParquetWriter(tmp_path, schema, compression="zstd"), tmp_path, path, [0])
+        writer, _, _, written = writers[tenant_id]
+        writer.write_table(pa.Table.from_pandas(group.drop(columns="tenant_id"), schema=schema, preserve_index=False))
+        written[0] += len(group)
+
+
+def _finish_writers(writers: dict, commit: bool) -> int:
+    written = 0
+    for writer, tmp_path, path, count in writers.values():
+        writer.close()
+        if commit:
+            os.replace(tmp_path, path)
+            _stats_cache.pop(str(path), None)
+            written += count[0]
+        else:
+            tmp_path.unlink(missing_ok=True)
+    return written
+
+
+async def archive_partition(db: AsyncSession, table: str, partition: str, year: int, month: int) -> int:
+    """
+    把一个月分区写入归档文件，然后在 db 的事务内删除该分区（由调用方提交）
+    返回归档的行数；文件行数与分区不一致时不删除分区
+    """
+    columns = ", ".join(f"l.{column}" for column in ARCHIVE_COLUMNS[table])
+    writers: dict = {}
+    try:
+        # 读取使用独立会话，不受维护事务中 DDL 锁的影响
+        async with AsyncSessionLocal() as session:
+            expected = await session.scalar(text(f"SELECT count(*) FROM {partition}"))
+            result = await session.stream(
+                text(f"""
+                    SELECT {columns}, u.tenant_id
+                    FROM {partition} l
+                    LEFT JOIN users u ON u.id = l.user_id
+                    ORDER BY l.created_at, l.id
+                """).execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+            )
+            async for rows in result.partitions():
+                await asyncio.to_thread(_write_batch, table, writers, year, month, [tuple(row) for row in rows])
+        written = sum(count[0] for _, _, _, count in writers.values())
+        if written != expected:
+            raise RuntimeError(f"归档行数不一致: {partition} 分区 {expected} 行, 已写入 {written} 行")
+    except BaseException:
+        await asyncio.to_thread(_finish_writers, writers, False)
+        raise
+    await asyncio.to_thread(_finish_writers, writers, True)
+
+    await db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+    await db.execute(text(f"DROP TABLE {partition}"))
+    logger.info("日志分区已归档: %s, %s 行, %s 个租户文件", partition, written, len(writers))
+    return written
+
+
+async def archive_partitions(db: AsyncSession, now: Optional[datetime] = None) -> List[str]:
+    """归档超过在库月数的分区，返回已归档的分区名（分区删除由调用方提交）"""
+    now = now or datetime.now(pytz.timezone(settings.TIMEZONE))
+    archived = []
+    for table, months in archive_after_months().items():
+        if months <= 0:
+            continue
+        cutoff = add_months(now.year, now.month, -months)
+        for name in await list_partitions(db, table):
+            match = PARTITION_NAME.match(name)
+            if not match or match.group("table") != table:
+                continue
+            year, month = int(match.group("year")), int(match.group("month"))
+            if (year, month) < cutoff:
+                await archive_partition(db, table, name, year, month)
+                archived.append(name)
+    return archived
+
+
+def drop_expired_archives(now: Optional[datetime] = None) -> List[str]:
+    """删除超过保留期的归档文件，返回删除的文件路径"""
+    now = now or datetime.now(pytz.timezone(settings.TIMEZONE))
+    dropped = []
+    for table, months in retention_months().items():
+        if months <= 0:
+            continue
+        cutoff = add_months(now.year, now.month, -months)
+        for year_month, paths in archived_files(table).items():
+            if year_month < cutoff:
+                for path in paths:
+                    path.unlink(missing_ok=True)
+                    _stats_cache.pop(str(path), None)
+                    dropped.append(str(path))
+    return dropped
+
+
+def _file_stats(path: Path) -> Tuple[int, Dict[str, tuple]]:
+    """文件行数及各列在所有行组上的 min/max（只读取 footer）"""
+    mtime = path.stat().st_mtime
+    cached = _stats_cache.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+    metadata = _pyarrow().parquet.ParquetFile(path).metadata
+    stats: Dict[str, tuple] = {}
+    for index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(index)
+        for column_index in range(row_group.num_columns):
+            column = row_group.column(column_index)
+            statistics = column.statistics
+            if statistics is None or not statistics.has_min_max:
+                continue
+            name = column.path_in_schema
+            low, high = stats.get(name, (statistics.min, statistics.max))
+            stats[name] = (min(low, statistics.min), max(high, statistics.max))
+    _stats_cache[str(path)] = (mtime, metadata.num_rows, stats)
+    return metadata.num_rows, stats
+
+
+def _may_match(stats: Dict[str, tuple], equals: Dict[str, object],
+               start: Optional[datetime], end: Optional[datetime]) -> bool:
+    """根据 min/max 判断文件中是否可能有满足 [start, end) 等条件的行"""
+    for column, value in equals.items():
+        if column in stats and not (stats[column][0] <= value <= stats[column][1]):
+            return False
+    if "created_at" in stats:
+        low, high = stats["created_at"]
+        if start is not None and high < start:
+            return False
+        if end is not None and low >= end:
+            return False
+    return True
+
+
+def _filters(equals: Dict[str, object], start: Optional[datetime], end: Optional[datetime]) -> Optional[list]:
+    filters = [(column, "=", value) for column, value in equals.items()]
+    if start is not None:
+        filters.append(("created_at", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("created_at", "<", pd.Timestamp(end)))
+    return filters or None
+
+
+def _covers(stats: Dict[str, tuple], start: Optional[datetime], end: Optional[datetime]) -> bool:
+    """文件中的全部行是否都在 [start, end) 内"""
+    if "created_at" not in stats:
+        return False
+    low, high = stats["created_at"]
+    return (start is None or low >= start) and (end is None or high < end)
+
+
+def _search(table: str, months: List[Tuple[Tuple[int, int], List[Path]]], equals: Dict[str, object],
+            start: Optional[datetime], end: Optional[datetime], offset: int, limit: int) -> Tuple[int, List[dict]]:
+    """
+    按时间倒序统计总数并取 [offset, offset + limit) 的行
+    没有等值条件且文件完全落在时间范围内时直接使用 footer 中的行数；
+    只有当前页所在的月份才读取 created_at、id 两列定位，再按 id 读取整行
+    """
+    pq = _pyarrow().parquet
+    filters = _filters(equals, start, end)
+    total = 0
+    page: List[dict] = []
+    for _, paths in sorted(months, key=lambda item: item[0], reverse=True):
+        keys: Dict[Path, pd.DataFrame] = {}
+        month_count = 0
+        candidates = []
+        for path in paths:
+            num_rows, stats = _file_stats(path)
+            if not _may_match(stats, equals, start, end):
+                continue
+            candidates.append(path)
+            if not equals and _covers(stats, start, end):
+                month_count += num_rows
+            else:
+                keys[path] = pq.read_table(path, columns=["created_at", "id"], filters=filters).to_pandas()
+                month_count += len(keys[path])
+        # 当前页落在该月的部分
+        begin = max(offset - total, 0)
+        stop = min(offset + limit - total, month_count)
+        if begin < stop:
+            for path in candidates:
+                if path not in keys:
+                    keys[path] = pq.read_table(path, columns=["created_at", "id"]).to_pandas()
+            window = pd.concat(list(keys.values()), ignore_index=True)
+            window = window.sort_values(["created_at", "id"], ascending=False).iloc[begin:stop]
+            ids = [int(value) for value in window["id"]]
+            rows = pd.concat(
+                [pq.read_table(path, filters=[("id", "in", ids)]).to_pandas() for path in candidates],
+                ignore_index=True
+            ).sort_values(["created_at", "id"], ascending=False)
+            rows = rows.astype(object).where(rows.notna(), None)
+            page.extend(
+                {**row, "created_at": row["created_at"].to_pydatetime(), "updated_at": row["updated_at"].to_pydatetime()}
+                for row in rows.to_dict("records")
+            )
+        total += month_count
+    return total, page
+
+
+async def search_archive(
+    db: AsyncSession,
+    table: str,
+    equals: Dict[str, object],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    offset: int = 0,
+    limit: int = 10,
+    tenant_ids: Optional[Set[int]] = None
+) -> Tuple[int, List[dict]]:
+    """
+    在归档文件中按条件和时间范围 [start, end) 查询，结果按 created_at 倒序
+    只查询已无数据库分区的月份（归档完成但分区尚未删除时以数据库为准）
+    返回 (满足条件的总行数, 当前页的行)
+    """
+    files = archived_files(table, tenant_ids)
+    if not files:
+        return 0, []
+    hot_months = set()
+    for name in await list_partitions(db, table):
+        match = PARTITION_NAME.match(name)
+        if match:
+            hot_months.add((int(match.group("year")), int(match.group("month"))))
+    months = []
+    for (year, month), paths in files.items():
+        if (year, month) in hot_months:
+            continue
+        if end is not None and month_start(year, month) >= end:
+            continue
+        if start is not None and month_start(*add_months(year, month, 1)) <= start:
+            continue
+        months.append(((year, month), paths))
+    if not months:
+        return 0, []
+    return await asyncio.to_thread(_search, table, months, equals, start, end, offset, limit)
@@ -0,0 +1,163 @@
+"""
+日志表按月分区维护
+
+access_logs 和 audit_logs 按 created_at 做 RANGE 分区，每月一个分区（<表名>_YYYYMM）：
+- 提前创建当前月及之后若干个月的分区
+- 超过在库月数的分区归档为 Parquet 文件后删除（见 app.utils.log_archive）
+- 超过保留期的分区和归档文件直接删除，不逐行 DELETE
+多个工作进程同时维护时通过 advisory lock 保证只有一个执行。
+"""
+
+import asyncio
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytz
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger(__name__)
+
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_(?P<year>\d{4})(?P<month>\d{2})$")
+
+
+def retention_months() -> Dict[str, int]:
+    """各日志表的保留月数，0 表示不清理"""
+    return {
+        "access_logs": settings.ACCESS_LOG_RETENTION_MONTHS,
+        "audit_logs": settings.AUDIT_LOG_RETENTION_MONTHS,
+    }
+
+
+def month_start(year: int, month: int) -> datetime:
+    """某月第一天零点（按系统时区）"""
+    return pytz.timezone(settings.TIMEZONE).localize(datetime(year, month, 1))
+
+
+def add_months(year: int, month: int, months: int) -> tuple:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def partition_ddl(table: str, year: int, month: int) -> str:
+    """创建某月分区的语句"""
+    next_year, next_month = add_months(year, month, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_{year:04d}{month:02d} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month_start(year, month).isoformat()}') "
+        f"TO ('{month_start(next_year, next_month).isoformat()}')"
+    )
+
+
+async def list_partitions(db: AsyncSession, table: str) -> List[str]:
+    """日志表的现有分区名"""
+    result = await db.execute(
+        text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = p.relnamespace
+            WHERE p.relname = :table AND n.nspname = 'public'
+            ORDER BY c.relname
+        """),
+        {"table": table}
+    )
+    return result.scalars().all()
+
+
+async def ensure_partitions(db: AsyncSession, months_ahead: Optional[int] = None,
+                            now: Optional[datetime] = None) -> List[str]:
+    """创建当前月及之后 months_ahead 个月的分区，返回新建的分区名（由调用方提交）"""
+    months_ahead = settings.LOG_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    now = now or datetime.now(pytz.timezone(settings.TIMEZONE))
+    created = []
+    for table in retention_months():
+        existing = set(await list_partitions(db, table))
+        for offset in range(months_ahead + 1):
+            year, month = add_months(now.year, now.month, offset)
+            name = f"{table}_{year:04d}{month:02d}"
+            if name in existing:
+                continue
+            await db.execute(text(partition_ddl(table, year, month)))
+            created.append(name)
+    return created
+
+
+async def drop_expired_partitions(db: AsyncSession, now: Optional[datetime] = None) -> List[str]:
+    """删除整月都已超过保留期的分区，返回删除的分区名（由调用方提交）"""
+    now = now or datetime.now(pytz.timezone(settings.TIMEZONE))
+    dropped = []
+    for table, months in retention_months().items():
+        if months <= 0:
+            continue
+        # 保留当前月及之前 months 个月
+        cutoff = add_months(now.year, now.month, -months)
+        for name in await list_partitions(db, table):
+            match = PARTITION_NAME.match(name)
+            if not match or match.group("table") != table:
+                continue
+            if (int(match.group("year")), int(match.group("month"))) < cutoff:
+                await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+    return dropped
+
+
+async def maintain_partitions() -> dict:
+    """创建未来分区、归档旧分区并删除过期分区和归档文件；其他进程正在维护时跳过"""
+    # log_archive 依赖本模块的分区工具函数，在此处导入避免循环导入
+    from app.utils.log_archive import archive_partitions, drop_expired_archives
+    
+    async with AsyncSessionLocal() as session:
+        locked = await session.scalar(text("SELECT pg_try_advisory_xact_lock(hashtext('log_partitions'))"))
+        if not locked:
+            await session.rollback()
+            return {"created": [], "archived": [], "dropped": [], "skipped": True}
+        created = await ensure_partitions(session)
+        # 归档在删除过期分区之前执行，在库月数小于保留月数时分区先归档再随保留期删除
+        archived = await archive_partitions(session)
+        dropped = await drop_expired_partitions(session)
+        await session.commit()
+    dropped += await asyncio.to_thread(drop_expired_archives)
+    if created or archived or dropped:
+        logger.info("日志分区维护完成: 新建 %s, 归档 %s, 删除 %s", created, archived, dropped)
+    return {"created": created, "archived": archived, "dropped": dropped, "skipped": False}
+
+
+async def _maintenance_loop(interval: float):
+    while True:
+        try:
+            await maintain_partitions()
+        except Exception as e:
+            logger.error("日志分区维护失败: %s", e)
+        await asyncio.sleep(interval)
+
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+
+def start_partition_maintenance():
+    """启动日志分区定期维护（启动时立即执行一次）"""
+    global _maintenance_task
+    interval = settings.LOG_PARTITION_MAINTENANCE_SECONDS
+    if interval <= 0 or (_maintenance_task and not _maintenance_task.done()):
+        return
+    _maintenance_task = asyncio.create_task(_maintenance_loop(interval))
+
+
+async def stop_partition_maintenance():
+    """停止日志分区定期维护"""
+    global _maintenance_task
+    if _maintenance_task is None:
+        return
+    _maintenance_task.cancel()
+    try:
+        await _maintenance_task
+    except asyncio.CancelledError:
+        pass
+    _maintenance_task = None
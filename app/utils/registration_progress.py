@@ -0,0 +1,177 @@
+"""
+报到进度统计
+
+每个租户的 registration_progress 表按 (院系, 报到环节) 保存学生数和已完成人数：
+- 签到批量提交时在同一事务中增量更新已完成人数（见 checkin_batcher）
+- 定期从 students 和 registration_info 全量重算一次，修正增量误差
+看板接口只读取该汇总表，不扫描学生和报到记录表。
+"""
+
+import asyncio
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.session import AsyncSessionLocal, get_tenant_db
+
+logger = get_logger(__name__)
+
+# 未分配院系的学生统计在 department_id = 0 下
+RECONCILE_SQL = text("""
+    INSERT INTO registration_progress (department_id, process_id, student_count, completed_count)
+    SELECT d.department_id, p.id, d.student_count, COALESCE(c.completed_count, 0)
+    FROM (
+        SELECT COALESCE(department_id, 0) AS department_id, count(*) AS student_count
+        FROM students
+        WHERE status = TRUE
+        GROUP BY 1
+    ) AS d
+    CROSS JOIN registration_processes p
+    LEFT JOIN (
+        SELECT COALESCE(s.department_id, 0) AS department_id, r.process_id, count(*) AS completed_count
+        FROM registration_info r
+        JOIN students s ON s.student_id = r.student_id AND s.status = TRUE
+        WHERE r.status = TRUE
+        GROUP BY 1, 2
+    ) AS c ON c.department_id = d.department_id AND c.process_id = p.id
+""")
+
+PROGRESS_SQL = text("""
+    SELECT department_id, process_id, student_count, completed_count, updated_at
+    FROM registration_progress
+""")
+
+
+async def reconcile_progress(db: AsyncSession, tenant_id: int, wait: bool = True) -> bool:
+    """
+    全量重算租户的报到进度
+    :param wait: 为 False 时，若其他进程正在重算则直接跳过
+    :return: 是否执行了重算
+    """
+    lock_sql = "pg_advisory_xact_lock" if wait else "pg_try_advisory_xact_lock"
+    locked = await db.scalar(
+        text(f"SELECT {lock_sql}(hashtext('registration_progress'), :tenant_id)"),
+        {"tenant_id": tenant_id}
+    )
+    if locked is False:
+        await db.rollback()
+        return False
+    # 阻塞签到的增量更新，保证重算结果与之后的增量衔接
+    await db.execute(text("LOCK TABLE registration_progress IN SHARE ROW EXCLUSIVE MODE"))
+    await db.execute(text("DELETE FROM registration_progress"))
+    await db.execute(RECONCILE_SQL)
+    await db.commit()
+    logger.debug(f"报到进度重算完成: tenant={tenant_id}")
+    return True
+
+
+async def get_progress(db: AsyncSession) -> dict:
+    """读取报到进度汇总，按院系组织"""
+    rows = (await db.execute(PROGRESS_SQL)).all()
+    processes = (await db.execute(text(
+        'SELECT id, name, "order" FROM registration_processes WHERE status = TRUE ORDER BY "order", id'
+    ))).all()
+    department_names = dict((await db.execute(text("SELECT id, name FROM departments"))).all())
+
+    # 院系学生数取该院系各行的最大值（新增环节在重算前只有增量行）
+    departments = {}
+    totals = {process.id: 0 for process in processes}
+    updated_at = None
+    for department_id, process_id, student_count, completed_count, row_updated_at in rows:
+        department = departments.setdefault(department_id, {
+            "department_id": department_id or None,
+            "department_name": department_names.get(department_id),
+            "student_count": 0,
+            "completed": {}
+        })
+        department["student_count"] = max(department["student_count"], student_count)
+        department["completed"][process_id] = completed_count
+        if process_id in totals:
+            totals[process_id] += completed_count
+        if row_updated_at and (updated_at is None or row_updated_at > updated_at):
+            updated_at = row_updated_at
+
+    def percent(completed: int, total: int) -> float:
+        return round(completed * 100 / total, 2) if total else 0.0
+
+    department_list = []
+    for department in sorted(departments.values(), key=lambda d: d["department_id"] or 0):
+        department_list.append({
+            "department_id": department["department_id"],
+            "department_name": department["department_name"],
+            "student_count": department["student_count"],
+            "steps": [
+                {
+                    "process_id": process.id,
+                    "completed_count": department["completed"].get(process.id, 0),
+                    "percent": percent(department["completed"].get(process.id, 0), department["student_count"])
+                }
+                for process in processes
+            ]
+        })
+
+    student_total = sum(d["student_count"] for d in department_list)
+    return {
+        "student_count": student_total,
+        "processes": [
+            {
+                "process_id": process.id,
+                "name": process.name,
+                "order": process.order,
+                "completed_count": totals[process.id],
+                "percent": percent(totals[process.id], student_total)
+            }
+            for process in processes
+        ],
+        "departments": department_list,
+        "updated_at": updated_at
+    }
+
+
+async def _reconcile_all_tenants():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text(
+            "SELECT id FROM tenants WHERE schema_name <> '' AND is_deleted = FALSE"
+        ))
+        tenant_ids = result.scalars().all()
+
+    for tenant_id in tenant_ids:
+        try:
+            async for session in get_tenant_db(tenant_id):
+                await reconcile_progress(session, tenant_id, wait=False)
+        except Exception as e:
+            logger.error(f"报到进度重算失败: tenant={tenant_id}, 错误: {str(e)}")
+
+
+async def _reconcile_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await _reconcile_all_tenants()
+
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+
+def start_progress_reconciler():
+    """启动定期重算任务"""
+    global _reconcile_task
+    interval = settings.REGISTRATION_PROGRESS_RECONCILE_SECONDS
+    if interval <= 0 or (_reconcile_task and not _reconcile_task.done()):
+        return
+    _reconcile_task = asyncio.create_task(_reconcile_loop(interval))
+
+
+async def stop_progress_reconciler():
+    """停止定期重算任务"""
+    global _reconcile_task
+    if _reconcile_task is None:
+        return
+    _reconcile_task.cancel()
+    try:
+        await _reconcile_task
+    except asyncio.CancelledError:
+        pass
+    _reconcile_task = None
@@ -0,0 +1,267 @@
+"""
+慢语句日志
+
+执行耗时达到 SLOW_QUERY_THRESHOLD_MS 的语句在执行线程中只做入队，后台任务按语句指纹汇总并
+切换到语句执行时的 schema（search_path）后执行 EXPLAIN (FORMAT JSON) 采集执行计划（不带 ANALYZE，不会再次执行语句）。
+同一租户的执行计划取决于该租户的数据分布，因此按 (指纹, schema) 分别保存。
+
+- 指纹：去掉参数占位符、字面量和 IN 列表长度后的语句文本，同一查询不同参数得到相同指纹
+- 参数：保存时脱敏（字符串等只保留类型和长度，数值、时间保留原值），原始参数只用于 EXPLAIN，用后丢弃
+- 存储：进程内，最多 SLOW_QUERY_STORE_SIZE 个 (指纹, schema)，超出时淘汰最久未出现的
+- 同一 (指纹, schema) 每 SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS 秒最多采集一次执行计划
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import register_collector
+from app.db.profiler import on_slow_query
+from app.db.session import get_engine
+
+logger = get_logger(__name__)
+
+# 等待采集执行计划的语句数上限，队列满时只计数不采集
+EXPLAIN_QUEUE_SIZE = 100
+EXPLAIN_TIMEOUT_SECONDS = 10
+# 只对这些语句采集执行计划
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:::[\w\[\]]+)?(?:\s*,\s*\?(?:::[\w\[\]]+)?)+\s*\)")
+
+
+def normalize(statement: str) -> str:
+    """把语句中的参数和字面量替换为 ?，IN 列表合并为 (...)"""
+    text = _STRING.sub("?", statement)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("(...)", text)
+    return " ".join(text.split())
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize(statement).encode("utf-8")).hexdigest()[:16]
+
+
+def redact(value: Any) -> Any:
+    """脱敏单个参数：数值、布尔、时间保留，其余只保留类型和长度"""
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters, executemany: bool) -> Any:
+    if executemany:
+        return f"<executemany rows={len(parameters)}>"
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    return redact(parameters)
+
+
+@dataclass
+class SlowQuery:
+    """一个 (指纹, schema) 的慢语句汇总"""
+    fingerprint: str
+    schema: str
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+    # 最近一次的脱敏参数
+    parameters: Any = None
+    plan: Optional[list] = None
+    plan_error: Optional[str] = None
+    plan_captured_at: Optional[float] = None
+    # 最近一次入队采集执行计划的时间
+    explain_requested_at: float = field(default=0.0, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        tz = pytz.timezone(settings.TIMEZONE)
+        root = self.plan[0]["Plan"] if self.plan else {}
+        return {
+            "fingerprint": self.fingerprint,
+            "schema": self.schema,
+            "statement": normalize(self.statement),
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0,
+            "max_ms": round(self.max_ms, 1),
+            "first_seen": datetime.fromtimestamp(self.first_seen, tz),
+            "last_seen": datetime.fromtimestamp(self.last_seen, tz),
+            "plan_node": root.get("Node Type"),
+            "plan_total_cost": root.get("Total Cost"),
+            "plan_rows": root.get("Plan Rows"),
+            "plan_captured_at": datetime.fromtimestamp(self.plan_captured_at, tz) if self.plan_captured_at else None
+        }
+
+    def detail(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "sample_statement": self.statement,
+            "parameters": self.parameters,
+            "plan": self.plan,
+            "plan_error": self.plan_error
+        }
+
+
+class SlowQueryStore:
+    """进程内慢语句汇总，按最近出现时间淘汰，只在事件循环线程中修改"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # (指纹, schema) -> 汇总，按最近出现顺序排列
+        self._entries: Dict[Tuple[str, str], SlowQuery] = {}
+
+    def record(self, schema: str, statement: str, parameters: Any, elapsed_ms: float, now: float) -> SlowQuery:
+        key = (fingerprint(statement), schema)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            entry = SlowQuery(fingerprint=key[0], schema=schema, statement=statement, first_seen=now)
+        self._entries[key] = entry
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.last_seen = now
+        entry.parameters = parameters
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        return entry
+
+    def get(self, fingerprint: str, schema: str) -> Optional[SlowQuery]:
+        return self._entries.get((fingerprint, schema))
+
+    def list(self, schema: Optional[str] = None) -> List[SlowQuery]:
+        return [entry for entry in self._entries.values() if schema is None or entry.schema == schema]
+
+    def clear(self):
+        self._entries.clear()
+
+
+store = SlowQueryStore(settings.SLOW_QUERY_STORE_SIZE)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_queue: Optional[asyncio.Queue] = None
+dropped = 0
+
+
+def _capture(schema: str, statement: str, parameters, executemany: bool, elapsed: float):
+    """在执行语句的线程中调用，只入队"""
+    if _loop is None or statement.lstrip()[:7].upper() == "EXPLAIN":
+        return
+    item = (schema, statement, parameters, executemany, elapsed * 1000, time.time())
+    # 可能在其他线程中执行（如 to_thread 中的同步访问），统一交给事件循环入队
+    _loop.call_soon_threadsafe(_put, item)
+
+
+def _put(item):
+    global dropped
+    try:
+        _queue.put_nowait(item)
+    except asyncio.QueueFull:
+        dropped += 1
+
+
+on_slow_query(_capture)
+
+
+def _slow_query_metrics():
+    yield "slow_query_fingerprints", "gauge", "保存的慢语句 (指纹, schema) 数", (), [((), len(store.list()))]
+    yield "slow_query_dropped_total", "counter", "采集队列满时未处理的慢语句数", (), [((), dropped)]
+
+
+register_collector(_slow_query_metrics)
+
+
+async def _explain(schema: str, statement: str, parameters) -> list:
+    if isinstance(parameters, list):
+        # 列表会被当作多组参数
+        parameters = tuple(parameters)
+    async with get_engine().connect() as conn:
+        # 在语句执行时的 schema 下生成执行计划，只在本事务内生效
+        await conn.execute(text("SELECT set_config('search_path', :schema, true)"), {"schema": schema})
+        result = await asyncio.wait_for(
+            conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters),
+            EXPLAIN_TIMEOUT_SECONDS
+        )
+        plan = result.scalar()
+        await conn.rollback()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+async def _process(item):
+    schema, statement, parameters, executemany, elapsed_ms, now = item
+    entry = store.record(schema, statement, redact_parameters(parameters, executemany), elapsed_ms, now)
+    logger.warning("慢语句: schema=%s, %.0fms, 指纹 %s: %s", schema, elapsed_ms, entry.fingerprint,
+                   normalize(statement)[:500])
+    if executemany or not EXPLAINABLE.match(statement):
+        return
+    if now - entry.explain_requested_at < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+        return
+    entry.explain_requested_at = now
+    try:
+        entry.plan = await _explain(schema, statement, parameters)
+        entry.statement = statement
+        entry.plan_error = None
+        entry.plan_captured_at = time.time()
+    except Exception as e:
+        # 数据库异常的完整信息包含原始参数，只保留驱动返回的错误
+        entry.plan_error = str(getattr(e, "orig", None) or e)
+        logger.error("采集执行计划失败: schema=%s, 指纹 %s, 错误: %s", schema, entry.fingerprint, entry.plan_error)
+
+
+async def _worker():
+    while True:
+        item = await _queue.get()
+        try:
+            await _process(item)
+        except Exception as e:
+            logger.error("处理慢语句失败: %s", e)
+
+
+_worker_task: Optional[asyncio.Task] = None
+
+
+def start_slow_query_log():
+    """开始收集慢语句并采集执行计划"""
+    global _loop, _queue, _worker_task
+    if settings.SLOW_QUERY_THRESHOLD_MS <= 0 or (_worker_task and not _worker_task.done()):
+        return
+    _loop = asyncio.get_running_loop()
+    _queue = asyncio.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+    _worker_task = asyncio.create_task(_worker())
+
+
+async def stop_slow_query_log():
+    """停止收集慢语句"""
+    global _loop, _worker_task
+    _loop = None
+    if _worker_task is None:
+        return
+    _worker_task.cancel()
+    try:
+        await _worker_task
+    except asyncio.CancelledError:
+        pass
+    _worker_task = None
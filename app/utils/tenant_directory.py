@@ -0,0 +1,208 @@
+"""
+租户目录缓存
+
+请求路径上需要检查租户是否可用（状态为 active、未过期、未删除），逐请求查询 tenants 表代价过高。
+每个进程在内存中保存全部租户的元数据：
+- 启动时批量加载；后台任务定期查询版本（max(updated_at) 与行数），版本变化时重新批量加载
+- 本进程的 tenant/update、tenant/delete 直接更新缓存，立即生效；其他进程通过缓存失效总线（tenant 事件）
+  移除该租户后重新查询，总线不可用时在下次版本检查时生效
+- 缓存中没有的租户（其他进程新建）按需单独查询一次并加入缓存；查询不到的租户ID（已物理删除、
+  token 中的租户已不存在）记为不存在，之后直接拒绝，批量重新加载或收到该租户的 tenant 事件时清除
+检查只做字典查找，不访问数据库。
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Optional, Set, Tuple
+
+import pytz
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.session import AsyncSessionLocal
+from app.models.public import Tenant, TenantStatus
+from app.utils.invalidation import subscribe
+
+logger = get_logger(__name__)
+
+# 记为不存在的租户ID数上限，超出时清空重新记录
+MAX_MISSING_TENANTS = 10000
+
+
+@dataclass(frozen=True)
+class TenantInfo:
+    """租户元数据快照"""
+    id: int
+    name: str
+    schema_name: str
+    status: str
+    expire_date: Optional[date]
+    is_deleted: bool
+
+    @classmethod
+    def from_model(cls, tenant: Tenant) -> "TenantInfo":
+        return cls(
+            id=tenant.id,
+            name=tenant.name,
+            schema_name=tenant.schema_name,
+            # 兼容以枚举对象赋值的情况
+            status=getattr(tenant.status, "value", tenant.status),
+            expire_date=tenant.expire_date,
+            is_deleted=bool(tenant.is_deleted)
+        )
+
+    def unavailable_reason(self, today: date) -> Optional[str]:
+        """租户不可用的原因，可用时返回 None"""
+        if self.is_deleted:
+            return "租户不存在或已删除"
+        if self.status != TenantStatus.ACTIVE.value:
+            return "租户已停用"
+        if self.expire_date is not None and self.expire_date < today:
+            return "租户已过期"
+        return None
+
+
+class TenantDirectory:
+    """进程内租户目录，只在事件循环线程中使用"""
+
+    def __init__(self):
+        self._tenants: Dict[int, TenantInfo] = {}
+        # 单独查询过但不存在的租户ID
+        self._missing: Set[int] = set()
+        self._version: Optional[Tuple] = None
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._version is not None
+
+    async def _fetch_version(self, session) -> Tuple:
+        result = await session.execute(select(func.max(Tenant.updated_at), func.count(Tenant.id)))
+        return tuple(result.one())
+
+    async def load(self):
+        """批量加载全部租户"""
+        async with self._load_lock:
+            async with AsyncSessionLocal() as session:
+                version = await self._fetch_version(session)
+                result = await session.execute(select(Tenant))
+                tenants = {tenant.id: TenantInfo.from_model(tenant) for tenant in result.scalars().all()}
+            self._tenants = tenants
+            self._missing = set()
+            self._version = version
+        logger.info("租户目录已加载: %s 个租户", len(tenants))
+
+    async def refresh_if_changed(self) -> bool:
+        """版本变化时重新加载，返回是否重新加载"""
+        async with AsyncSessionLocal() as session:
+            version = await self._fetch_version(session)
+        if version == self._version:
+            return False
+        await self.load()
+        return True
+
+    async def get(self, tenant_id: int) -> Optional[TenantInfo]:
+        tenant = self._tenants.get(tenant_id)
+        if tenant is not None or tenant_id in self._missing:
+            return tenant
+        if not self.loaded:
+            await self.load()
+            return self._tenants.get(tenant_id)
+        # 其他进程新建的租户，单独查询一次
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Tenant).where(Tenant.id == tenant_id))
+            model = result.scalar_one_or_none()
+            if model is None:
+                if len(self._missing) >= MAX_MISSING_TENANTS:
+                    self._missing.clear()
+                self._missing.add(tenant_id)
+                return None
+            tenant = self._tenants[tenant_id] = TenantInfo.from_model(model)
+        return tenant
+
+    def put(self, tenant: Tenant):
+        """写入本进程修改后的租户，立即生效"""
+        self._tenants[tenant.id] = TenantInfo.from_model(tenant)
+        self._missing.discard(tenant.id)
+
+    def evict(self, tenant_id: int):
+        """移除一个租户，下次访问时单独查询"""
+        self._tenants.pop(tenant_id, None)
+        self._missing.discard(tenant_id)
+
+    def clear(self):
+        """清空缓存，下次访问时重新批量加载"""
+        self._tenants = {}
+        self._missing = set()
+        self._version = None
+
+
+tenant_directory = TenantDirectory()
+
+
+def _on_tenant_invalidated(tenant_id):
+    if tenant_id is None:
+        tenant_directory.clear()
+    else:
+        tenant_directory.evict(int(tenant_id))
+
+
+subscribe("tenant", _on_tenant_invalidated)
+
+
+def _today() -> date:
+    return datetime.now(pytz.timezone(settings.TIMEZONE)).date()
+
+
+async def ensure_tenant_available(tenant_id: int) -> TenantInfo:
+    """检查租户可用，不可用时返回 403"""
+    tenant = await tenant_directory.get(tenant_id)
+    reason = "租户不存在或已删除" if tenant is None else tenant.unavailable_reason(_today())
+    if reason:
+        logger.warning("拒绝不可用租户的请求: tenant=%s, %s", tenant_id, reason)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=reason
+        )
+    return tenant
+
+
+async def _refresh_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await tenant_directory.refresh_if_changed()
+        except Exception as e:
+            logger.error("租户目录刷新失败: %s", e)
+
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def start_tenant_directory():
+    """加载租户目录并启动定期版本检查"""
+    global _refresh_task
+    try:
+        await tenant_directory.load()
+    except Exception as e:
+        # 加载失败时在首次访问时重试
+        logger.error("租户目录加载失败: %s", e)
+    interval = settings.TENANT_DIRECTORY_REFRESH_SECONDS
+    if interval > 0 and (_refresh_task is None or _refresh_task.done()):
+        _refresh_task = asyncio.create_task(_refresh_loop(interval))
+
+
+async def stop_tenant_directory():
+    """停止定期版本检查"""
+    global _refresh_task
+    if _refresh_task is None:
+        return
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
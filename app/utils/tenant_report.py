@@ -0,0 +1,236 @@
+"""
+跨租户报表
+
+租户数据分布在各自的 tenant_{id} schema 中。报表引擎把同一条参数化查询分发到各租户：
+- 使用主连接池的会话，在事务内 SET LOCAL search_path 切换到租户 schema，不为每个租户新建引擎
+- 信号量限制并发（不超过连接池大小），每个租户单独超时（同时设置 statement_timeout）
+- 按完成顺序逐个合并结果；单个租户失败或超时不影响其他租户，返回部分结果并标记不完整
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.db.profiler import SEARCH_PATH_INFO_KEY
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReportDefinition:
+    """报表定义：每个租户执行 sql，按 key_columns 分组累加 metric_columns 得到合计"""
+    name: str
+    title: str
+    sql: str
+    key_columns: List[str]
+    metric_columns: List[str]
+    # 允许的查询参数及默认值
+    params: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+REPORTS: Dict[str, ReportDefinition] = {
+    report.name: report
+    for report in [
+        ReportDefinition(
+            name="freshmen",
+            title="各租户新生人数",
+            sql="""
+                SELECT count(*) AS student_count,
+                       count(*) FILTER (WHERE s.status) AS active_count,
+                       count(*) FILTER (WHERE s.dormitory_id IS NOT NULL) AS dormitory_assigned_count
+                FROM students s
+                LEFT JOIN admission_batches b ON b.id = s.admission_batch_id
+                WHERE CAST(:batch_name AS VARCHAR) IS NULL OR b.name = :batch_name
+            """,
+            key_columns=[],
+            metric_columns=["student_count", "active_count", "dormitory_assigned_count"],
+            params={"batch_name": None}
+        ),
+        ReportDefinition(
+            name="registration",
+            title="各租户报到完成情况",
+            sql="""
+                SELECT p.name AS process_name,
+                       COALESCE(sum(r.student_count), 0) AS student_count,
+                       COALESCE(sum(r.completed_count), 0) AS completed_count
+                FROM registration_processes p
+                LEFT JOIN registration_progress r ON r.process_id = p.id
+                WHERE p.status = TRUE
+                GROUP BY p.name
+            """,
+            key_columns=["process_name"],
+            metric_columns=["student_count", "completed_count"]
+        ),
+        ReportDefinition(
+            name="dormitory_occupancy",
+            title="各租户宿舍入住情况",
+            sql="""
+                SELECT building,
+                       count(*) AS room_count,
+                       COALESCE(sum(capacity), 0) AS bed_count,
+                       COALESCE(sum(current_count), 0) AS occupied_count
+                FROM dormitories
+                WHERE status = TRUE
+                  AND (CAST(:building AS VARCHAR) IS NULL OR building = :building)
+                GROUP BY building
+            """,
+            key_columns=["building"],
+            metric_columns=["room_count", "bed_count", "occupied_count"],
+            params={"building": None}
+        ),
+    ]
+}
+
+
+class ReportError(Exception):
+    """报表参数错误"""
+
+
+@dataclass
+class ReportResult:
+    """报表结果，tenants/totals 随各租户完成逐步合并"""
+    report: str
+    title: str
+    tenants: List[dict] = field(default_factory=list)
+    totals: Dict[Tuple, dict] = field(default_factory=dict)
+    failed: List[dict] = field(default_factory=list)
+    timed_out: List[dict] = field(default_factory=list)
+    elapsed_ms: int = 0
+
+    def merge(self, definition: ReportDefinition, tenant: dict, rows: List[dict], elapsed_ms: int):
+        self.tenants.append({**tenant, "rows": rows, "elapsed_ms": elapsed_ms})
+        for row in rows:
+            key = tuple(row[column] for column in definition.key_columns)
+            total = self.totals.setdefault(key, {
+                **{column: row[column] for column in definition.key_columns},
+                **{column: 0 for column in definition.metric_columns},
+                "tenant_count": 0
+            })
+            for column in definition.metric_columns:
+                total[column] += row[column] or 0
+            total["tenant_count"] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "report": self.report,
+            "title": self.title,
+            "complete": not self.failed and not self.timed_out,
+            "tenants": sorted(self.tenants, key=lambda t: t["tenant_id"]),
+            "totals": list(self.totals.values()),
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "elapsed_ms": self.elapsed_ms
+        }
+
+
+# statement_timeout 取消查询时的 SQLSTATE（query_canceled）
+QUERY_CANCELED = "57014"
+
+
+def _is_timeout(error: BaseException) -> bool:
+    """客户端超时或数据库 statement_timeout 取消查询"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return getattr(getattr(error, "orig", None), "sqlstate", None) == QUERY_CANCELED
+
+
+async def _query_tenant(definition: ReportDefinition, tenant: dict, params: dict,
+                        semaphore: asyncio.Semaphore, timeout: float) -> Tuple[dict, List[dict], int]:
+    async with semaphore:
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            # SET LOCAL 仅在当前事务内生效，连接归还连接池后不影响其他请求
+            await session.execute(
+                text("SELECT set_config('search_path', :schema, true), set_config('statement_timeout', :timeout, true)"),
+                {"schema": tenant["schema_name"], "timeout": str(int(timeout * 1000))}
+            )
+            # 慢语句按租户 schema 记录并在该 schema 下采集执行计划；连接归还时清除
+            (await session.connection()).info[SEARCH_PATH_INFO_KEY] = tenant["schema_name"]
+            result = await asyncio.wait_for(session.execute(text(definition.sql), params), timeout)
+            rows = [dict(row) for row in result.mappings().all()]
+            await session.rollback()
+        return tenant, rows, int((time.perf_counter() - start) * 1000)
+
+
+async def run_report(
+    name: str,
+    params: Optional[dict] = None,
+    tenant_ids: Optional[List[int]] = None,
+    concurrency: Optional[int] = None,
+    tenant_timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None
+) -> ReportResult:
+    """
+    在所有（或指定）租户上执行报表
+    :param tenant_timeout: 单个租户的查询超时（秒）
+    :param total_timeout: 整个报表的超时（秒），超时后返回已完成租户的部分结果
+    """
+    definition = REPORTS.get(name)
+    if definition is None:
+        raise ReportError(f"报表不存在: {name}")
+    unknown = set(params or {}) - set(definition.params)
+    if unknown:
+        raise ReportError(f"报表 {name} 不支持参数: {', '.join(sorted(unknown))}")
+    query_params = {**definition.params, **(params or {})}
+    concurrency = concurrency or settings.REPORT_CONCURRENCY
+    tenant_timeout = tenant_timeout or settings.REPORT_TENANT_TIMEOUT_SECONDS
+    total_timeout = total_timeout or settings.REPORT_TOTAL_TIMEOUT_SECONDS
+
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text(
+            "SELECT id, name, schema_name FROM tenants WHERE schema_name <> '' AND is_deleted = FALSE ORDER BY id"
+        ))
+        tenants = [
+            {"tenant_id": row.id, "tenant_name": row.name, "schema_name": row.schema_name}
+            for row in result.all()
+            if tenant_ids is None or row.id in tenant_ids
+        ]
+
+    report = ReportResult(report=definition.name, title=definition.title)
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = {
+        asyncio.create_task(_query_tenant(definition, tenant, query_params, semaphore, tenant_timeout)): tenant
+        for tenant in tenants
+    }
+    try:
+        pending = set(tasks)
+        deadline = start + total_timeout
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(deadline - time.perf_counter(), 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                tenant = tasks[task]
+                public_tenant = {"tenant_id": tenant["tenant_id"], "tenant_name": tenant["tenant_name"]}
+                error = task.exception()
+                if error is not None and _is_timeout(error):
+                    report.timed_out.append(public_tenant)
+                elif error is not None:
+                    logger.error(f"报表查询失败: report={name}, tenant={tenant['tenant_id']}, 错误: {str(error)}")
+                    report.failed.append({**public_tenant, "error": str(error)})
+                else:
+                    _, rows, elapsed_ms = task.result()
+                    report.merge(definition, public_tenant, rows, elapsed_ms)
+        for task in pending:
+            tenant = tasks[task]
+            report.timed_out.append({"tenant_id": tenant["tenant_id"], "tenant_name": tenant["tenant_name"]})
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    report.elapsed_ms = int((time.perf_counter() - start) * 1000)
+    logger.info(
+        f"报表执行完成: report={name}, 租户 {len(tenants)} 个, 成功 {len(report.tenants)}, "
+        f"失败 {len(report.failed)}, 超时 {len(report.timed_out)}, 耗时 {report.elapsed_ms}ms"
+    )
+    return report
@@ -0,0 +1,305 @@
+"""
+租户资源用量统计
+
+所有租户共用进程和数据库，需要知道哪个租户在消耗资源。每个请求结束时按登录用户 token 中的
+tenant_id（无租户为 0）在内存中累加：请求数、5xx 错误数、处理耗时、SQL 语句数与耗时、
+查询返回行数、响应字节数。后台任务每隔 TENANT_USAGE_FLUSH_SECONDS 秒把内存中的累计值
+upsert 到 tenant_resource_usage 表的小时桶，多个工作进程写同一个桶时在数据库中相加。
+
+每次写库时检查本进程这一间隔内的 SQL 耗时：某个租户占全部 SQL 耗时的比例达到
+TENANT_USAGE_ALERT_SHARE，且折算每分钟 SQL 耗时达到 TENANT_USAGE_ALERT_DB_SECONDS_PER_MINUTE 时
+记录警告（疑似吵闹邻居），并计入指标 tenant_usage_alerts_total。
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+import pytz
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import Counter
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger(__name__)
+
+# 排行可用的指标
+METRICS = ("request_count", "error_count", "wall_ms", "db_ms", "query_count", "rows_returned", "bytes_sent")
+
+# 内存中保留的最近告警条数
+MAX_RECENT_ALERTS = 100
+
+tenant_request_seconds_total = Counter(
+    "tenant_request_seconds_total", "各租户请求处理耗时合计（秒）", ("tenant_id",)
+)
+tenant_db_seconds_total = Counter(
+    "tenant_db_seconds_total", "各租户 SQL 执行耗时合计（秒）", ("tenant_id",)
+)
+tenant_rows_returned_total = Counter(
+    "tenant_rows_returned_total", "各租户查询返回的行数", ("tenant_id",)
+)
+tenant_response_bytes_total = Counter(
+    "tenant_response_bytes_total", "各租户响应字节数", ("tenant_id",)
+)
+tenant_usage_alerts_total = Counter(
+    "tenant_usage_alerts_total", "各租户资源用量告警次数", ("tenant_id",)
+)
+
+
+@dataclass
+class TenantUsage:
+    """一个租户在一个小时桶内的累计用量"""
+    request_count: int = 0
+    error_count: int = 0
+    wall_ms: float = 0.0
+    db_ms: float = 0.0
+    query_count: int = 0
+    rows_returned: int = 0
+    bytes_sent: int = 0
+
+    def merge(self, other: "TenantUsage"):
+        for item in fields(self):
+            setattr(self, item.name, getattr(self, item.name) + getattr(other, item.name))
+
+    def to_dict(self) -> dict:
+        return {item.name: getattr(self, item.name) for item in fields(self)}
+
+
+UsageKey = Tuple[datetime, int]
+
+
+def hour_start(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp - timestamp % 3600, timezone.utc)
+
+
+class UsageAccumulator:
+    """进程内的租户用量累加器，只在事件循环线程中使用"""
+
+    def __init__(self):
+        self._pending: Dict[UsageKey, TenantUsage] = {}
+
+    def _usage(self, tenant_id: Optional[int]) -> TenantUsage:
+        key = (hour_start(time.time()), tenant_id or 0)
+        usage = self._pending.get(key)
+        if usage is None:
+            usage = self._pending[key] = TenantUsage()
+        return usage
+
+    def record_request(self, tenant_id: Optional[int], status_code: int, wall_ms: float,
+                       db_ms: float, query_count: int, rows_returned: int):
+        usage = self._usage(tenant_id)
+        usage.request_count += 1
+        usage.error_count += status_code >= 500
+        usage.wall_ms += wall_ms
+        usage.db_ms += db_ms
+        usage.query_count += query_count
+        usage.rows_returned += rows_returned
+        label = tenant_id or 0
+        tenant_request_seconds_total.inc(label, amount=wall_ms / 1000)
+        tenant_db_seconds_total.inc(label, amount=db_ms / 1000)
+        tenant_rows_returned_total.inc(label, amount=rows_returned)
+
+    def record_bytes(self, tenant_id: Optional[int], bytes_sent: int):
+        """响应体发送完成时调用（流式响应在请求处理结束之后）"""
+        self._usage(tenant_id).bytes_sent += bytes_sent
+        tenant_response_bytes_total.inc(tenant_id or 0, amount=bytes_sent)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def take(self) -> Dict[UsageKey, TenantUsage]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: Dict[UsageKey, TenantUsage]):
+        """写库失败时放回未写入的用量，下次一并写入"""
+        for key, usage in pending.items():
+            current = self._pending.get(key)
+            if current is None:
+                self._pending[key] = usage
+            else:
+                current.merge(usage)
+
+
+accumulator = UsageAccumulator()
+
+# 最近的告警，最新的在前
+recent_alerts: Deque[dict] = deque(maxlen=MAX_RECENT_ALERTS)
+
+
+def check_alerts(pending: Dict[UsageKey, TenantUsage], interval: float) -> List[dict]:
+    """检查一个写库间隔内各租户的 SQL 耗时占比"""
+    share_threshold = settings.TENANT_USAGE_ALERT_SHARE
+    if share_threshold <= 0 or interval <= 0:
+        return []
+    db_ms: Dict[int, float] = {}
+    for (_, tenant_id), usage in pending.items():
+        db_ms[tenant_id] = db_ms.get(tenant_id, 0) + usage.db_ms
+    total_ms = sum(db_ms.values())
+    alerts = []
+    for tenant_id, tenant_ms in db_ms.items():
+        if tenant_id == 0 or total_ms <= 0:
+            continue
+        share = tenant_ms / total_ms
+        per_minute = tenant_ms / 1000 * 60 / interval
+        if share >= share_threshold and per_minute >= settings.TENANT_USAGE_ALERT_DB_SECONDS_PER_MINUTE:
+            alert = {
+                "tenant_id": tenant_id,
+                "time": datetime.now(pytz.timezone(settings.TIMEZONE)),
+                "db_share": round(share, 3),
+                "db_seconds_per_minute": round(per_minute, 1)
+            }
+            alerts.append(alert)
+            recent_alerts.appendleft(alert)
+            tenant_usage_alerts_total.inc(tenant_id)
+            logger.warning(
+                "租户资源用量告警: tenant=%s 占 SQL 耗时 %.0f%%, 每分钟 SQL 耗时 %.1f 秒",
+                tenant_id, share * 100, per_minute
+            )
+    return alerts
+
+
+UPSERT_SQL = text("""
+    INSERT INTO tenant_resource_usage (
+        bucket_start, tenant_id, request_count, error_count, wall_ms, db_ms,
+        query_count, rows_returned, bytes_sent
+    ) VALUES (
+        :bucket_start, :tenant_id, :request_count, :error_count, :wall_ms, :db_ms,
+        :query_count, :rows_returned, :bytes_sent
+    )
+    ON CONFLICT (bucket_start, tenant_id) DO UPDATE SET
+        request_count = tenant_resource_usage.request_count + EXCLUDED.request_count,
+        error_count = tenant_resource_usage.error_count + EXCLUDED.error_count,
+        wall_ms = tenant_resource_usage.wall_ms + EXCLUDED.wall_ms,
+        db_ms = tenant_resource_usage.db_ms + EXCLUDED.db_ms,
+        query_count = tenant_resource_usage.query_count + EXCLUDED.query_count,
+        rows_returned = tenant_resource_usage.rows_returned + EXCLUDED.rows_returned,
+        bytes_sent = tenant_resource_usage.bytes_sent + EXCLUDED.bytes_sent
+""")
+
+
+async def flush_usage(interval: float = 0) -> int:
+    """把内存中的用量写入 tenant_resource_usage，返回写入的桶数；interval 为距上次写库的秒数，用于告警检查"""
+    pending = accumulator.take()
+    if not pending:
+        return 0
+    # 固定顺序写入，避免多个工作进程并发 upsert 同一批桶时死锁
+    params = [
+        {"bucket_start": key[0], "tenant_id": key[1], **usage.to_dict()}
+        for key, usage in sorted(pending.items(), key=lambda item: item[0])
+    ]
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(UPSERT_SQL, params)
+            await session.commit()
+    except BaseException:
+        # 包括关闭时取消写库任务（CancelledError），放回后由 stop_usage_flusher 最后一次写入
+        accumulator.restore(pending)
+        raise
+    # 写库成功后才检查告警：失败时用量会放回并在下次合并写入，提前检查会对同一用量重复告警
+    check_alerts(pending, interval)
+    return len(params)
+
+
+async def prune_usage(now: Optional[datetime] = None) -> int:
+    """删除超过保留期的小时桶"""
+    days = settings.TENANT_USAGE_RETENTION_DAYS
+    if days <= 0:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("""
+                DELETE FROM tenant_resource_usage
+                WHERE bucket_start < CAST(:now AS TIMESTAMPTZ) - make_interval(days => :days)
+            """),
+            {"now": now, "days": days}
+        )
+        await session.commit()
+    return result.rowcount
+
+
+async def top_tenants(start_time: datetime, end_time: datetime, metric: str, top: int) -> List[dict]:
+    """按指标合计排序的前 top 个租户"""
+    if metric not in METRICS:
+        raise ValueError(f"不支持的指标: {metric}")
+    totals = ", ".join(f"SUM({column}) AS {column}" for column in METRICS)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(f"""
+                SELECT tenant_id, {totals}
+                FROM tenant_resource_usage
+                WHERE bucket_start >= :start_time AND bucket_start < :end_time
+                GROUP BY tenant_id
+                ORDER BY {metric} DESC
+                LIMIT :top
+            """),
+            {"start_time": start_time, "end_time": end_time, "top": top}
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def metric_total(start_time: datetime, end_time: datetime, metric: str) -> float:
+    """时间范围内全部租户的指标合计"""
+    if metric not in METRICS:
+        raise ValueError(f"不支持的指标: {metric}")
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(f"""
+                SELECT COALESCE(SUM({metric}), 0)
+                FROM tenant_resource_usage
+                WHERE bucket_start >= :start_time AND bucket_start < :end_time
+            """),
+            {"start_time": start_time, "end_time": end_time}
+        )
+        return result.scalar()
+
+
+async def _flush_loop(interval: float):
+    last_prune = 0.0
+    last_flush = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            now = time.monotonic()
+            await flush_usage(now - last_flush)
+            last_flush = now
+            if now - last_prune >= 3600:
+                await prune_usage()
+                last_prune = now
+        except Exception as e:
+            logger.error("写入租户资源用量失败: %s", e)
+
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+def start_usage_flusher():
+    """启动租户资源用量定期写库"""
+    global _flush_task
+    interval = settings.TENANT_USAGE_FLUSH_SECONDS
+    if interval <= 0 or (_flush_task and not _flush_task.done()):
+        return
+    _flush_task = asyncio.create_task(_flush_loop(interval))
+
+
+async def stop_usage_flusher():
+    """停止定期写库并写入剩余的用量"""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    try:
+        await flush_usage()
+    except Exception as e:
+        logger.error("写入剩余租户资源用量失败: %s", e)
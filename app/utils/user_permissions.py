@@ -0,0 +1,124 @@
+"""
+当前用户菜单与 API 权限缓存
+
+/base/usermenu、/base/userapi 每次页面加载都会调用，结果只随角色、菜单、API 配置变化。
+按用户缓存计算结果（超级管理员共用一个条目），未命中时单飞加载，缓存过期或失效后
+同一用户的并发请求只查询一次数据库。
+失效：user 事件（键为用户ID）失效该用户；menu、api 事件失效对应缓存；role 事件两者都失效。
+"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.public import User, Menu, Api, Role, RoleMenu, RoleApi
+from app.utils.cache import TTLCache
+from app.utils.invalidation import subscribe
+
+user_menu_cache = TTLCache(
+    "user_menu",
+    ttl=settings.USER_PERMISSION_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_PERMISSION_CACHE_MAX_ENTRIES
+)
+user_api_cache = TTLCache(
+    "user_api",
+    ttl=settings.USER_PERMISSION_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_PERMISSION_CACHE_MAX_ENTRIES
+)
+
+SUPERUSER_KEY = "*"
+
+
+def _cache_key(user: User):
+    return SUPERUSER_KEY if user.is_superuser else user.id
+
+
+def build_menu_tree(menus) -> List[Dict[str, Any]]:
+    """按 parent_id 构建菜单树"""
+    menu_dict = {}
+    root_menus = []
+
+    # 第一次遍历：创建菜单字典和初始化 children 列表
+    for menu in menus:
+        menu_dict[menu.id] = {
+            "id": menu.id,
+            "name": menu.name,
+            "title": menu.name,
+            "menu_type": menu.menu_type,
+            "path": menu.path,
+            "component": menu.component,
+            "icon": menu.icon,
+            "order": menu.order,
+            "parent_id": menu.parent_id,
+            "is_hidden": menu.is_hidden,
+            "keepalive": menu.keepalive,
+            "redirect": menu.redirect,
+            "is_enabled": True,
+            "children": []
+        }
+
+    # 第二次遍历：构建树形结构
+    for menu in menus:
+        menu_data = menu_dict[menu.id]
+        if menu.parent_id is None:
+            root_menus.append(menu_data)
+        else:
+            parent = menu_dict.get(menu.parent_id)
+            if parent:
+                parent["children"].append(menu_data)
+    return root_menus
+
+
+async def _load_user_menu(user_id: int, is_superuser: bool) -> List[Dict[str, Any]]:
+    query = select(Menu).where(Menu.is_deleted == False).order_by(Menu.order)
+    if not is_superuser:
+        # 用户角色关联的菜单
+        query = query.join(RoleMenu).join(Role).join(Role.users).where(User.id == user_id)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(query)
+        return build_menu_tree(result.scalars().all())
+
+
+async def _load_user_api(user_id: int, is_superuser: bool) -> List[str]:
+    query = select(Api.path).where(Api.is_deleted == False)
+    if not is_superuser:
+        # 用户角色关联的API
+        query = query.join(RoleApi).join(Role).join(Role.users).where(User.id == user_id)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+
+async def get_user_menu_tree(user: User) -> List[Dict[str, Any]]:
+    """当前用户的菜单树，返回共享的缓存对象，调用方不应修改"""
+    user_id, is_superuser = user.id, user.is_superuser
+    return await user_menu_cache.get_or_load(
+        _cache_key(user), lambda: _load_user_menu(user_id, is_superuser)
+    )
+
+
+async def get_user_api_paths(user: User) -> List[str]:
+    """当前用户有权限的 API 路径，返回共享的缓存对象，调用方不应修改"""
+    user_id, is_superuser = user.id, user.is_superuser
+    return await user_api_cache.get_or_load(
+        _cache_key(user), lambda: _load_user_api(user_id, is_superuser)
+    )
+
+
+def _on_user_invalidated(user_id):
+    key = None if user_id is None else int(user_id)
+    user_menu_cache.invalidate(key)
+    user_api_cache.invalidate(key)
+
+
+def _on_role_invalidated(_):
+    user_menu_cache.invalidate()
+    user_api_cache.invalidate()
+
+
+subscribe("user", _on_user_invalidated)
+subscribe("menu", lambda _: user_menu_cache.invalidate())
+subscribe("api", lambda _: user_api_cache.invalidate())
+subscribe("role", _on_role_invalidated)
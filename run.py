@@ -1,15 +1,22 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
 import uvicorn
+from starlette.responses import PlainTextResponse
 from uvicorn.config import LOGGING_CONFIG
 from app.core.config import settings, setup_logging
-from app.core.log import get_logger
+from app.core.log import get_logger, shutdown_logging
 
 # 获取logger
 logger = get_logger("run")
 
-def main():
+def configure_logging():
     # 初始化日志配置
     setup_logging()
-    logger.info("Starting application...")
 
     # 修改默认日志配置
     LOGGING_CONFIG["formatters"]["default"]["fmt"] = "%(asctime)s - %(levelname)s - %(message)s"
@@ -19,11 +26,16 @@ def main():
     ] = '%(asctime)s - %(levelname)s - %(client_addr)s - "%(request_line)s" %(status_code)s'
     LOGGING_CONFIG["formatters"]["access"]["datefmt"] = "%Y-%m-%d %H:%M:%S"
 
-    # 从settings获取主机和端口配置
-    host = settings.APP_HOST
-    port = settings.APP_PORT
+def worker_count() -> int:
+    """工作进程数，未配置时取可用 CPU 数"""
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
-    logger.info(f"Server starting on {host}:{port}")
+def run_development(host: str, port: int):
+    """开发模式：单进程，代码变更自动重载"""
     uvicorn.run(
         "app.main:app",
         host=host,
@@ -32,5 +44,175 @@ def main():
         log_config=LOGGING_CONFIG
     )
 
+class WorkerServer(uvicorn.Server):
+    """工作进程服务：启动（lifespan 预热）完成后冻结 GC，已有对象不再被扫描和写入"""
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        gc.freeze()
+
+    async def shutdown(self, sockets=None):
+        await super().shutdown(sockets=sockets)
+        # uvicorn 退出时会重新发出 SIGTERM 结束进程，先写出队列中剩余的日志
+        shutdown_logging()
+
+class MetricsPortApp:
+    """
+    工作进程同时监听业务端口和本进程的指标端口：
+    指标端口只提供 /metrics，业务端口不提供 /metrics（多个进程共享，抓取结果不稳定）
+    """
+
+    def __init__(self, app, metrics_port: int):
+        self.app = app
+        self.metrics_port = metrics_port
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            on_metrics_port = (scope.get("server") or (None, None))[1] == self.metrics_port
+            if on_metrics_port != (scope["path"] == "/metrics"):
+                await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+def _listen(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(app, sock: socket.socket, metrics_sock: socket.socket = None):
+    # 父进程中设置的信号处理不继承到工作进程，由 uvicorn 处理 SIGTERM/SIGINT 并优雅退出
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    sockets = [sock]
+    if metrics_sock is not None:
+        app = MetricsPortApp(app, metrics_sock.getsockname()[1])
+        sockets.append(metrics_sock)
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        log_config=LOGGING_CONFIG,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS
+    )
+    WorkerServer(config).run(sockets=sockets)
+
+def run_production(host: str, port: int, workers: int):
+    """
+    生产模式：主进程预加载应用并监听端口，fork 出多个工作进程共享监听 socket
+    - 预加载后 gc.freeze()，工作进程继承的对象保持写时复制共享
+    - 收到 SIGTERM/SIGINT 时转发给工作进程，工作进程停止接收新连接并处理完进行中的请求
+    - 工作进程异常退出时自动重启
+    - 配置 METRICS_PORT 时第 i 个工作进程另外监听 METRICS_PORT + i 提供本进程的 /metrics，
+      重启后的进程沿用原端口，Prometheus 按端口分别抓取每个进程
+    """
+    if not hasattr(os, "fork"):
+        # 不支持 fork 的平台使用 uvicorn 自带的多进程模式
+        logger.info(f"当前平台不支持 fork，使用 uvicorn 多进程模式: workers={workers}")
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            http="httptools",
+            log_config=LOGGING_CONFIG,
+            timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS
+        )
+        if settings.METRICS_PORT:
+            logger.warning("uvicorn 多进程模式不支持按进程监听指标端口，METRICS_PORT 未生效")
+        return
+
+    # 预加载应用（导入路由、模型等），工作进程 fork 后直接使用
+    start = time.perf_counter()
+    from app.main import app
+    gc.collect()
+    gc.freeze()
+    logger.info(f"应用预加载完成，耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    sock = _listen(host, port, 2048)
+    # 每个工作进程槽位一个指标端口
+    metrics_socks = []
+    if settings.METRICS_ENABLED and settings.METRICS_PORT:
+        metrics_socks = [_listen(host, settings.METRICS_PORT + slot, 16) for slot in range(workers)]
+        logger.info(f"工作进程指标端口: {settings.METRICS_PORT}-{settings.METRICS_PORT + workers - 1}")
+
+    # pid -> (启动时间, 槽位)
+    children = {}
+    stopping = False
+
+    def spawn(slot: int):
+        metrics_sock = metrics_socks[slot] if metrics_socks else None
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, metrics_sock)
+            finally:
+                os._exit(0)
+        children[pid] = (time.monotonic(), slot)
+        logger.info(f"工作进程已启动: pid={pid}, slot={slot}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        logger.info(f"收到信号 {signal.Signals(signum).name}，通知 {len(children)} 个工作进程优雅退出")
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        child = children.pop(pid, None)
+        if child is None:
+            continue
+        started_at, slot = child
+        logger.info(f"工作进程已退出: pid={pid}, status={os.waitstatus_to_exitcode(status)}")
+        if not stopping:
+            # 启动即退出时稍作等待，避免反复重启
+            if time.monotonic() - started_at < 1:
+                time.sleep(1)
+            spawn(slot)
+
+    sock.close()
+    for metrics_sock in metrics_socks:
+        metrics_sock.close()
+    logger.info("所有工作进程已退出")
+
+def main():
+    parser = argparse.ArgumentParser(description="启动服务")
+    parser.add_argument("--prod", action="store_true", help="生产模式（DEBUG=False 时默认启用）")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认取可用 CPU 数")
+    args = parser.parse_args()
+
+    configure_logging()
+    logger.info("Starting application...")
+
+    # 从settings获取主机和端口配置
+    host = settings.APP_HOST
+    port = settings.APP_PORT
+
+    if args.prod or not settings.DEBUG:
+        workers = args.workers or worker_count()
+        logger.info(f"Server starting on {host}:{port} (production, workers={workers})")
+        run_production(host, port, workers)
+    else:
+        logger.info(f"Server starting on {host}:{port}")
+        run_development(host, port)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
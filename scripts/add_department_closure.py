@@ -0,0 +1,27 @@
+"""
+执行租户 department_closure 院系闭包表迁移脚本
+"""
+
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations.add_department_closure import add_department_closure
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def main():
+    try:
+        logger.info("开始创建租户院系闭包表...")
+        await add_department_closure()
+        logger.info("租户院系闭包表创建完成")
+    except Exception as e:
+        logger.error(f"创建院系闭包表失败: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+"""
+执行租户 registration_info 唯一约束迁移脚本
+"""
+
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations.add_registration_info_unique import add_registration_info_unique
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def main():
+    try:
+        logger.info("开始为租户 registration_info 添加唯一约束...")
+        await add_registration_info_unique()
+        logger.info("租户 registration_info 唯一约束添加完成")
+    except Exception as e:
+        logger.error(f"添加唯一约束失败: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+"""
+执行租户 registration_progress 报到进度汇总表迁移脚本
+"""
+
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations.add_registration_progress import add_registration_progress
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def main():
+    try:
+        logger.info("开始创建租户报到进度汇总表...")
+        await add_registration_progress()
+        logger.info("租户报到进度汇总表创建完成")
+    except Exception as e:
+        logger.error(f"创建报到进度汇总表失败: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
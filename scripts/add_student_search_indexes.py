@@ -0,0 +1,27 @@
+"""
+执行租户 students 检索索引迁移脚本
+"""
+
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations.add_student_search_indexes import add_student_search_indexes
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def main():
+    try:
+        logger.info("开始创建学生检索索引...")
+        await add_student_search_indexes()
+        logger.info("学生检索索引创建完成")
+    except Exception as e:
+        logger.error(f"创建学生检索索引失败: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+审计日志查询计划检查脚本
+
+对 /log/list 的各种筛选组合执行 EXPLAIN (FORMAT JSON)，检查：
+- 只扫描时间范围内的月分区（分区裁剪生效）
+- 使用预期的索引，不对分区做全表扫描
+开发库数据量小时规划器倾向于全表扫描，因此在事务内关闭 enable_seqscan，
+检查的是查询条件能否使用索引（如时间参数类型不匹配时索引无法使用）。
+任一检查失败时以状态码 1 退出，可在部署前或 CI 中执行。
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytz
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.public import AuditLog
+from app.utils.audit import audit_log_query
+from app.utils.log_partitions import add_months, month_start
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+# 检查覆盖的月份数（不超过预先创建的分区数）
+LOG_MONTHS = max(min(settings.LOG_PARTITION_MONTHS_AHEAD + 1, 4), 2)
+
+def _cases() -> list:
+    """
+    (名称, 筛选条件, 预期使用的索引名片段, 预期扫描的分区)
+    使用当前月及之后的月份，这些分区由分区维护任务预先创建
+    """
+    now = datetime.now(pytz.timezone(settings.TIMEZONE))
+    months = [add_months(now.year, now.month, offset) for offset in range(LOG_MONTHS)]
+    names = [f"audit_logs_{year:04d}{month:02d}" for year, month in months]
+    first = month_start(*months[0])
+    second = month_start(*months[1])
+    last_day = month_start(*add_months(*months[-1], 1)) - timedelta(days=1)
+    return [
+        ("按用户和月份", {"user_id": 1, "start_time": f"{first:%Y-%m-%d}", "end_time": f"{second - timedelta(days=1):%Y-%m-%d}"},
+         "user_id_created_at", set(names[:1])),
+        ("按操作类型和月份", {"action": "update", "start_time": f"{first:%Y-%m-%d}", "end_time": f"{second - timedelta(days=1):%Y-%m-%d}"},
+         "action_created_at", set(names[:1])),
+        ("按用户和操作类型", {"user_id": 1, "action": "update", "start_time": f"{first:%Y-%m-%d} 08:00:00", "end_time": f"{second:%Y-%m}-15 18:00:00"},
+         "user_id_created_at", set(names[:2])),
+        ("仅时间范围（多个月）", {"start_time": f"{first:%Y-%m-%d}", "end_time": f"{last_day:%Y-%m-%d}"},
+         "created_at", set(names)),
+    ]
+
+def _render(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+async def _explain(session, query) -> dict:
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {_render(query)}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+def _check(name: str, plan: dict, index_fragment: str, partitions: set) -> list:
+    errors = []
+    all_nodes = list(_walk(plan))
+    nodes = [node for node in all_nodes if node.get("Relation Name", "").startswith("audit_logs")]
+    # Bitmap Index Scan 节点只有索引名，没有表名
+    indexes = {node["Index Name"] for node in all_nodes if node.get("Index Name", "").startswith("audit_logs")}
+    scanned = {node["Relation Name"] for node in nodes}
+    for node in nodes:
+        if node["Node Type"] == "Seq Scan":
+            errors.append(f"{name}: 分区 {node['Relation Name']} 使用了全表扫描")
+    if scanned - partitions:
+        errors.append(f"{name}: 扫描了范围外的分区 {sorted(scanned - partitions)}")
+    if not any(index_fragment in index for index in indexes):
+        errors.append(f"{name}: 未使用索引 *{index_fragment}*，实际使用 {sorted(indexes)}")
+    return errors
+
+async def main():
+    errors = []
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, filters, index_fragment, partitions in _cases():
+            query = audit_log_query(**filters)
+            page = query.order_by(AuditLog.created_at.desc()).limit(10)
+            count = select(func.count()).select_from(query.subquery())
+            for label, statement in (("分页", page), ("计数", count)):
+                plan = await _explain(session, statement)
+                case_errors = _check(f"{name}/{label}", plan, index_fragment, partitions)
+                errors.extend(case_errors)
+                logger.info(f"{name}/{label}: {'失败' if case_errors else '通过'}")
+        await session.rollback()
+
+    for error in errors:
+        logger.error(error)
+    if errors:
+        sys.exit(1)
+    logger.info("审计日志查询计划检查全部通过")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+"""
+选床并发压力测试脚本
+
+在指定租户中创建临时房间和学生，并发调用选床逻辑，
+输出吞吐量并校验没有超员、房间人数与实际入住一致、重复提交幂等。
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.utils.dorm_reservation import ReservationError, reserve_bed
+
+logger = get_logger(__name__)
+
+async def setup_data(session: AsyncSession, building: str, prefix: str, rooms: int, students: int, capacity: int):
+    """创建测试房间和学生"""
+    await session.execute(
+        text("""
+            INSERT INTO dormitories (building, room_number, capacity, current_count, status)
+            SELECT :building, lpad(g::text, 5, '0'), :capacity, 0, TRUE
+            FROM generate_series(1, :rooms) AS g
+        """),
+        {"building": building, "capacity": capacity, "rooms": rooms}
+    )
+    await session.execute(
+        text("""
+            INSERT INTO students (id_card, student_id, name, status)
+            SELECT :prefix || lpad(g::text, 8, '0'), :prefix || '-' || g, 'load test', TRUE
+            FROM generate_series(1, :students) AS g
+        """),
+        {"prefix": prefix, "students": students}
+    )
+    await session.commit()
+
+async def cleanup_data(session: AsyncSession, building: str, prefix: str):
+    """清理测试数据"""
+    await session.execute(text("DELETE FROM students WHERE id_card LIKE :prefix"), {"prefix": f"{prefix}%"})
+    await session.execute(text("DELETE FROM dormitories WHERE building = :building"), {"building": building})
+    await session.commit()
+
+async def run(args):
+    schema_name = f"tenant_{args.tenant_id}"
+    engine = create_async_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
+        pool_size=args.concurrency,
+        max_overflow=0,
+        connect_args={
+            "server_settings": {
+                "timezone": "Asia/Shanghai",
+                "search_path": schema_name
+            }
+        }
+    )
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    run_id = uuid.uuid4().hex[:6].upper()
+    building = f"LOADTEST-{run_id}"
+    prefix = f"LT{run_id}"
+
+    async with SessionLocal() as session:
+        await setup_data(session, building, prefix, args.rooms, args.students, args.capacity)
+        room_ids = (await session.execute(
+            text("SELECT id FROM dormitories WHERE building = :building"), {"building": building}
+        )).scalars().all()
+    logger.info(f"测试数据已创建: {args.rooms} 间房间, {args.students} 名学生, schema={schema_name}")
+
+    # 每个学生一个请求，另有部分学生重复提交以验证幂等
+    requests = [f"{prefix}-{i}" for i in range(1, args.students + 1)]
+    requests += random.sample(requests, int(len(requests) * args.duplicate_ratio))
+    random.shuffle(requests)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for student_id in requests:
+        queue.put_nowait(student_id)
+
+    stats = {"ok": 0, "duplicate": 0, "full": 0, "error": 0}
+
+    async def worker():
+        async with SessionLocal() as session:
+            while True:
+                try:
+                    student_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                # 一半请求抢指定房间（热点行），一半自动选房
+                dormitory_id = random.choice(room_ids) if random.random() < 0.5 else None
+                try:
+                    result = await reserve_bed(
+                        session,
+                        student_id=student_id,
+                        dormitory_id=dormitory_id,
+                        building=building
+                    )
+                    stats["duplicate" if result.already_reserved else "ok"] += 1
+                except ReservationError as e:
+                    stats["full" if e.status_code == 409 else "error"] += 1
+                except Exception as e:
+                    await session.rollback()
+                    stats["error"] += 1
+                    logger.error(f"选床异常: {str(e)}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    async with SessionLocal() as session:
+        overbooked = await session.scalar(
+            text("SELECT count(*) FROM dormitories WHERE building = :building AND current_count > capacity"),
+            {"building": building}
+        )
+        mismatched = await session.scalar(
+            text("""
+                SELECT count(*) FROM (
+                    SELECT d.id, d.current_count, count(s.id_card) AS actual
+                    FROM dormitories d
+                    LEFT JOIN students s ON s.dormitory_id = d.id
+                    WHERE d.building = :building
+                    GROUP BY d.id, d.current_count
+                ) AS c
+                WHERE c.current_count <> c.actual
+            """),
+            {"building": building}
+        )
+        assigned = await session.scalar(
+            text("SELECT count(*) FROM students WHERE id_card LIKE :prefix AND dormitory_id IS NOT NULL"),
+            {"prefix": f"{prefix}%"}
+        )
+        if not args.keep:
+            await cleanup_data(session, building, prefix)
+
+    await engine.dispose()
+
+    logger.info(
+        f"请求 {len(requests)} 次, 耗时 {elapsed:.2f}s, {len(requests) / elapsed:.0f} 次/秒; "
+        f"成功 {stats['ok']}, 重复 {stats['duplicate']}, 无床位 {stats['full']}, 异常 {stats['error']}"
+    )
+    beds = args.rooms * args.capacity
+    failures = []
+    if overbooked:
+        failures.append(f"{overbooked} 间房间超员")
+    if mismatched:
+        failures.append(f"{mismatched} 间房间人数与实际入住不一致")
+    if assigned != stats["ok"]:
+        failures.append(f"入住学生数 {assigned} 与成功次数 {stats['ok']} 不一致")
+    if assigned != min(beds, args.students):
+        failures.append(f"入住学生数 {assigned} 未达到可分配床位 {min(beds, args.students)}")
+    if failures:
+        for failure in failures:
+            logger.error(f"校验失败: {failure}")
+        sys.exit(1)
+    logger.info("校验通过: 无超员，房间人数一致，重复提交幂等")
+
+def main():
+    parser = argparse.ArgumentParser(description="选床并发压力测试")
+    parser.add_argument("--tenant-id", type=int, required=True, help="租户ID")
+    parser.add_argument("--students", type=int, default=5000, help="学生数")
+    parser.add_argument("--rooms", type=int, default=1000, help="房间数")
+    parser.add_argument("--capacity", type=int, default=4, help="每间房床位数")
+    parser.add_argument("--concurrency", type=int, default=100, help="并发数")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="重复提交比例")
+    parser.add_argument("--keep", action="store_true", help="保留测试数据")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+执行日志分区维护脚本：创建未来月份分区、归档旧分区并删除超过保留期的分区和归档文件
+"""
+
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.log_partitions import maintain_partitions
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+async def main():
+    try:
+        logger.info("开始维护日志分区...")
+        result = await maintain_partitions()
+        if result["skipped"]:
+            logger.info("其他进程正在维护日志分区，已跳过")
+        else:
+            logger.info(f"日志分区维护完成: 新建 {result['created']}, 归档 {result['archived']}, 删除 {result['dropped']}")
+    except Exception as e:
+        logger.error(f"日志分区维护失败: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+报到进度增量维护测试脚本
+
+在指定租户中创建临时学生和报到环节，通过签到批量提交器依次签到、重复签到、取消签到，
+校验 registration_progress 的已完成人数每一步都与实际一致，且与全量重算结果一致。
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from sqlalchemy import text
+
+from app.core.log import get_logger
+from app.db.session import get_tenant_db
+from app.utils.checkin_batcher import CheckinBatcher, CheckinItem
+from app.utils.registration_progress import reconcile_progress
+
+logger = get_logger(__name__)
+
+async def completed_count(tenant_id: int, process_id: int) -> int:
+    async for session in get_tenant_db(tenant_id):
+        return await session.scalar(
+            text("SELECT COALESCE(sum(completed_count), 0) FROM registration_progress WHERE process_id = :process_id"),
+            {"process_id": process_id}
+        )
+
+async def run(args):
+    run_id = uuid.uuid4().hex[:6].upper()
+    student_id = f"RP{run_id}"
+    async for session in get_tenant_db(args.tenant_id):
+        await session.execute(
+            text("INSERT INTO students (id_card, student_id, name, status) VALUES (:id_card, :student_id, 'progress test', TRUE)"),
+            {"id_card": f"RP{run_id}00000000", "student_id": student_id}
+        )
+        process_id = await session.scalar(
+            text("""
+                INSERT INTO registration_processes (name, "order", is_required, status)
+                VALUES (:name, 9999, FALSE, TRUE)
+                RETURNING id
+            """),
+            {"name": f"PROGRESS-TEST-{run_id}"}
+        )
+        await session.commit()
+    logger.info(f"测试数据已创建: 学生 {student_id}, 报到环节 {process_id}")
+
+    batcher = CheckinBatcher(args.tenant_id, max_batch=10, max_delay=0.005)
+    steps = [
+        ("签到", True, 1),
+        ("重复签到", True, 1),
+        ("取消签到", False, 0),
+        ("重复取消签到", False, 0),
+        ("再次签到", True, 1),
+    ]
+    failures = []
+    try:
+        for name, status, expected in steps:
+            await batcher.submit(CheckinItem(student_id=student_id, process_id=process_id, status=status))
+            actual = await completed_count(args.tenant_id, process_id)
+            logger.info(f"{name}: 已完成人数 {actual}（预期 {expected}）")
+            if actual != expected:
+                failures.append(f"{name}后已完成人数为 {actual}，预期 {expected}")
+
+        async for session in get_tenant_db(args.tenant_id):
+            await reconcile_progress(session, args.tenant_id)
+        reconciled = await completed_count(args.tenant_id, process_id)
+        if reconciled != steps[-1][2]:
+            failures.append(f"全量重算后已完成人数为 {reconciled}，与增量结果 {steps[-1][2]} 不一致")
+    finally:
+        await batcher.close()
+        async for session in get_tenant_db(args.tenant_id):
+            await session.execute(text("DELETE FROM registration_info WHERE student_id = :student_id"), {"student_id": student_id})
+            await session.execute(text("DELETE FROM registration_progress WHERE process_id = :process_id"), {"process_id": process_id})
+            await session.execute(text("DELETE FROM registration_processes WHERE id = :process_id"), {"process_id": process_id})
+            await session.execute(text("DELETE FROM students WHERE student_id = :student_id"), {"student_id": student_id})
+            await session.commit()
+
+    if failures:
+        for failure in failures:
+            logger.error(f"校验失败: {failure}")
+        sys.exit(1)
+    logger.info("校验通过: 重复签到不重复计数，取消签到扣减已完成人数")
+
+def main():
+    parser = argparse.ArgumentParser(description="报到进度增量维护测试")
+    parser.add_argument("--tenant-id", type=int, required=True, help="租户ID")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()